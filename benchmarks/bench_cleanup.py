@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the generated file cleanup pipeline (utils/cleanup.py).
+
+* Every corpus file is cleaned and compared with its golden output, so a speedup never changes the cleaned result.
+* The corpus is scaled synthetically to each requested size and cleaned in a fresh subprocess, timing every stage
+  and recording lines per second and peak RSS.
+* Results are compared with benchmarks/baseline.json, the run fails when throughput or memory regress past the threshold.
+
+python benchmarks/bench_cleanup.py [--sizes 1,10,100,500] [--repeat 3] [--threshold 0.25] [--update-baseline] [--update-golden]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from loguru import logger
+from utils import cleanup
+
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SIZES_MB = [1, 10, 100, 500]
+DEFAULT_THRESHOLD = 0.25
+
+GENERATED_HEADER = "# __generated__ by Terraform\n# Please review these resources and move them into your main configuration files.\n\n"
+RESOURCE_LINE = re.compile(r'^(resource\s+"\w+"\s+")([^"]+)(")', re.MULTILINE)
+FROM_LINE = re.compile(r'^(# __generated__ by Terraform from ".*?)(")$', re.MULTILINE)
+
+
+def corpus_files():
+    return sorted(os.path.join(CORPUS_DIR, filename) for filename in os.listdir(CORPUS_DIR) if filename.endswith(".tf"))
+
+
+def check_golden(update=False):
+    """
+    Clean every corpus file and compare it with its golden output. Returns the names of the files that differ.
+    """
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for corpus_file in corpus_files():
+            filename = os.path.basename(corpus_file)
+            tf_file = os.path.join(tmp_dir, filename)
+            shutil.copyfile(corpus_file, tf_file)
+            cleanup.cleanup_tf_plan_file(input_tf_file=tf_file)
+
+            golden_file = os.path.join(GOLDEN_DIR, filename)
+            if update:
+                shutil.copyfile(tf_file, golden_file)
+                continue
+            with open(tf_file, "r") as cleaned, open(golden_file, "r") as golden:
+                if cleaned.read() != golden.read():
+                    mismatches.append(filename)
+    return mismatches
+
+
+def build_synthetic_file(path, size_mb):
+    """
+    Write a generated-plan file of about size_mb by repeating the corpus resources under unique names.
+    Returns the number of lines written.
+    """
+    blocks = []
+    for corpus_file in corpus_files():
+        with open(corpus_file, "r") as readfile:
+            blocks.append(readfile.read().replace(GENERATED_HEADER, "", 1))
+
+    target = size_mb * 1024 * 1024
+    written = 0
+    lines = 0
+    copy = 0
+    with open(path, "w") as writefile:
+        writefile.write(GENERATED_HEADER)
+        while written < target:
+            copy += 1
+            for block in blocks:
+                block = RESOURCE_LINE.sub(lambda match: f"{match.group(1)}{match.group(2)}-{copy}{match.group(3)}", block)
+                block = FROM_LINE.sub(lambda match: f"{match.group(1)}-{copy}{match.group(2)}", block)
+                writefile.write(block)
+                written += len(block)
+                lines += block.count("\n")
+    return lines
+
+
+def run_stages(tf_file):
+    """
+    Clean tf_file stage by stage, in the order of cleanup_tf_plan_file. Runs inside the benchmark subprocess.
+    """
+    logger.remove()
+    timings = {}
+
+    start = time.perf_counter()
+    cleanup.remove_global_lines(tf_file, cleanup.RESOURCE_CLEANUP["global"])
+    timings["remove_global_lines"] = time.perf_counter() - start
+
+    stage_start = time.perf_counter()
+    cleanup.process_terraform_plan(tf_file)
+    timings["process_terraform_plan"] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    cleanup.remove_multiline(tf_file, cleanup.RESOURCE_CLEANUP["multiline_pattern"])
+    timings["remove_multiline"] = time.perf_counter() - stage_start
+
+    timings["total"] = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    return {"timings": timings, "peak_rss_mb": round(peak_rss_mb, 1)}
+
+
+def bench_size(size_mb, tmp_dir, repeat=3):
+    """
+    Clean a synthetic file of size_mb repeat times, each in a fresh subprocess, and keep the fastest run.
+    """
+    source_file = os.path.join(tmp_dir, f"bench-{size_mb}mb.tf")
+    tf_file = os.path.join(tmp_dir, f"generated-plan-import-bench-{size_mb}mb.tf")
+    lines = build_synthetic_file(source_file, size_mb)
+
+    runs = []
+    for _ in range(max(1, repeat)):
+        shutil.copyfile(source_file, tf_file)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-stages", tf_file], check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output))
+    os.remove(source_file)
+    os.remove(tf_file)
+
+    result = min(runs, key=lambda run: run["timings"]["total"])
+    result["peak_rss_mb"] = max(run["peak_rss_mb"] for run in runs)
+    result["lines"] = lines
+    result["lines_per_second"] = round(lines / result["timings"]["total"])
+    result["timings"] = {stage: round(elapsed, 4) for stage, elapsed in result["timings"].items()}
+    return result
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with the baseline of the same size. Returns the list of regressions found.
+    """
+    regressions = []
+    for size, result in results.items():
+        reference = baseline.get("results", {}).get(size)
+        if not reference:
+            logger.warning(f"{size}MB: no baseline to compare with")
+            continue
+        if result["lines_per_second"] < reference["lines_per_second"] * (1 - threshold):
+            regressions.append(f"{size}MB: {result['lines_per_second']} lines/s, baseline {reference['lines_per_second']} lines/s")
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{size}MB: peak RSS {result['peak_rss_mb']}MB, baseline {reference['peak_rss_mb']}MB")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the generated file cleanup pipeline")
+    parser.add_argument("--sizes", dest="sizes", help="Comma separated synthetic file sizes in MB", type=str, default=",".join(str(size) for size in DEFAULT_SIZES_MB))
+    parser.add_argument("--threshold", dest="threshold", help="Allowed relative regression of lines/s and peak RSS against the baseline", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeat", dest="repeat", help="Runs per size, the fastest one is kept", type=int, default=3)
+    parser.add_argument("--update-baseline", dest="update_baseline", help="Store the results as the new baseline", action="store_true")
+    parser.add_argument("--update-golden", dest="update_golden", help="Regenerate the golden outputs, only after an intended change of the cleanup rules", action="store_true")
+    parser.add_argument("--run-stages", dest="run_stages", help=argparse.SUPPRESS, type=str, default=None)
+    args = parser.parse_args(argv)
+
+    if args.run_stages:
+        print(json.dumps(run_stages(args.run_stages)))
+        return 0
+
+    # Keep the per-stage logging of utils/cleanup.py out of the report
+    logger.remove()
+    mismatches = check_golden(update=args.update_golden)
+    logger.add(sys.stderr, level="INFO", format="{message}")
+    if mismatches:
+        logger.error(f"Cleaned output differs from the golden files: {mismatches}")
+        return 1
+    logger.info("Cleaned output matches the golden files" if not args.update_golden else "Golden files updated")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in [int(size) for size in args.sizes.split(",")]:
+            result = bench_size(size_mb, tmp_dir, repeat=args.repeat)
+            results[str(size_mb)] = result
+            stages = "  ".join(f"{stage} {elapsed:.3f}s" for stage, elapsed in result["timings"].items())
+            logger.info(f"{size_mb:>5}MB  {result['lines']:>10} lines  {result['lines_per_second']:>9} lines/s  peak RSS {result['peak_rss_mb']:>7}MB  {stages}")
+
+    try:
+        with open(BASELINE_FILE, "r") as readfile:
+            baseline = json.load(readfile)
+    except FileNotFoundError:
+        baseline = {}
+
+    if args.update_baseline:
+        baseline.setdefault("results", {}).update(results)
+        baseline["machine"] = {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()}
+        with open(BASELINE_FILE, "w") as writefile:
+            json.dump(baseline, writefile, indent=2, sort_keys=True)
+        logger.info(f"Baseline updated in {BASELINE_FILE}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        logger.error(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,105 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/applicationGateways/agw-bench"
+resource "azurerm_application_gateway" "agw-bench" {
+  enable_http2                      = true
+  fips_enabled                      = false
+  firewall_policy_id                = null
+  force_firewall_policy_association = false
+  location                          = "westeurope"
+  name                              = "agw-bench"
+  resource_group_name               = "rg-bench"
+  tags                              = {}
+  zones                             = []
+  autoscale_configuration {
+    max_capacity = 10
+    min_capacity = 0
+  }
+  backend_address_pool {
+    fqdns        = ["app.internal.example.com"]
+    ip_addresses = []
+    name         = "pool-app"
+  }
+  backend_http_settings {
+    affinity_cookie_name                = null
+    cookie_based_affinity               = "Disabled"
+    host_name                           = null
+    name                                = "http-app"
+    path                                = null
+    pick_host_name_from_backend_address = true
+    port                                = 443
+    probe_name                          = "probe-app"
+    protocol                            = "Https"
+    request_timeout                     = 30
+    trusted_root_certificate_names      = []
+  }
+  frontend_ip_configuration {
+    name                            = "public"
+    private_ip_address              = null
+    private_ip_address_allocation   = "Dynamic"
+    private_link_configuration_name = null
+    public_ip_address_id            = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/publicIPAddresses/agw-bench-pip"
+    subnet_id                       = null
+  }
+  frontend_port {
+    name = "https"
+    port = 443
+  }
+  gateway_ip_configuration {
+    name      = "gateway"
+    subnet_id = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/virtualNetworks/vnet-bench/subnets/agw"
+  }
+  http_listener {
+    firewall_policy_id             = null
+    frontend_ip_configuration_name = "public"
+    frontend_port_name             = "https"
+    host_name                      = null
+    host_names                     = []
+    name                           = "listener-https"
+    protocol                       = "Https"
+    require_sni                    = false
+    ssl_certificate_name           = "wildcard"
+    ssl_profile_name               = null
+  }
+  probe {
+    host                                      = null
+    interval                                  = 30
+    minimum_servers                           = 0
+    name                                      = "probe-app"
+    path                                      = "/healthz"
+    pick_host_name_from_backend_http_settings = true
+    port                                      = 0
+    protocol                                  = "Https"
+    timeout                                   = 30
+    unhealthy_threshold                       = 3
+    match {
+      body        = null
+      status_code = ["200-399"]
+    }
+  }
+  request_routing_rule {
+    backend_address_pool_name   = "pool-app"
+    backend_http_settings_name  = "http-app"
+    http_listener_name          = "listener-https"
+    name                        = "rule-app"
+    priority                    = 100
+    redirect_configuration_name = null
+    rewrite_rule_set_name       = null
+    rule_type                   = "Basic"
+    url_path_map_name           = null
+  }
+  sku {
+    capacity = 0
+    name     = "WAF_v2"
+    tier     = "WAF_v2"
+  }
+  ssl_certificate {} # sensitive
+  ssl_policy {
+    cipher_suites        = []
+    disabled_protocols   = []
+    min_protocol_version = jsonencode(2)
+    policy_name          = "AppGwSslPolicy20220101"
+    policy_type          = "Predefined"
+  }
+}
@@ -0,0 +1,107 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench"
+resource "azurerm_kubernetes_cluster" "aks-bench" {
+  api_server_authorized_ip_ranges     = []
+  automatic_channel_upgrade           = "patch"
+  azure_policy_enabled                = false
+  custom_ca_trust_certificates_base64 = []
+  disk_encryption_set_id              = null
+  dns_prefix                          = "aks-bench-dns"
+  dns_prefix_private_cluster          = null
+  edge_zone                           = null
+  http_application_routing_enabled    = false
+  image_cleaner_enabled               = false
+  image_cleaner_interval_hours        = 0
+  kubernetes_version                  = "1.29.4"
+  local_account_disabled              = false
+  location                            = "westeurope"
+  name                                = "aks-bench"
+  node_os_channel_upgrade             = "NodeImage"
+  node_resource_group                 = "MC_rg-bench_aks-bench_westeurope"
+  oidc_issuer_enabled                 = true
+  open_service_mesh_enabled           = false
+  private_cluster_enabled             = false
+  private_cluster_public_fqdn_enabled = false
+  private_dns_zone_id                 = null
+  resource_group_name                 = "rg-bench"
+  role_based_access_control_enabled   = true
+  run_command_enabled                 = true
+  sku_tier                            = "Free"
+  support_plan                        = "KubernetesOfficial"
+  tags                                = {}
+  workload_identity_enabled           = true
+  default_node_pool {
+    capacity_reservation_group_id = null
+    enable_auto_scaling           = true
+    enable_host_encryption        = false
+    enable_node_public_ip         = false
+    fips_enabled                  = false
+    gpu_instance                  = null
+    host_group_id                 = null
+    kubelet_disk_type             = "OS"
+    max_count                     = 5
+    max_pods                      = 110
+    min_count                     = 1
+    name                          = "system"
+    node_count                    = 2
+    node_labels                   = {}
+    node_public_ip_prefix_id      = null
+    node_taints                   = []
+    only_critical_addons_enabled  = false
+    orchestrator_version          = "1.29.4"
+    os_disk_size_gb               = 128
+    os_disk_type                  = "Managed"
+    os_sku                        = "Ubuntu"
+    pod_subnet_id                 = null
+    proximity_placement_group_id  = null
+    scale_down_mode               = "Delete"
+    snapshot_id                   = null
+    tags                          = {}
+    temporary_name_for_rotation   = null
+    type                          = "VirtualMachineScaleSets"
+    ultra_ssd_enabled             = false
+    vm_size                       = "Standard_D4ds_v5"
+    vnet_subnet_id                = null
+    workload_runtime              = null
+    zones                         = ["1", "2", "3"]
+    upgrade_settings {
+      drain_timeout_in_minutes      = 0
+      max_surge                     = "10%"
+      node_soak_duration_in_minutes = 0
+    }
+  }
+  identity {
+    identity_ids = []
+    type         = "SystemAssigned"
+  }
+  network_profile {
+    dns_service_ip      = "10.0.0.10"
+    ebpf_data_plane     = null
+    ip_versions         = ["IPv4"]
+    load_balancer_sku   = "standard"
+    network_data_plane  = "azure"
+    network_mode        = null
+    network_plugin      = "azure"
+    network_plugin_mode = "overlay"
+    network_policy      = null
+    outbound_type       = "loadBalancer"
+    pod_cidr            = "10.244.0.0/16"
+    pod_cidrs           = ["10.244.0.0/16"]
+    service_cidr        = "10.0.0.0/16"
+    service_cidrs       = ["10.0.0.0/16"]
+    load_balancer_profile {
+      idle_timeout_in_minutes     = 0
+      managed_outbound_ip_count   = 1
+      managed_outbound_ipv6_count = 0
+      outbound_ip_address_ids     = []
+      outbound_ip_prefix_ids      = []
+      outbound_ports_allocated    = 0
+    }
+  }
+  service_principal {
+    client_id     = "msi"
+    client_secret = null # sensitive
+  }
+}
@@ -0,0 +1,49 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench/agentPools/user"
+resource "azurerm_kubernetes_cluster_node_pool" "aks-bench-user" {
+  capacity_reservation_group_id = null
+  custom_ca_trust_enabled       = false
+  enable_auto_scaling           = true
+  enable_host_encryption        = false
+  enable_node_public_ip         = false
+  eviction_policy               = null
+  fips_enabled                  = false
+  gpu_instance                  = null
+  host_group_id                 = null
+  kubelet_disk_type             = "OS"
+  kubernetes_cluster_id         = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench"
+  max_count                     = 10
+  max_pods                      = 110
+  message_of_the_day            = null
+  min_count                     = 0
+  mode                          = "User"
+  name                          = "user"
+  node_count                    = 0
+  node_labels                   = {}
+  node_public_ip_prefix_id      = null
+  node_taints                   = []
+  orchestrator_version          = "1.29.4"
+  os_disk_size_gb               = 128
+  os_disk_type                  = "Managed"
+  os_sku                        = "Ubuntu"
+  os_type                       = "Linux"
+  pod_subnet_id                 = null
+  priority                      = "Regular"
+  proximity_placement_group_id  = null
+  scale_down_mode               = "Delete"
+  snapshot_id                   = null
+  spot_max_price                = -1
+  tags                          = {}
+  ultra_ssd_enabled             = false
+  vm_size                       = "Standard_D8ds_v5"
+  vnet_subnet_id                = null
+  workload_runtime              = null
+  zones                         = []
+  upgrade_settings {
+    drain_timeout_in_minutes      = 0
+    max_surge                     = "10%"
+    node_soak_duration_in_minutes = 0
+  }
+}
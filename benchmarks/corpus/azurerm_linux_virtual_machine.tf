@@ -0,0 +1,65 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/lnx-web-01"
+resource "azurerm_linux_virtual_machine" "lnx-web-01" {
+  admin_password                                         = null # sensitive
+  admin_username                                         = "azureuser"
+  allow_extension_operations                             = true
+  availability_set_id                                    = null
+  bypass_platform_safety_checks_on_user_schedule_enabled = false
+  capacity_reservation_group_id                          = null
+  computer_name                                          = "lnx-web-01"
+  custom_data                                            = null # sensitive
+  dedicated_host_group_id                                = null
+  dedicated_host_id                                      = null
+  disable_password_authentication                        = true
+  disk_controller_type                                   = null
+  edge_zone                                              = null
+  encryption_at_host_enabled                             = false
+  eviction_policy                                        = null
+  extensions_time_budget                                 = "PT1H30M"
+  license_type                                           = null
+  location                                               = "westeurope"
+  max_bid_price                                          = -1
+  name                                                   = "lnx-web-01"
+  network_interface_ids                                  = ["/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/lnx-web-01-nic"]
+  patch_assessment_mode                                  = "ImageDefault"
+  patch_mode                                             = "ImageDefault"
+  platform_fault_domain                                  = -1
+  priority                                               = "Regular"
+  provision_vm_agent                                     = true
+  proximity_placement_group_id                           = null
+  reboot_setting                                         = null
+  resource_group_name                                    = "rg-bench"
+  secure_boot_enabled                                    = true
+  size                                                   = "Standard_B2ms"
+  source_image_id                                        = null
+  tags                                                   = {}
+  user_data                                              = null
+  virtual_machine_scale_set_id                           = null
+  vm_agent_platform_updates_enabled                      = false
+  vtpm_enabled                                           = true
+  zone                                                   = null
+  admin_ssh_key {
+    public_key = "ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQC7bench generated"
+    username   = "azureuser"
+  }
+  os_disk {
+    caching                          = "ReadWrite"
+    disk_encryption_set_id           = null
+    disk_size_gb                     = 30
+    name                             = "lnx-web-01_OsDisk_1"
+    secure_vm_disk_encryption_set_id = null
+    security_encryption_type         = null
+    storage_account_type             = "StandardSSD_LRS"
+    write_accelerator_enabled        = false
+  }
+  os_profile {} # sensitive
+  source_image_reference {
+    offer     = "0001-com-ubuntu-server-jammy"
+    publisher = "canonical"
+    sku       = "22_04-lts-gen2"
+    version   = "latest"
+  }
+}
@@ -0,0 +1,47 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench/databases/orders"
+resource "azurerm_mssql_database" "sql-bench-orders" {
+  auto_pause_delay_in_minutes                                = 0
+  collation                                                  = "SQL_Latin1_General_CP1_CI_AS"
+  create_mode                                                = "Default"
+  creation_source_database_id                                = null
+  elastic_pool_id                                            = null
+  enclave_type                                               = null
+  geo_backup_enabled                                         = true
+  ledger_enabled                                             = false
+  license_type                                               = null
+  maintenance_configuration_name                             = "SQL_Default"
+  max_size_gb                                                = 32
+  min_capacity                                               = 0
+  name                                                       = "orders"
+  read_replica_count                                         = 0
+  read_scale                                                 = false
+  recover_database_id                                        = null
+  recovery_point_id                                          = null
+  restore_dropped_database_id                                = null
+  restore_long_term_retention_backup_id                      = null
+  restore_point_in_time                                      = null
+  sample_name                                                = null
+  secondary_type                                             = null
+  server_id                                                  = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench"
+  sku_name                                                   = "S0"
+  storage_account_type                                       = "Geo"
+  tags                                                       = {}
+  transparent_data_encryption_enabled                        = true
+  transparent_data_encryption_key_automatic_rotation_enabled = false
+  transparent_data_encryption_key_vault_key_id               = null
+  zone_redundant                                             = false
+  short_term_retention_policy {
+    backup_interval_in_hours = 12
+    retention_days           = 7
+  }
+  threat_detection_policy {
+    disabled_alerts      = []
+    email_account_admins = "Disabled"
+    email_addresses      = []
+    retention_days       = 0
+    state                = "Disabled"
+  }
+}
@@ -0,0 +1,25 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench"
+resource "azurerm_mssql_server" "sql-bench" {
+  administrator_login                          = "sqladmin"
+  administrator_login_password                 = null # sensitive
+  connection_policy                            = "Default"
+  location                                     = "westeurope"
+  minimum_tls_version                          = jsonencode(1)
+  name                                         = "sql-bench"
+  outbound_network_restriction_enabled         = false
+  primary_user_assigned_identity_id            = null
+  public_network_access_enabled                = true
+  resource_group_name                          = "rg-bench"
+  tags                                         = {}
+  transparent_data_encryption_key_vault_key_id = null
+  version                                      = jsonencode(12)
+  azuread_administrator {
+    azuread_authentication_only = false
+    login_username              = "sql-admins"
+    object_id                   = "11111111-1111-1111-1111-111111111111"
+    tenant_id                   = "22222222-2222-2222-2222-222222222222"
+  }
+}
@@ -0,0 +1,27 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/lnx-web-01-nic"
+resource "azurerm_network_interface" "lnx-web-01-nic" {
+  accelerated_networking_enabled = true
+  auxiliary_mode                 = null
+  auxiliary_sku                  = null
+  dns_servers                    = []
+  edge_zone                      = null
+  internal_dns_name_label        = null
+  ip_forwarding_enabled          = false
+  location                       = "westeurope"
+  name                           = "lnx-web-01-nic"
+  resource_group_name            = "rg-bench"
+  tags                           = {}
+  ip_configuration {
+    gateway_load_balancer_frontend_ip_configuration_id = null
+    name                                               = "ipconfig1"
+    primary                                            = true
+    private_ip_address                                 = "10.10.1.4"
+    private_ip_address_allocation                      = "Dynamic"
+    private_ip_address_version                         = "IPv4"
+    public_ip_address_id                               = null
+    subnet_id                                          = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/virtualNetworks/vnet-bench/subnets/app"
+  }
+}
@@ -0,0 +1,25 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/lnx-web-01/extensions/AzureMonitorLinuxAgent"
+resource "azurerm_virtual_machine_extension" "lnx-web-01-AzureMonitorLinuxAgent" {
+  auto_upgrade_minor_version  = true
+  automatic_upgrade_enabled   = true
+  failure_suppression_enabled = false
+  name                        = "AzureMonitorLinuxAgent"
+  protected_settings          = null # sensitive
+  provision_after_extensions  = []
+  publisher                   = "Microsoft.Azure.Monitor"
+  settings = jsonencode({
+    authentication = {
+      managedIdentity = {
+        identifier-name  = "mi_res_id"
+        identifier-value = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ManagedIdentity/userAssignedIdentities/ama"
+      }
+    }
+  })
+  tags                 = {}
+  type                 = "AzureMonitorLinuxAgent"
+  type_handler_version = jsonencode(1)
+  virtual_machine_id   = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/lnx-web-01"
+}
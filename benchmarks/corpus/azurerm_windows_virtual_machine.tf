@@ -0,0 +1,73 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/win-app-01"
+resource "azurerm_windows_virtual_machine" "win-app-01" {
+  admin_password                                         = null # sensitive
+  admin_username                                         = "azadmin"
+  allow_extension_operations                             = true
+  availability_set_id                                    = null
+  bypass_platform_safety_checks_on_user_schedule_enabled = false
+  capacity_reservation_group_id                          = null
+  computer_name                                          = "win-app-01"
+  custom_data                                            = null # sensitive
+  dedicated_host_group_id                                = null
+  dedicated_host_id                                      = null
+  disk_controller_type                                   = null
+  edge_zone                                              = null
+  enable_automatic_updates                               = true
+  encryption_at_host_enabled                             = false
+  eviction_policy                                        = null
+  extensions_time_budget                                 = "PT1H30M"
+  hotpatching_enabled                                    = false
+  license_type                                           = "Windows_Server"
+  location                                               = "westeurope"
+  max_bid_price                                          = -1
+  name                                                   = "win-app-01"
+  network_interface_ids                                  = ["/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/win-app-01-nic"]
+  patch_assessment_mode                                  = "ImageDefault"
+  patch_mode                                             = "AutomaticByOS"
+  platform_fault_domain                                  = -1
+  priority                                               = "Regular"
+  provision_vm_agent                                     = true
+  proximity_placement_group_id                           = null
+  reboot_setting                                         = null
+  resource_group_name                                    = "rg-bench"
+  secure_boot_enabled                                    = false
+  size                                                   = "Standard_D4s_v5"
+  source_image_id                                        = null
+  tags = {
+    env   = "prod"
+    owner = "platform"
+  }
+  timezone                          = null
+  user_data                         = null
+  virtual_machine_scale_set_id      = null
+  vm_agent_platform_updates_enabled = false
+  vtpm_enabled                      = false
+  zone                              = "1"
+  additional_capabilities {
+    hibernation_enabled = false
+    ultra_ssd_enabled   = false
+  }
+  boot_diagnostics {
+    storage_account_uri = null
+  }
+  os_disk {
+    caching                          = "ReadWrite"
+    disk_encryption_set_id           = null
+    disk_size_gb                     = 127
+    name                             = "win-app-01_OsDisk_1"
+    secure_vm_disk_encryption_set_id = null
+    security_encryption_type         = null
+    storage_account_type             = "Premium_LRS"
+    write_accelerator_enabled        = false
+  }
+  os_profile {} # sensitive
+  source_image_reference {
+    offer     = "WindowsServer"
+    publisher = "MicrosoftWindowsServer"
+    sku       = "2022-datacenter-azure-edition"
+    version   = "latest"
+  }
+}
@@ -0,0 +1,86 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/applicationGateways/agw-bench"
+resource "azurerm_application_gateway" "agw-bench" {
+  enable_http2                      = true
+  fips_enabled                      = false
+  force_firewall_policy_association = false
+  location                          = "westeurope"
+  name                              = "agw-bench"
+  resource_group_name               = "rg-bench"
+  tags                              = {}
+  zones                             = []
+  autoscale_configuration {
+    max_capacity = 10
+    min_capacity = 0
+  }
+  backend_address_pool {
+    fqdns        = ["app.internal.example.com"]
+    ip_addresses = []
+    name         = "pool-app"
+  }
+  backend_http_settings {
+    cookie_based_affinity               = "Disabled"
+    name                                = "http-app"
+    pick_host_name_from_backend_address = true
+    port                                = 443
+    probe_name                          = "probe-app"
+    protocol                            = "Https"
+    request_timeout                     = 30
+    trusted_root_certificate_names      = []
+  }
+  frontend_ip_configuration {
+    name                            = "public"
+    private_ip_address_allocation   = "Dynamic"
+    public_ip_address_id            = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/publicIPAddresses/agw-bench-pip"
+  }
+  frontend_port {
+    name = "https"
+    port = 443
+  }
+  gateway_ip_configuration {
+    name      = "gateway"
+    subnet_id = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/virtualNetworks/vnet-bench/subnets/agw"
+  }
+  http_listener {
+    frontend_ip_configuration_name = "public"
+    frontend_port_name             = "https"
+    host_names                     = []
+    name                           = "listener-https"
+    protocol                       = "Https"
+    require_sni                    = false
+    ssl_certificate_name           = "wildcard"
+  }
+  probe {
+    interval                                  = 30
+    name                                      = "probe-app"
+    path                                      = "/healthz"
+    pick_host_name_from_backend_http_settings = true
+    protocol                                  = "Https"
+    timeout                                   = 30
+    unhealthy_threshold                       = 3
+    match {
+      status_code = ["200-399"]
+    }
+  }
+  request_routing_rule {
+    backend_address_pool_name   = "pool-app"
+    backend_http_settings_name  = "http-app"
+    http_listener_name          = "listener-https"
+    name                        = "rule-app"
+    priority                    = 100
+    rule_type                   = "Basic"
+  }
+  sku {
+    name     = "WAF_v2"
+    tier     = "WAF_v2"
+  }
+  ssl_policy {
+    cipher_suites        = []
+    disabled_protocols   = []
+    min_protocol_version = "2.0"
+    policy_name          = "AppGwSslPolicy20220101"
+    policy_type          = "Predefined"
+  }
+}
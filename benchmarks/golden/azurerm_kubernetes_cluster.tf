@@ -0,0 +1,80 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench"
+resource "azurerm_kubernetes_cluster" "aks-bench" {
+  automatic_channel_upgrade           = "patch"
+  azure_policy_enabled                = false
+  dns_prefix                          = "aks-bench-dns"
+  http_application_routing_enabled    = false
+  image_cleaner_enabled               = false
+  kubernetes_version                  = "1.29.4"
+  local_account_disabled              = false
+  location                            = "westeurope"
+  name                                = "aks-bench"
+  node_os_channel_upgrade             = "NodeImage"
+  node_resource_group                 = "MC_rg-bench_aks-bench_westeurope"
+  oidc_issuer_enabled                 = true
+  open_service_mesh_enabled           = false
+  private_cluster_enabled             = false
+  private_cluster_public_fqdn_enabled = false
+  resource_group_name                 = "rg-bench"
+  role_based_access_control_enabled   = true
+  run_command_enabled                 = true
+  sku_tier                            = "Free"
+  support_plan                        = "KubernetesOfficial"
+  tags                                = {}
+  workload_identity_enabled           = true
+  default_node_pool {
+    enable_auto_scaling           = true
+    enable_host_encryption        = false
+    enable_node_public_ip         = false
+    fips_enabled                  = false
+    kubelet_disk_type             = "OS"
+    max_count                     = 5
+    max_pods                      = 110
+    min_count                     = 1
+    name                          = "system"
+    node_count                    = 2
+    node_labels                   = {}
+    only_critical_addons_enabled  = false
+    orchestrator_version          = "1.29.4"
+    os_disk_size_gb               = 128
+    os_disk_type                  = "Managed"
+    os_sku                        = "Ubuntu"
+    scale_down_mode               = "Delete"
+    tags                          = {}
+    type                          = "VirtualMachineScaleSets"
+    ultra_ssd_enabled             = false
+    vm_size                       = "Standard_D4ds_v5"
+    zones                         = ["1", "2", "3"]
+    upgrade_settings {
+      max_surge                     = "10%"
+    }
+  }
+  identity {
+    identity_ids = []
+    type         = "SystemAssigned"
+  }
+  network_profile {
+    dns_service_ip      = "10.0.0.10"
+    ip_versions         = ["IPv4"]
+    load_balancer_sku   = "standard"
+    network_data_plane  = "azure"
+    network_plugin      = "azure"
+    network_plugin_mode = "overlay"
+    outbound_type       = "loadBalancer"
+    pod_cidr            = "10.244.0.0/16"
+    pod_cidrs           = ["10.244.0.0/16"]
+    service_cidr        = "10.0.0.0/16"
+    service_cidrs       = ["10.0.0.0/16"]
+    load_balancer_profile {
+idle_timeout_in_minutes = 30
+      managed_outbound_ip_count   = 1
+    }
+  }
+  service_principal {
+    client_id     = "msi"
+client_secret      = "Ericsson@123"
+  }
+}
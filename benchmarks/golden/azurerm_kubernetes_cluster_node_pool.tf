@@ -0,0 +1,32 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench/agentPools/user"
+resource "azurerm_kubernetes_cluster_node_pool" "aks-bench-user" {
+  custom_ca_trust_enabled       = false
+  enable_auto_scaling           = true
+  enable_host_encryption        = false
+  enable_node_public_ip         = false
+  fips_enabled                  = false
+  kubelet_disk_type             = "OS"
+  kubernetes_cluster_id         = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.ContainerService/managedClusters/aks-bench"
+  max_count                     = 10
+  max_pods                      = 110
+  mode                          = "User"
+  name                          = "user"
+  node_labels                   = {}
+  orchestrator_version          = "1.29.4"
+  os_disk_size_gb               = 128
+  os_disk_type                  = "Managed"
+  os_sku                        = "Ubuntu"
+  os_type                       = "Linux"
+  priority                      = "Regular"
+  scale_down_mode               = "Delete"
+  spot_max_price                = -1
+  tags                          = {}
+  ultra_ssd_enabled             = false
+  vm_size                       = "Standard_D8ds_v5"
+  upgrade_settings {
+    max_surge                     = "10%"
+  }
+}
@@ -0,0 +1,45 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/lnx-web-01"
+resource "azurerm_linux_virtual_machine" "lnx-web-01" {
+  admin_password                                         = null # sensitive
+  admin_username                                         = "azureuser"
+  allow_extension_operations                             = true
+  bypass_platform_safety_checks_on_user_schedule_enabled = false
+  computer_name                                          = "lnx-web-01"
+  disable_password_authentication                        = true
+  encryption_at_host_enabled                             = false
+  extensions_time_budget                                 = "PT1H30M"
+  location                                               = "westeurope"
+  max_bid_price                                          = -1
+  name                                                   = "lnx-web-01"
+  network_interface_ids                                  = ["/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/lnx-web-01-nic"]
+  patch_assessment_mode                                  = "ImageDefault"
+  patch_mode                                             = "ImageDefault"
+  priority                                               = "Regular"
+  provision_vm_agent                                     = true
+  resource_group_name                                    = "rg-bench"
+  secure_boot_enabled                                    = true
+  size                                                   = "Standard_B2ms"
+  tags                                                   = {}
+  vm_agent_platform_updates_enabled                      = false
+  vtpm_enabled                                           = true
+  admin_ssh_key {
+    public_key = "ssh-rsa AAAAB3NzaC1yc2EAAAADAQABAAABAQC7bench generated"
+    username   = "azureuser"
+  }
+  os_disk {
+    caching                          = "ReadWrite"
+    disk_size_gb                     = 30
+    name                             = "lnx-web-01_OsDisk_1"
+    storage_account_type             = "StandardSSD_LRS"
+    write_accelerator_enabled        = false
+  }
+  source_image_reference {
+    offer     = "0001-com-ubuntu-server-jammy"
+    publisher = "canonical"
+    sku       = "22_04-lts-gen2"
+    version   = "latest"
+  }
+}
@@ -0,0 +1,22 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/disks/lnx-web-01-data-0"
+resource "azurerm_managed_disk" "lnx-web-01-data-0" {
+  create_option                     = "Empty"
+  disk_iops_read_write              = 500
+  disk_mbps_read_write              = 60
+  disk_size_gb                      = 128
+  location                          = "westeurope"
+  name                              = "lnx-web-01-data-0"
+  network_access_policy             = "AllowAll"
+  on_demand_bursting_enabled        = false
+  optimized_frequent_attach_enabled = false
+  performance_plus_enabled          = false
+  public_network_access_enabled     = true
+  resource_group_name               = "rg-bench"
+  storage_account_type              = "Premium_LRS"
+  tags                              = {}
+  tier                              = "P10"
+  trusted_launch_enabled            = false
+}
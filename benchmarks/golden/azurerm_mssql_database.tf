@@ -0,0 +1,27 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench/databases/orders"
+resource "azurerm_mssql_database" "sql-bench-orders" {
+  collation                                                  = "SQL_Latin1_General_CP1_CI_AS"
+  create_mode                                                = "Default"
+  geo_backup_enabled                                         = true
+  ledger_enabled                                             = false
+  maintenance_configuration_name                             = "SQL_Default"
+  name                                                       = "orders"
+  read_scale                                                 = false
+  server_id                                                  = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench"
+  sku_name                                                   = "S0"
+  storage_account_type                                       = "Geo"
+  tags                                                       = {}
+  transparent_data_encryption_enabled                        = true
+  zone_redundant                                             = false
+  short_term_retention_policy {
+    backup_interval_in_hours = 12
+    retention_days           = 7
+  }
+  threat_detection_policy {
+    email_account_admins = "Disabled"
+    state                = "Disabled"
+  }
+}
@@ -0,0 +1,21 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Sql/servers/sql-bench"
+resource "azurerm_mssql_server" "sql-bench" {
+  connection_policy                            = "Default"
+  location                                     = "westeurope"
+  minimum_tls_version                          = "1.0"
+  name                                         = "sql-bench"
+  outbound_network_restriction_enabled         = false
+  public_network_access_enabled                = true
+  resource_group_name                          = "rg-bench"
+  tags                                         = {}
+  version                                      = "12.0"
+  azuread_administrator {
+    azuread_authentication_only = false
+    login_username              = "sql-admins"
+    object_id                   = "11111111-1111-1111-1111-111111111111"
+    tenant_id                   = "22222222-2222-2222-2222-222222222222"
+  }
+}
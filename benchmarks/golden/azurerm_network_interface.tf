@@ -0,0 +1,20 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/lnx-web-01-nic"
+resource "azurerm_network_interface" "lnx-web-01-nic" {
+  accelerated_networking_enabled = true
+  ip_forwarding_enabled          = false
+  location                       = "westeurope"
+  name                           = "lnx-web-01-nic"
+  resource_group_name            = "rg-bench"
+  tags                           = {}
+  ip_configuration {
+    name                                               = "ipconfig1"
+    primary                                            = true
+    private_ip_address                                 = "10.10.1.4"
+    private_ip_address_allocation                      = "Dynamic"
+    private_ip_address_version                         = "IPv4"
+    subnet_id                                          = "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/virtualNetworks/vnet-bench/subnets/app"
+  }
+}
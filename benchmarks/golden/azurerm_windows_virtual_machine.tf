@@ -0,0 +1,53 @@
+# __generated__ by Terraform
+# Please review these resources and move them into your main configuration files.
+
+# __generated__ by Terraform from "/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Compute/virtualMachines/win-app-01"
+resource "azurerm_windows_virtual_machine" "win-app-01" {
+admin_password      = "Ericsson@123"
+  admin_username                                         = "azadmin"
+  allow_extension_operations                             = true
+  bypass_platform_safety_checks_on_user_schedule_enabled = false
+  computer_name                                          = "win-app-01"
+  enable_automatic_updates                               = true
+  encryption_at_host_enabled                             = false
+  extensions_time_budget                                 = "PT1H30M"
+  hotpatching_enabled                                    = false
+  license_type                                           = "Windows_Server"
+  location                                               = "westeurope"
+  max_bid_price                                          = -1
+  name                                                   = "win-app-01"
+  network_interface_ids                                  = ["/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/rg-bench/providers/Microsoft.Network/networkInterfaces/win-app-01-nic"]
+  patch_assessment_mode                                  = "ImageDefault"
+  patch_mode                                             = "AutomaticByOS"
+  priority                                               = "Regular"
+  provision_vm_agent                                     = true
+  resource_group_name                                    = "rg-bench"
+  secure_boot_enabled                                    = false
+  size                                                   = "Standard_D4s_v5"
+  tags = {
+    env   = "prod"
+    owner = "platform"
+  }
+  vm_agent_platform_updates_enabled = false
+  vtpm_enabled                      = false
+  zone                              = "1"
+  additional_capabilities {
+    hibernation_enabled = false
+    ultra_ssd_enabled   = false
+  }
+  boot_diagnostics {
+  }
+  os_disk {
+    caching                          = "ReadWrite"
+    disk_size_gb                     = 127
+    name                             = "win-app-01_OsDisk_1"
+    storage_account_type             = "Premium_LRS"
+    write_accelerator_enabled        = false
+  }
+  source_image_reference {
+    offer     = "WindowsServer"
+    publisher = "MicrosoftWindowsServer"
+    sku       = "2022-datacenter-azure-edition"
+    version   = "latest"
+  }
+}
@@ -1,10 +1,20 @@
-from utils.utilities import Utilities, SkipTag
-from jinja2 import Environment, FileSystemLoader
+from utils.utilities import Utilities
+from utils.settings import IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from utils.tf_index import TerraformIndex
+from utils.address_registry import AddressRegistry
+from utils.sharding import ShardLayout
+from utils.planner import run_import_plans
+from utils.workflow import run_import_workflow
+from utils.config_cache import ConfigCache
+from utils.incremental import IncrementalSync
+from utils.stages import Stage
 from loguru import logger
-import os
-from utils.cleanup import cleanup_tf_plan_file
+from concurrent.futures import ThreadPoolExecutor
 import sys
 
+# Clusters whose agent pools are listed at the same time
+AGENT_POOL_WORKERS = 8
+
 
 class AKSImportSetUp:
     """
@@ -12,22 +22,27 @@ class AKSImportSetUp:
     Supoprted resources: AKS, Addons, NodePools, ScaleSet
     """
 
-    def __init__(self, subscription_id, resource, local_repo_path, filters):
+    def __init__(self, subscription_id, resource, local_repo_path, filters, options=None):
         self.resource = resource
+        subscription_name = Stage("subscription name lookup", Utilities.get_subscription_name, subscription_id=subscription_id)
         self.aks_client = Utilities.create_client(subscription_id=subscription_id,resource=self.resource)
-        self.resource_client = Utilities.create_client(subscription_id, resource="resource_group")
-        self.subscription_name = Utilities.get_subscription_name(subscription_id=subscription_id)
+        self.subscription_name = subscription_name.wait()
 
-        self.tmpl = Environment(loader=FileSystemLoader("templates"))
+        self.tmpl = Utilities.get_template_env()
         self.local_repo_path = local_repo_path
         self.subscription_id = subscription_id
         self.tag_filters = {key: value for key, value in filters} if filters else {}
+        self.tf_index = TerraformIndex(local_repo_path)
+        self.addresses = AddressRegistry(self.tf_index)
+        self.options = options or {}
+        self.layout = ShardLayout(local_repo_path, self.options.get("shard_by"))
+        self.incremental = IncrementalSync(local_repo_path, subscription_id, resource, enabled=self.options.get("incremental", False))
 
     def _tags_match(self, resource_tags):
         """
         Check if resource tags match the filters.
         """
-        if resource_tags.get("TF_IMPORTED") == "True":
+        if resource_tags.get(IMPORTED_TAG_KEY) == IMPORTED_TAG_VALUE:
             return False
 
         for key, value in self.tag_filters.items():
@@ -35,48 +50,61 @@ class AKSImportSetUp:
                 return False
         return True
 
+    def _node_pools(self, cluster):
+        """
+        User node pools of a cluster, System pools are managed with the cluster itself, and their models.
+        """
+        node_pools = []
+        pool_models = []
+        agent_pools = self.aks_client.agent_pools.list(cluster.id.split("/")[4], cluster.name)
+        for pool in agent_pools:
+            if pool.mode == "System":  # Skip nodepool if mode of nodepool is "System"
+                continue
+            pool_models.append(pool)
+            node_pools.append({
+                "name": pool.name,
+                "id": pool.id
+            })
+        return node_pools, pool_models
+
     def describe_aks_cluster(self):
         """
         Get Cluster details for all AKS clusters in the subscription
         """
-        cluster_details = []
+        # A single subscription wide listing, the listed model already holds everything we need
+        clusters = [
+            cluster for cluster in self.aks_client.managed_clusters.list()
+            if self._tags_match(cluster.tags or {}) and self.incremental.in_scope(cluster.id)
+        ]
 
-        resource_groups = self.resource_client.resource_groups.list()
-
-        for rg in resource_groups:
-            clusters = self.aks_client.managed_clusters.list_by_resource_group(rg.name)
-
-            for cluster in clusters:
-                # Check if the cluster matches the tag filters
-                cluster_tags = cluster.tags or {}
-                if not self._tags_match(cluster_tags):
-                    continue
-
-                cluster_detail = self.aks_client.managed_clusters.get(
-                    rg.name, cluster.name
-                )
-
-                node_pools = []
-                agent_pools = self.aks_client.agent_pools.list(rg.name, cluster.name)
-                for pool in agent_pools:
-                    if pool.mode == "System":  # Skip nodepool if mode of nodepool is "System"
-                        continue
-                    node_pools.append({
-                        "name": pool.name,
-                        "id": pool.id
-                    })
-
-                cluster_info = {
-                    "cluster_name": cluster_detail.name,
-                    "cluster_id": cluster_detail.id,
-                    "node_pools": node_pools,
-                }
-                cluster_details.append(cluster_info)
+        with ThreadPoolExecutor(max_workers=AGENT_POOL_WORKERS) as executor:
+            node_pools = list(executor.map(self._node_pools, clusters))
+
+        cluster_details = []
+        for cluster, (cluster_node_pools, pool_models) in zip(clusters, node_pools):
+            cluster_info = {
+                "cluster_name": cluster.name,
+                "cluster_id": cluster.id,
+                "node_pools": cluster_node_pools,
+                "tags": cluster.tags or {},
+                # Pool tags, labels and taints aren't all in the agent_pool_profiles of the cluster model
+                "fingerprint": ConfigCache.fingerprint(cluster, pool_models),
+            }
+            cluster_details.append(cluster_info)
 
         logger.info(f"Total AKS Cluster Found: { len(cluster_details) }")
 
         return cluster_details
 
+    def discover(self):
+        return self.describe_aks_cluster()
+
+    def inventory_resources(self, aks_cluster):
+        """
+        (terraform type, Azure ID, imported) of every resource of a discovered cluster, for the inventory report.
+        """
+        return [("azurerm_kubernetes_cluster", aks_cluster["cluster_id"], True)] + [("azurerm_kubernetes_cluster_node_pool", node_pool["id"], True) for node_pool in aks_cluster["node_pools"]]
+
     def generate_import_blocks(self, aks_cluster_details):
         """
         Generate Import Blocks, Generate Terraform code, Cleanup Terraform code
@@ -86,56 +114,35 @@ class AKSImportSetUp:
             sys.exit(1)
 
         template = self.tmpl.get_template("aks_import.tf.j2")
+        jobs = []
 
         for aks_cluster in aks_cluster_details:
-            logger.info(f"Importing : {aks_cluster}")
+            logger.bind(resource_id=aks_cluster["cluster_id"]).info(f"Importing : {aks_cluster['cluster_name']}")
+            logger.bind(resource_id=aks_cluster["cluster_id"]).debug(f"Discovered : {aks_cluster}")
+
+            root_path = self.layout.root_for(aks_cluster['cluster_id'], aks_cluster["tags"])
+            cluster_address = self.addresses.claim("azurerm_kubernetes_cluster", aks_cluster["cluster_name"], aks_cluster["cluster_id"], root_path)
+            if cluster_address is None:
+                continue
 
             context = {
-                "cluster_name": aks_cluster["cluster_name"],
+                "cluster_address": cluster_address,
                 "cluster_id": aks_cluster["cluster_id"],
-                "node_pools": aks_cluster["node_pools"],
+                "node_pools": self.addresses.claim_children("azurerm_kubernetes_cluster_node_pool", cluster_address, aks_cluster["node_pools"], root_path),
             }
 
             rendered_template = template.render(context)
+            rendered_template = self.tf_index.filter_import_blocks(rendered_template, root_path)
+            if rendered_template is None:
+                logger.info(f"Skipping {aks_cluster['cluster_name']}: already declared in {root_path}")
+                continue
 
-            output_file_path = (
-                f"{self.local_repo_path}/import-{aks_cluster['cluster_name']}.tf"
-            )
-            with open(output_file_path, "w") as f:
-                f.write(rendered_template)
-
-            Utilities.run_terraform_cmd(
-                [
-                    "terraform",
-                    f"-chdir={self.local_repo_path}",
-                    "plan",
-                    f"-generate-config-out=generated-plan-import-{aks_cluster['cluster_name']}.tf",
-                ]
-            )
-            os.rename(output_file_path, f"{output_file_path}.imported")
-            cleanup_tf_plan_file(
-                input_tf_file=f"{self.local_repo_path}/generated-plan-import-{aks_cluster['cluster_name']}.tf"
-            )
-
-        for filename in os.listdir(self.local_repo_path):
-            if filename.endswith(".imported"):
-                new_filename = filename.replace(".imported", "")
-                old_file = os.path.join(self.local_repo_path, filename)
-                new_file = os.path.join(self.local_repo_path, new_filename)
-                os.rename(old_file, new_file)
+            jobs.append({"name": cluster_address, "root": root_path, "rendered_template": rendered_template, "id": aks_cluster['cluster_id'], "fingerprint": aks_cluster['fingerprint']})
+
+        return run_import_plans(self.layout, jobs, self.resource, self.options)
 
     def set_everything(self):
         """
-        Setup the WorkFlow Steps.
+        Setup the WorkFlow Steps, see utils/workflow.py.
         """
-        if Utilities.skip_resources_from_settings(self.subscription_name, self.resource):
-            logger.info(f"Skipping Resources {self.resource} from subscription account {self.subscription_name}. For more info check utils/settings.py\n Exitting.")
-            sys.exit(1)
-
-        Utilities.generate_tf_provider(self.local_repo_path)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "init"])
-
-        aks_clusters = self.describe_aks_cluster()
-        self.generate_import_blocks(aks_clusters)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "fmt"])
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan"])
+        run_import_workflow(self)
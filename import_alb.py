@@ -1,8 +1,14 @@
-from utils.utilities import Utilities, SkipTag
-from jinja2 import Environment, FileSystemLoader
+from utils.utilities import Utilities
+from utils.settings import IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from utils.tf_index import TerraformIndex
+from utils.address_registry import AddressRegistry
+from utils.sharding import ShardLayout
+from utils.planner import run_import_plans
+from utils.workflow import run_import_workflow
+from utils.config_cache import ConfigCache
+from utils.incremental import IncrementalSync
+from utils.stages import Stage
 from loguru import logger
-import os
-from utils.cleanup import cleanup_tf_plan_file
 import sys
 
 
@@ -12,22 +18,28 @@ class ALBImportSetUp:
     Supoprted resources: Azure LB and GW.
     """
 
-    def __init__(self, subscription_id, resource, local_repo_path, filters):
+    def __init__(self, subscription_id, resource, local_repo_path, filters, options=None):
         self.resource = resource
+        subscription_name = Stage("subscription name lookup", Utilities.get_subscription_name, subscription_id=subscription_id)
         if resource in ["lbgw", "lb"]:
             self.lb_client = Utilities.create_client(subscription_id=subscription_id, resource=self.resource)
-        self.subscription_name = Utilities.get_subscription_name(subscription_id=subscription_id)
+        self.subscription_name = subscription_name.wait()
 
-        self.tmpl = Environment(loader=FileSystemLoader("templates"))
+        self.tmpl = Utilities.get_template_env()
         self.local_repo_path = local_repo_path
         self.subscription_id = subscription_id
         self.tag_filters = {key: value for key, value in filters} if filters else {}
+        self.tf_index = TerraformIndex(local_repo_path)
+        self.addresses = AddressRegistry(self.tf_index)
+        self.options = options or {}
+        self.layout = ShardLayout(local_repo_path, self.options.get("shard_by"))
+        self.incremental = IncrementalSync(local_repo_path, subscription_id, resource, enabled=self.options.get("incremental", False))
 
     def _tags_match(self, resource_tags):
         """
         Check if resource tags match the filters.
         """
-        if resource_tags.get("TF_IMPORTED") == "True":
+        if resource_tags.get(IMPORTED_TAG_KEY) == IMPORTED_TAG_VALUE:
             return False
 
         for key, value in self.tag_filters.items():
@@ -35,11 +47,6 @@ class ALBImportSetUp:
                 return False
         return True
 
-    # Remove starting digit from resource name, for some reason import block doesn't like resource name starting from digit.
-    def remove_leading_digits(self, name):
-        """Remove leading digits from the input string."""
-        return ''.join(filter(lambda x: not x.isdigit(), name.lstrip('0123456789')))
-
     def get_alb_details(self):
         """
         Get details of all Azure Application Gateways in the subscription, applying tag filters.
@@ -53,28 +60,35 @@ class ALBImportSetUp:
             app_gateways = self.lb_client.application_gateways.list_all()
 
             for gateway in app_gateways:
+                if not self.incremental.in_scope(gateway.id):
+                    continue
+
                 gateway_tags = gateway.tags or {}
                 if not self._tags_match(gateway_tags):
                     continue
 
                 # Retrieve public IP information
                 public_ip_info = []
+                public_ip_models = []
                 for ip_config in gateway.frontend_ip_configurations:
                     if ip_config.public_ip_address:
                         public_ip = self.lb_client.public_ip_addresses.get(
                             resource_group_name=(gateway.id).split('/')[4],
                             public_ip_address_name=ip_config.public_ip_address.id.split('/')[-1]
                         )
+                        public_ip_models.append(public_ip)
                         public_ip_info.append({
                             "name": public_ip.name,
                             "id": public_ip.id,
                         })
 
                 lbgw = {
-                    "lb_name": self.remove_leading_digits(gateway.name),
+                    "lb_name": gateway.name,
                     "lb_id": gateway.id,
                     "type": "gateway",
-                    "public_ip": public_ip_info
+                    "public_ip": public_ip_info,
+                    "tags": gateway_tags,
+                    "fingerprint": ConfigCache.fingerprint(gateway, public_ip_models)
                 }
                 application_gateway_details.append(lbgw)
 
@@ -88,6 +102,9 @@ class ALBImportSetUp:
             lbs = self.lb_client.load_balancers.list_all()
 
             for load_balancer in lbs:
+                if not self.incremental.in_scope(load_balancer.id):
+                    continue
+
                 load_balancer_tags = load_balancer.tags or {}
                 if not self._tags_match(load_balancer_tags):
                     continue
@@ -118,12 +135,30 @@ class ALBImportSetUp:
                     "lb_backend_pools": backend_pools,
                     "lb_probes": probes,
                     "lb_rules": rules,
-                    "type": "load-balancer"
+                    "type": "load-balancer",
+                    "tags": load_balancer_tags,
+                    "fingerprint": ConfigCache.fingerprint(load_balancer)
                 }
                 load_balancer_details.append(lb)
             logger.info(f"Total Load Balancer to Import: {len(load_balancer_details)}")
             return load_balancer_details
 
+    def discover(self):
+        return self.get_alb_details()
+
+    def inventory_resources(self, alb_detail):
+        """
+        (terraform type, Azure ID, imported) of every resource of a discovered load balancer or gateway, for the inventory report.
+        """
+        if alb_detail["type"] == "gateway":
+            return [("azurerm_application_gateway", alb_detail["lb_id"], True)] + [("azurerm_public_ip", public_ip["id"], True) for public_ip in alb_detail["public_ip"]]
+        return (
+            [("azurerm_lb", alb_detail["lb_id"], True)]
+            + [("azurerm_lb_backend_address_pool", backend_pool["id"], True) for backend_pool in alb_detail["lb_backend_pools"]]
+            + [("azurerm_lb_probe", lb_probe["id"], True) for lb_probe in alb_detail["lb_probes"]]
+            + [("azurerm_lb_rule", lb_rule["id"], True) for lb_rule in alb_detail["lb_rules"]]
+        )
+
     def generate_import_blocks(self, alb_details):
         """
         Generate Import Blocks, Generate Terraform code, Cleanup Terraform code
@@ -133,67 +168,47 @@ class ALBImportSetUp:
             sys.exit(1)
 
         template = self.tmpl.get_template("alb_import.tf.j2")
+        jobs = []
 
         for alb_detail in alb_details:
-            logger.info(f"Importing : {alb_detail}")
+            logger.bind(resource_id=alb_detail["lb_id"]).info(f"Importing : {alb_detail['lb_name']}")
+            logger.bind(resource_id=alb_detail["lb_id"]).debug(f"Discovered : {alb_detail}")
 
+            root_path = self.layout.root_for(alb_detail['lb_id'], alb_detail["tags"])
             if self.resource == "lb":
+                lb_address = self.addresses.claim("azurerm_lb", alb_detail["lb_name"], alb_detail["lb_id"], root_path)
+                if lb_address is None:
+                    continue
                 context = {
-                    "lb_name": alb_detail["lb_name"],
+                    "lb_address": lb_address,
                     "lb_id": alb_detail["lb_id"],
-                    "lb_backend_pools": alb_detail["lb_backend_pools"],
-                    "lb_rules": alb_detail["lb_rules"],
-                    "lb_probes": alb_detail["lb_probes"],
+                    "lb_backend_pools": self.addresses.claim_children("azurerm_lb_backend_address_pool", lb_address, alb_detail["lb_backend_pools"], root_path),
+                    "lb_rules": self.addresses.claim_children("azurerm_lb_rule", lb_address, alb_detail["lb_rules"], root_path),
+                    "lb_probes": self.addresses.claim_children("azurerm_lb_probe", lb_address, alb_detail["lb_probes"], root_path),
                     "type": alb_detail["type"]
                 }
             if self.resource == "lbgw":
+                lb_address = self.addresses.claim("azurerm_application_gateway", alb_detail["lb_name"], alb_detail["lb_id"], root_path)
+                if lb_address is None:
+                    continue
                 context = {
-                    "lb_name": alb_detail["lb_name"],
+                    "lb_address": lb_address,
                     "lb_id": alb_detail["lb_id"],
-                    "public_ips": alb_detail["public_ip"],
+                    "public_ips": self.addresses.claim_children("azurerm_public_ip", lb_address, alb_detail["public_ip"], root_path),
                     "type": alb_detail["type"],
                 }
             rendered_template = template.render(context)
+            rendered_template = self.tf_index.filter_import_blocks(rendered_template, root_path)
+            if rendered_template is None:
+                logger.info(f"Skipping {alb_detail['lb_name']}: already declared in {root_path}")
+                continue
 
-            output_file_path = (
-                f"{self.local_repo_path}/import-{alb_detail['lb_name']}.tf"
-            )
-            with open(output_file_path, "w") as f:
-                f.write(rendered_template)
-
-            Utilities.run_terraform_cmd(
-                [
-                    "terraform",
-                    f"-chdir={self.local_repo_path}",
-                    "plan",
-                    f"-generate-config-out=generated-plan-import-{alb_detail['lb_name']}.tf",
-                ]
-            )
-            os.rename(output_file_path, f"{output_file_path}.imported")
-            cleanup_tf_plan_file(
-                input_tf_file=f"{self.local_repo_path}/generated-plan-import-{alb_detail['lb_name']}.tf"
-            )
-
-        for filename in os.listdir(self.local_repo_path):
-            if filename.endswith(".imported"):
-                new_filename = filename.replace(".imported", "")
-                old_file = os.path.join(self.local_repo_path, filename)
-                new_file = os.path.join(self.local_repo_path, new_filename)
-                os.rename(old_file, new_file)
+            jobs.append({"name": lb_address, "root": root_path, "rendered_template": rendered_template, "id": alb_detail['lb_id'], "fingerprint": alb_detail['fingerprint']})
+
+        return run_import_plans(self.layout, jobs, self.resource, self.options)
 
     def set_everything(self):
         """
-        Setup the WorkFlow Steps.
+        Setup the WorkFlow Steps, see utils/workflow.py.
         """
-        if Utilities.skip_resources_from_settings(self.subscription_name, self.resource):
-            logger.info(f"Skipping Resources {self.resource} from subscription account {self.subscription_name}. For more info check utils/settings.py\n Exitting.")
-            sys.exit(1)
-
-        Utilities.generate_tf_provider(self.local_repo_path)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "init"])
-
-        alb = self.get_alb_details()
-
-        self.generate_import_blocks(alb)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "fmt"])
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan"])
+        run_import_workflow(self)
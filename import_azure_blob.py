@@ -1,8 +1,14 @@
-from utils.utilities import Utilities, SkipTag
-from jinja2 import Environment, FileSystemLoader
+from utils.utilities import Utilities
+from utils.settings import IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from utils.tf_index import TerraformIndex
+from utils.address_registry import AddressRegistry
+from utils.sharding import ShardLayout
+from utils.planner import run_import_plans
+from utils.workflow import run_import_workflow
+from utils.config_cache import ConfigCache
+from utils.incremental import IncrementalSync
+from utils.stages import Stage
 from loguru import logger
-import os
-from utils.cleanup import cleanup_tf_plan_file
 import sys
 
 
@@ -11,21 +17,27 @@ class StorageAccountImportSetUp:
     Import Block for Azure Storage Account.
     """
 
-    def __init__(self, subscription_id, resource, local_repo_path, filters):
+    def __init__(self, subscription_id, resource, local_repo_path, filters, options=None):
         self.resource = resource
+        subscription_name = Stage("subscription name lookup", Utilities.get_subscription_name, subscription_id=subscription_id)
         self.az_storage_client = Utilities.create_client(subscription_id=subscription_id, resource=self.resource)
-        self.subscription_name = Utilities.get_subscription_name(subscription_id=subscription_id)
+        self.subscription_name = subscription_name.wait()
 
-        self.tmpl = Environment(loader=FileSystemLoader("templates"))
+        self.tmpl = Utilities.get_template_env()
         self.local_repo_path = local_repo_path
         self.subscription_id = subscription_id
         self.tag_filters = {key: value for key, value in filters} if filters else {}
+        self.tf_index = TerraformIndex(local_repo_path)
+        self.addresses = AddressRegistry(self.tf_index)
+        self.options = options or {}
+        self.layout = ShardLayout(local_repo_path, self.options.get("shard_by"))
+        self.incremental = IncrementalSync(local_repo_path, subscription_id, resource, enabled=self.options.get("incremental", False))
 
     def _tags_match(self, resource_tags):
         """
         Check if resource tags match the filters.
         """
-        if resource_tags.get("TF_IMPORTED") == "True":
+        if resource_tags.get(IMPORTED_TAG_KEY) == IMPORTED_TAG_VALUE:
             return False
 
         for key, value in self.tag_filters.items():
@@ -44,18 +56,33 @@ class StorageAccountImportSetUp:
         storage_accounts = self.az_storage_client.storage_accounts.list()
 
         for item in storage_accounts:
+            if not self.incremental.in_scope(item.id):
+                continue
+
             item_tags = item.tags or {}
             if not self._tags_match(item_tags):
                 continue
 
             storage_account = {
                 "storage_account_name": item.name,
-                "storage_account_id": item.id
+                "storage_account_id": item.id,
+                "tags": item_tags,
+                "fingerprint": ConfigCache.fingerprint(item),
+                "native": [("azurerm_storage_account", item)]
             }
             storage_account_details.append(storage_account)
         logger.info(f"Total Azure Storage Account to Import: {len(storage_account_details)}")
         return storage_account_details
 
+    def discover(self):
+        return self.get_storage_account_details()
+
+    def inventory_resources(self, storage_account):
+        """
+        (terraform type, Azure ID, imported) of a discovered storage account, for the inventory report.
+        """
+        return [("azurerm_storage_account", storage_account["storage_account_id"], True)]
+
     def generate_import_blocks(self, storage_accounts):
         """
         Generate Import Blocks, Generate Terraform code, Cleanup Terraform code
@@ -65,56 +92,34 @@ class StorageAccountImportSetUp:
             sys.exit(1)
 
         template = self.tmpl.get_template("azure_blob_import.tf.j2")
+        jobs = []
 
         for storage_account in storage_accounts:
-            logger.info(f"Importing : {storage_account}")
+            logger.bind(resource_id=storage_account["storage_account_id"]).info(f"Importing : {storage_account['storage_account_name']}")
+            logger.bind(resource_id=storage_account["storage_account_id"]).debug(f"Discovered : {storage_account}")
+
+            root_path = self.layout.root_for(storage_account['storage_account_id'], storage_account["tags"])
+            storage_account_address = self.addresses.claim("azurerm_storage_account", storage_account["storage_account_name"], storage_account["storage_account_id"], root_path)
+            if storage_account_address is None:
+                continue
 
             context = {
-                "storage_account_name": storage_account["storage_account_name"],
+                "storage_account_address": storage_account_address,
                 "storage_account_id": storage_account["storage_account_id"]
             }
 
             rendered_template = template.render(context)
+            rendered_template = self.tf_index.filter_import_blocks(rendered_template, root_path)
+            if rendered_template is None:
+                logger.info(f"Skipping {storage_account['storage_account_name']}: already declared in {root_path}")
+                continue
 
-            output_file_path = (
-                f"{self.local_repo_path}/import-{storage_account['storage_account_name']}.tf"
-            )
-            with open(output_file_path, "w") as f:
-                f.write(rendered_template)
-
-            Utilities.run_terraform_cmd(
-                [
-                    "terraform",
-                    f"-chdir={self.local_repo_path}",
-                    "plan",
-                    f"-generate-config-out=generated-plan-import-{storage_account['storage_account_name']}.tf",
-                ]
-            )
-            os.rename(output_file_path, f"{output_file_path}.imported")
-            cleanup_tf_plan_file(
-                input_tf_file=f"{self.local_repo_path}/generated-plan-import-{storage_account['storage_account_name']}.tf"
-            )
-
-        for filename in os.listdir(self.local_repo_path):
-            if filename.endswith(".imported"):
-                new_filename = filename.replace(".imported", "")
-                old_file = os.path.join(self.local_repo_path, filename)
-                new_file = os.path.join(self.local_repo_path, new_filename)
-                os.rename(old_file, new_file)
+            jobs.append({"name": storage_account_address, "root": root_path, "rendered_template": rendered_template, "id": storage_account['storage_account_id'], "fingerprint": storage_account['fingerprint'], "native": storage_account["native"]})
+
+        return run_import_plans(self.layout, jobs, self.resource, self.options)
 
     def set_everything(self):
         """
-        Setup the WorkFlow Steps.
+        Setup the WorkFlow Steps, see utils/workflow.py.
         """
-        if Utilities.skip_resources_from_settings(self.subscription_name, self.resource):
-            logger.info(f"Skipping Resources {self.resource} from subscription account {self.subscription_name}. For more info check utils/settings.py\n Exitting.")
-            sys.exit(1)
-
-        Utilities.generate_tf_provider(self.local_repo_path)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "init"])
-
-        storage_accounts = self.get_storage_account_details()
-
-        self.generate_import_blocks(storage_accounts)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "fmt"])
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan"])
+        run_import_workflow(self)
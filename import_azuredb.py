@@ -1,10 +1,24 @@
-from utils.utilities import Utilities, SkipTag
-from jinja2 import Environment, FileSystemLoader
+from utils.utilities import Utilities
+from utils.settings import IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from utils.tf_index import TerraformIndex
+from utils.address_registry import AddressRegistry
+from utils.sharding import ShardLayout
+from utils.planner import run_import_plans
+from utils.workflow import run_import_workflow
+from utils.config_cache import ConfigCache
+from utils.incremental import IncrementalSync
+from utils.stages import Stage
 from loguru import logger
-import os
-from utils.cleanup import cleanup_tf_plan_file
 import sys
 
+# Terraform (server, database) resource types per platform and server type
+DB_RESOURCE_TYPES = {
+    ("mysql", "single"): ("azurerm_mysql_server", "azurerm_mysql_database"),
+    ("mysql", "flexible"): ("azurerm_mysql_flexible_server", "azurerm_mysql_flexible_database"),
+    ("postgresql", "single"): ("azurerm_postgresql_server", "azurerm_postgresql_database"),
+    ("postgresql", "flexible"): ("azurerm_postgresql_flexible_server", "azurerm_postgresql_flexible_server_database"),
+    ("sql", "single"): ("azurerm_mssql_server", "azurerm_mssql_database"),
+}
 
 class AzureDBImportSetUp:
     """
@@ -12,26 +26,32 @@ class AzureDBImportSetUp:
     Supoprted resources: Azure Database for PAAS , IAAS
     """
 
-    def __init__(self, subscription_id, resource, local_repo_path, filters):
+    def __init__(self, subscription_id, resource, local_repo_path, filters, options=None):
         self.resource = resource
+        subscription_name = Stage("subscription name lookup", Utilities.get_subscription_name, subscription_id=subscription_id)
         if resource == "mysql":
             self.mysql_client, self.mysql_flexible_client = Utilities.create_client(subscription_id=subscription_id, resource='mysql')
         if resource == "postgresql":
             self.postgresql_client, self.postgresql_flexible_client = Utilities.create_client(subscription_id=subscription_id, resource='postgresql')
         if resource == "sql":
             self.sql_client = Utilities.create_client(subscription_id=subscription_id, resource=self.resource)
-        self.subscription_name = Utilities.get_subscription_name(subscription_id=subscription_id)
+        self.subscription_name = subscription_name.wait()
 
-        self.tmpl = Environment(loader=FileSystemLoader("templates"))
+        self.tmpl = Utilities.get_template_env()
         self.local_repo_path = local_repo_path
         self.subscription_id = subscription_id
         self.tag_filters = {key: value for key, value in filters} if filters else {}
+        self.tf_index = TerraformIndex(local_repo_path)
+        self.addresses = AddressRegistry(self.tf_index)
+        self.options = options or {}
+        self.layout = ShardLayout(local_repo_path, self.options.get("shard_by"))
+        self.incremental = IncrementalSync(local_repo_path, subscription_id, resource, enabled=self.options.get("incremental", False))
 
     def _tags_match(self, resource_tags):
         """
         Check if resource tags match the filters.
         """
-        if resource_tags.get("TF_IMPORTED") == "True":
+        if resource_tags.get(IMPORTED_TAG_KEY) == IMPORTED_TAG_VALUE:
             return False
 
         for key, value in self.tag_filters.items():
@@ -51,6 +71,9 @@ class AzureDBImportSetUp:
             mysql_flexible_servers = self.mysql_flexible_client.servers.list()
 
             for server in mysql_servers:
+                if not self.incremental.in_scope(server.id):
+                    continue
+
                 # Skip the server if it is stopped
                 if server.user_visible_state.lower() == "stopped":
                     logger.info(f"Skipping stopped MySQL server: {server.name}")
@@ -62,7 +85,7 @@ class AzureDBImportSetUp:
                     continue
 
                 # Get the list of databases for the current server
-                databases = self.mysql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name)
+                databases = list(self.mysql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name))
                 db_list = []
                 for db in databases:
                     if db.name not in ["mysql","sys","performance_schema", "information_schema", "tmp"]:
@@ -75,10 +98,17 @@ class AzureDBImportSetUp:
                     "instance_name": server.name,
                     "instance_id": server.id,
                     "type": "single",
-                    "db_list": db_list
+                    "db_list": db_list,
+                    "tags": server_tags,
+                    "fingerprint": ConfigCache.fingerprint(server, databases),
+                    # SDK models for native config generation, single servers always go through terraform
+                    "native": None
                 })
 
             for server in mysql_flexible_servers:
+                if not self.incremental.in_scope(server.id):
+                    continue
+
                 # Skip the server if it is stopped
                 if server.state.lower() == "stopped":
                     logger.info(f"Skipping stopped MySQL server: {server.name}")
@@ -90,7 +120,7 @@ class AzureDBImportSetUp:
                     continue
 
                 # Get the list of databases for the current flexible server
-                databases = self.mysql_flexible_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name)
+                databases = list(self.mysql_flexible_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name))
                 db_list = []
                 for db in databases:
                     if db.name not in ["mysql","sys","performance_schema", "information_schema", "tmp"]:
@@ -103,7 +133,10 @@ class AzureDBImportSetUp:
                     "instance_name": server.name,
                     "instance_id": server.id,
                     "type": "flexible",
-                    "db_list": db_list
+                    "db_list": db_list,
+                    "tags": server_tags,
+                    "fingerprint": ConfigCache.fingerprint(server, databases),
+                    "native": [("azurerm_mysql_flexible_server", server)] + [("azurerm_mysql_flexible_database", db) for db in databases]
                 })
 
         if self.resource == "postgresql":
@@ -112,6 +145,9 @@ class AzureDBImportSetUp:
             postgresql_flexible_servers = self.postgresql_flexible_client.servers.list()
 
             for server in postgresql_servers:
+                if not self.incremental.in_scope(server.id):
+                    continue
+
                 # Skip the server if it is stopped
                 if server.user_visible_state.lower() == "stopped":
                     logger.info(f"Skipping stopped PostgreSQL server: {server.name}")
@@ -122,7 +158,7 @@ class AzureDBImportSetUp:
                     continue
 
                 # Get databases for the server
-                databases = self.postgresql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name)
+                databases = list(self.postgresql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name))
                 db_list = []
                 for db in databases:
                     if db.name not in ["postgres", "azure_maintenance", "azure_sys"]:  # Skip the system database for PostgreSQL
@@ -135,11 +171,17 @@ class AzureDBImportSetUp:
                     "instance_name": server.name,
                     "instance_id": server.id,
                     "type": "single",
-                    "db_list": db_list
+                    "db_list": db_list,
+                    "tags": server_tags,
+                    "fingerprint": ConfigCache.fingerprint(server, databases),
+                    "native": None
                 })
 
             # PostgreSQL Flexible Server Databases
             for server in postgresql_flexible_servers:
+                if not self.incremental.in_scope(server.id):
+                    continue
+
                 # Skip the server if it is stopped
                 if server.state.lower() == "stopped":
                     logger.info(f"Skipping stopped PostgreSQL Flexible server: {server.name}")
@@ -151,7 +193,7 @@ class AzureDBImportSetUp:
                     continue
 
                 # Get databases for the flexible server
-                databases = self.postgresql_flexible_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name)
+                databases = list(self.postgresql_flexible_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name))
                 db_list = []
                 for db in databases:
                     if db.name not in ["postgres", "azure_maintenance", "azure_sys"]:  # Skip the system database for PostgreSQL
@@ -164,13 +206,19 @@ class AzureDBImportSetUp:
                     "instance_name": server.name,
                     "instance_id": server.id,
                     "type": "flexible",
-                    "db_list": db_list
+                    "db_list": db_list,
+                    "tags": server_tags,
+                    "fingerprint": ConfigCache.fingerprint(server, databases),
+                    "native": [("azurerm_postgresql_flexible_server", server)] + [("azurerm_postgresql_flexible_server_database", db) for db in databases]
                 })
 
         if self.resource == "sql":
             # Azure SQL Databases
             sql_servers = self.sql_client.servers.list()
             for server in sql_servers:
+                if not self.incremental.in_scope(server.id):
+                    continue
+
                 # Skip the server if it is stopped
                 if server.state.lower() == "stopped":
                     logger.info(f"Skipping stopped SQL server: {server.name}")
@@ -182,7 +230,7 @@ class AzureDBImportSetUp:
                     continue
 
                 # Get databases for the server
-                databases = self.sql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name)
+                databases = list(self.sql_client.databases.list_by_server(resource_group_name=(server.id).split('/')[4], server_name=server.name))
                 db_list = []
                 for db in databases:
                     if db.name != "master":  # Assuming "master" is the system database for Azure SQL
@@ -195,12 +243,25 @@ class AzureDBImportSetUp:
                     "instance_name": server.name,
                     "instance_id": server.id,
                     "type": "single",
-                    "db_list": db_list
+                    "db_list": db_list,
+                    "tags": server_tags,
+                    "fingerprint": ConfigCache.fingerprint(server, databases),
+                    "native": [("azurerm_mssql_server", server)] + [("azurerm_mssql_database", db) for db in databases]
                 })
 
         logger.info(f"Total DataBase to Import {len(database_details)}")
         return database_details
 
+    def discover(self):
+        return self.get_databases()
+
+    def inventory_resources(self, databse_instance):
+        """
+        (terraform type, Azure ID, imported) of every resource of a discovered server, for the inventory report.
+        """
+        server_type, database_type = DB_RESOURCE_TYPES[(self.resource, databse_instance["type"])]
+        return [(server_type, databse_instance["instance_id"], True)] + [(database_type, db["db_id"], True) for db in databse_instance["db_list"]]
+
     def generate_import_blocks(self, database_details):
         """
         Generate Import Blocks, Generate Terraform code, Cleanup Terraform code
@@ -210,58 +271,38 @@ class AzureDBImportSetUp:
             sys.exit(1)
 
         template = self.tmpl.get_template("azuredb_import.tf.j2")
+        jobs = []
 
         for databse_instance in database_details:
-            logger.info(f"Importing : {databse_instance}")
+            logger.bind(resource_id=databse_instance["instance_id"]).info(f"Importing : {databse_instance['instance_name']}")
+            logger.bind(resource_id=databse_instance["instance_id"]).debug(f"Discovered : {databse_instance}")
+
+            root_path = self.layout.root_for(databse_instance['instance_id'], databse_instance["tags"])
+            server_type, database_type = DB_RESOURCE_TYPES[(self.resource, databse_instance["type"])]
+            instance_address = self.addresses.claim(server_type, databse_instance["instance_name"], databse_instance["instance_id"], root_path)
+            if instance_address is None:
+                continue
 
             context = {
-                "instance_name": databse_instance["instance_name"],
+                "instance_address": instance_address,
                 "instance_id": databse_instance["instance_id"],
                 "type": databse_instance["type"],
-                "db_list": databse_instance["db_list"],
+                "db_list": self.addresses.claim_children(database_type, instance_address, databse_instance["db_list"], root_path, name_key="db_name", id_key="db_id"),
                 "platform": self.resource
             }
 
             rendered_template = template.render(context)
+            rendered_template = self.tf_index.filter_import_blocks(rendered_template, root_path)
+            if rendered_template is None:
+                logger.info(f"Skipping {databse_instance['instance_name']}: already declared in {root_path}")
+                continue
 
-            output_file_path = (
-                f"{self.local_repo_path}/import-{databse_instance['instance_name']}.tf"
-            )
-            with open(output_file_path, "w") as f:
-                f.write(rendered_template)
-
-            Utilities.run_terraform_cmd(
-                [
-                    "terraform",
-                    f"-chdir={self.local_repo_path}",
-                    "plan",
-                    f"-generate-config-out=generated-plan-import-{databse_instance['instance_name']}.tf",
-                ]
-            )
-            os.rename(output_file_path, f"{output_file_path}.imported")
-            cleanup_tf_plan_file(
-                input_tf_file=f"{self.local_repo_path}/generated-plan-import-{databse_instance['instance_name']}.tf"
-            )
-
-        for filename in os.listdir(self.local_repo_path):
-            if filename.endswith(".imported"):
-                new_filename = filename.replace(".imported", "")
-                old_file = os.path.join(self.local_repo_path, filename)
-                new_file = os.path.join(self.local_repo_path, new_filename)
-                os.rename(old_file, new_file)
+            jobs.append({"name": instance_address, "root": root_path, "rendered_template": rendered_template, "id": databse_instance['instance_id'], "fingerprint": databse_instance['fingerprint'], "native": databse_instance["native"]})
+
+        return run_import_plans(self.layout, jobs, self.resource, self.options)
 
     def set_everything(self):
         """
-        Setup the WorkFlow Steps.
+        Setup the WorkFlow Steps, see utils/workflow.py.
         """
-        if Utilities.skip_resources_from_settings(self.subscription_name, self.resource):
-            logger.info(f"Skipping Resources {self.resource} from subscription account {self.subscription_name}. For more info check utils/settings.py\n Exitting.")
-            sys.exit(1)
-
-        Utilities.generate_tf_provider(self.local_repo_path)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "init"])
-
-        databases = self.get_databases()
-        self.generate_import_blocks(databases)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "fmt"])
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan"])
+        run_import_workflow(self)
@@ -1,11 +1,16 @@
-from utils.utilities import Utilities, SkipTag
-from utils.cleanup import cleanup_tf_plan_file
-from jinja2 import Environment, FileSystemLoader
+from utils.utilities import Utilities
+from utils.settings import VM_EXTENSIONS_TO_IMPORT, IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from utils.tf_index import TerraformIndex
+from utils.address_registry import AddressRegistry
+from utils.sharding import ShardLayout
+from utils.planner import run_import_plans
+from utils.workflow import run_import_workflow
+from utils.config_cache import ConfigCache
+from utils.incremental import IncrementalSync
+from utils.stages import Stage
 from azure.core.exceptions import ResourceNotFoundError
 from loguru import logger
-import os
 import sys
-import re
 
 
 class VMSImportSetUp:
@@ -14,21 +19,23 @@ class VMSImportSetUp:
     Supoprted resources: VMS, DISK, DISK ATTACHMENTS, EXTENTIONS
     """
 
-    def __init__(self, subscription_id, resource, local_repo_path, filters):
+    def __init__(self, subscription_id, resource, local_repo_path, filters, options=None):
         self.resource = resource
+        subscription_name = Stage("subscription name lookup", Utilities.get_subscription_name, subscription_id=subscription_id)
 
         self.client = Utilities.create_client(subscription_id = subscription_id, resource=self.resource)
         self.network_client = Utilities.create_client(subscription_id=subscription_id, resource="lb")
-        self.subscription_name = Utilities.get_subscription_name(subscription_id=subscription_id)
+        self.subscription_name = subscription_name.wait()
 
-        self.tmpl = Environment(loader=FileSystemLoader("templates"))
+        self.tmpl = Utilities.get_template_env()
         self.local_repo_path = local_repo_path
         self.subscription_id = subscription_id
         self.tag_filters = {key: value for key, value in filters} if filters else {}
-
-    def sanitize_name(self, filename):
-        # Replace invalid characters with an underscore
-        return re.sub(r'[<>:"/\\|?*]', "_", filename)
+        self.tf_index = TerraformIndex(local_repo_path)
+        self.addresses = AddressRegistry(self.tf_index)
+        self.options = options or {}
+        self.layout = ShardLayout(local_repo_path, self.options.get("shard_by"))
+        self.incremental = IncrementalSync(local_repo_path, subscription_id, resource, enabled=self.options.get("incremental", False))
 
     def describe_vms(self):
         """
@@ -38,10 +45,14 @@ class VMSImportSetUp:
         vms_details = []
 
         for vm in vms:
+            if not self.incremental.in_scope(vm.id):
+                continue
+
             resource_group_name = vm.id.split('/')[4]
 
-            # Check tags
-            tags_match = all(vm.tags.get(key) == value for key, value in self.tag_filters.items())
+            # Check tags, skip VMs already imported
+            vm_tags = vm.tags or {}
+            tags_match = vm_tags.get(IMPORTED_TAG_KEY) != IMPORTED_TAG_VALUE and all(vm_tags.get(key) == value for key, value in self.tag_filters.items())
 
             if tags_match:
                 os_type = "windows" if vm.storage_profile.os_disk.os_type == "Windows" else "linux"
@@ -49,10 +60,12 @@ class VMSImportSetUp:
                 # Get NIC information
                 nic_ids = [nic.id for nic in vm.network_profile.network_interfaces]
                 nics = []
+                nic_models = []
                 try:
                     for nic_id in nic_ids:
                         nic_name = nic_id.split('/')[-1]
                         nic = self.network_client.network_interfaces.get(resource_group_name, nic_name)
+                        nic_models.append(nic)
                         nics.append({
                             'name': nic.name,
                             'id': nic.id,
@@ -65,10 +78,17 @@ class VMSImportSetUp:
                     {
                         'name': disk.name,
                         'id': disk.managed_disk.id,
-                        'attachment_id': disk.vhd.uri if disk.vhd else disk.managed_disk.id
+                        'attachment_id': f"{vm.id}/dataDisks/{disk.name}"
                     }
                     for disk in vm.storage_profile.data_disks
                 ]
+                # Disk models for the fingerprint, size, SKU and tags of a disk aren't part of the VM model
+                disk_models = []
+                try:
+                    for data_disk in data_disks:
+                        disk_models.append(self.client.disks.get(data_disk['id'].split('/')[4], data_disk['id'].split('/')[-1]))
+                except ResourceNotFoundError as e:
+                    logger.error(f"Resource not found: {e.message}")
                 # Get Extensions
                 extensions = self.client.virtual_machine_extensions.list(resource_group_name, vm.name).value
                 vm_extensions = [
@@ -79,12 +99,14 @@ class VMSImportSetUp:
                     for ext in extensions
                 ]
                 vm_detail = {
-                    'vm_name': self.sanitize_name(vm.name),
+                    'vm_name': vm.name,
                     'vm_id': vm.id,
                     'data_disks': data_disks,
                     'nics': nics,
                     'extensions': vm_extensions,
-                    'os_type': os_type
+                    'os_type': os_type,
+                    'tags': vm.tags or {},
+                    'fingerprint': ConfigCache.fingerprint(vm, nic_models, disk_models, extensions)
                 }
                 vms_details.append(vm_detail)
 
@@ -92,6 +114,29 @@ class VMSImportSetUp:
         return vms_details
 
 
+    def importable_extensions(self, vm):
+        """
+        Extensions of a discovered VM imported along with it, see VM_EXTENSIONS_TO_IMPORT in utils/settings.py.
+        """
+        allowed_extensions = {name.lower() for name in VM_EXTENSIONS_TO_IMPORT[vm["os_type"]]}
+        return [extension for extension in vm["extensions"] if extension["name"].lower() in allowed_extensions]
+
+    def discover(self):
+        return self.describe_vms()
+
+    def inventory_resources(self, vm):
+        """
+        (terraform type, Azure ID, imported) of every resource of a discovered VM, for the inventory report.
+        """
+        importable_extensions = {extension["id"] for extension in self.importable_extensions(vm)}
+        resources = [(f"azurerm_{vm['os_type']}_virtual_machine", vm["vm_id"], True)]
+        for data_disk in vm["data_disks"]:
+            resources.append(("azurerm_managed_disk", data_disk["id"], True))
+            resources.append(("azurerm_virtual_machine_data_disk_attachment", data_disk["attachment_id"], True))
+        resources.extend(("azurerm_network_interface", nic["id"], True) for nic in vm["nics"])
+        resources.extend(("azurerm_virtual_machine_extension", extension["id"], extension["id"] in importable_extensions) for extension in vm["extensions"])
+        return resources
+
     def generate_import_blocks(self, vms_details):
         """
         Generate Import Blocks, Generate Terraform code, Cleanup Terraform code
@@ -100,48 +145,52 @@ class VMSImportSetUp:
             logger.info("No VM found: Nothing to do. Exitting")
             sys.exit(1)
         template = self.tmpl.get_template("vm_import.tf.j2")
+        jobs = []
 
         for vm in vms_details:
-            logger.info(f"Importing VM: {vm}")
+            logger.bind(resource_id=vm["vm_id"]).info(f"Importing VM: {vm['vm_name']}")
+            logger.bind(resource_id=vm["vm_id"]).debug(f"Discovered VM: {vm}")
+
+            root_path = self.layout.root_for(vm['vm_id'], vm["tags"])
+            vm_address = self.addresses.claim(f"azurerm_{vm['os_type']}_virtual_machine", vm['vm_name'], vm['vm_id'], root_path)
+            if vm_address is None:
+                continue
+
+            data_disks = []
+            for data_disk in vm["data_disks"]:
+                address = self.addresses.claim("azurerm_managed_disk", f"{vm_address}_{data_disk['name']}", data_disk['id'], root_path)
+                attachment_address = self.addresses.claim("azurerm_virtual_machine_data_disk_attachment", f"{vm_address}_{data_disk['name']}", data_disk['attachment_id'], root_path)
+                if address and attachment_address:
+                    data_disks.append({**data_disk, "address": address, "attachment_address": attachment_address})
+                # A disk is only imported together with its attachment, give back the half that was claimed
+                elif address:
+                    self.addresses.release("azurerm_managed_disk", address, data_disk['id'], root_path)
+                elif attachment_address:
+                    self.addresses.release("azurerm_virtual_machine_data_disk_attachment", attachment_address, data_disk['attachment_id'], root_path)
+            nics = self.addresses.claim_children("azurerm_network_interface", vm_address, vm["nics"], root_path)
+            extensions = self.addresses.claim_children("azurerm_virtual_machine_extension", vm_address, self.importable_extensions(vm), root_path)
 
             context = {
-                "vm_name": vm['vm_name'],
+                "vm_address": vm_address,
                 "vm_id": vm['vm_id'],
                 "os_type": vm['os_type'],
-                "data_disks": vm["data_disks"],
-                "nics": vm["nics"],
-                "extensions": vm["extensions"]
+                "data_disks": data_disks,
+                "nics": nics,
+                "extensions": extensions
             }
 
             rendered_template = template.render(context)
+            rendered_template = self.tf_index.filter_import_blocks(rendered_template, root_path)
+            if rendered_template is None:
+                logger.info(f"Skipping {vm['vm_name']}: already declared in {root_path}")
+                continue
 
-            output_file_path = f"{self.local_repo_path}/import-{vm['vm_name']}.tf"
-            with open(output_file_path, "w") as f:
-                f.write(rendered_template)
+            jobs.append({"name": vm_address, "root": root_path, "rendered_template": rendered_template, "id": vm['vm_id'], "fingerprint": vm['fingerprint']})
 
-            Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan", f"-generate-config-out=generated-plan-import-{vm['vm_name']}.tf"])
-            os.rename(output_file_path, f"{output_file_path}.imported")
-            cleanup_tf_plan_file(input_tf_file=f"{self.local_repo_path}/generated-plan-import-{vm['vm_name']}.tf")
-
-        for filename in os.listdir(self.local_repo_path):
-            if filename.endswith(".imported"):
-                new_filename = filename.replace(".imported", "")
-                old_file = os.path.join(self.local_repo_path, filename)
-                new_file = os.path.join(self.local_repo_path, new_filename)
-                os.rename(old_file, new_file)
+        return run_import_plans(self.layout, jobs, self.resource, self.options)
 
     def set_everything(self):
         """
-        Setup the WorkFlow Steps.
+        Setup the WorkFlow Steps, see utils/workflow.py.
         """
-        if Utilities.skip_resources_from_settings(self.subscription_name, self.resource):
-            logger.info(f"Skipping Resources {self.resource} from subscription account {self.subscription_name}. For more info check utils/settings.py\n Exitting.")
-            sys.exit(1)
-
-        Utilities.generate_tf_provider(self.local_repo_path)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "init"])
-
-        instances = self.describe_vms()
-        self.generate_import_blocks(instances)
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "fmt"])
-        Utilities.run_terraform_cmd(["terraform", f"-chdir={self.local_repo_path}", "plan"])
+        run_import_workflow(self)
@@ -1,38 +1,188 @@
 #!/usr/bin/env python3
 import argparse
-from import_vm import VMSImportSetUp
-from import_aks import AKSImportSetUp
-from import_azuredb import AzureDBImportSetUp
-from import_alb import ALBImportSetUp
-from import_azure_blob import StorageAccountImportSetUp
+import os
+import sys
+from utils.registry import get_importer, supported_resources
+from utils.cleanup import clean_generated_files
+from utils.daemon import ImportDaemon
+from utils.utilities import Utilities
+from utils.planner import MAX_BATCH_SIZE
+from utils.log import add_logging_arguments, setup_logging_from_args
+from utils.recording import add_recording_arguments, configure_from_args
+from utils.instrumentation import add_metrics_arguments, configure_from_args as configure_metrics_from_args
+from utils.inventory_report import run_inventory, DEFAULT_INVENTORY_WORKERS
+from utils.sharding import ShardLayout
+from utils.watchdog import RunDeadlineExceeded, TIMEOUT_RETURNCODE, set_deadline
 from loguru import logger
 
+# Supported Resources for Azure, new resource types are added to utils/registry.py
+SUPPORTED_RESOURCES = supported_resources()
+
+# Import options with their defaults, set from the command line or from a daemon job request
+IMPORT_OPTIONS = {
+    "shard_by": None,
+    "shard_workers": 1,
+    "max_batch_size": MAX_BATCH_SIZE,
+    "parallelism": None,
+    "config_cache": True,
+    "incremental": False,
+    "tag_imported": False,
+    "native_hcl": False,
+    "for_each_imports": False,
+    "plan_timeout": None,
+}
+# Type of the options defaulting to None, the others have the type of their default
+IMPORT_OPTION_TYPES = {
+    "shard_by": str,
+    "parallelism": int,
+    "plan_timeout": int,
+}
+
+
+def check_import_options(options):
+    """
+    Check the import options of a daemon job request, the command line ones are already typed by argparse.
+    Integers must be positive. Raises ValueError on an invalid value.
+    """
+    for key, value in options.items():
+        if value is None and IMPORT_OPTIONS[key] is None:
+            continue
+        expected_type = IMPORT_OPTION_TYPES.get(key, type(IMPORT_OPTIONS[key]))
+        # bool is an int subclass, true isn't a batch size
+        if expected_type is int and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f"Invalid {key}: {value!r}, expected a positive integer")
+        if expected_type is not int and not isinstance(value, expected_type):
+            raise ValueError(f"Invalid {key}: {value!r}, expected a {expected_type.__name__}")
+    if options.get("shard_by"):
+        ShardLayout.check_shard_key(options["shard_by"])
+
+
+def run_import(subscription_id, resource, local_repo_path, filters, options=None):
+    """
+    Run the import workflow of a single resource type.
+    """
+    if resource not in SUPPORTED_RESOURCES:
+        logger.info(f"Import Currently not Supported for {resource}")
+        return
+
+    importer_class = get_importer(resource)
+    importer = importer_class(subscription_id=subscription_id, resource=resource, local_repo_path=local_repo_path, filters=filters, options=options)
+    importer.set_everything()
+
+
+def clean_command(argv):
+    """
+    Re-apply the cleanup rules to already generated files: main.py clean --local-repo-path <dir>
+    """
+    parser = argparse.ArgumentParser(prog="main.py clean", description="Re-clean generated TF files in parallel")
+    parser.add_argument("--local-repo-path", dest="local_repo_path", help="Local Repo Path", type=str, required=True)
+    parser.add_argument("--workers", dest="workers", help="Number of worker processes, defaults to the CPU count", type=int, default=None)
+    parser.add_argument("--force", dest="force", help="Clean files even if unchanged since the last clean", action="store_true")
+    add_logging_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_logging_from_args(args)
+
+    _, failed = clean_generated_files(args.local_repo_path, workers=args.workers, force=args.force)
+    sys.exit(1 if failed else 0)
+
+
+def inventory_command(argv):
+    """
+    Report what an import would find without importing anything: main.py inventory --subscription-id <id> [--subscription-id <id>...]
+    """
+    parser = argparse.ArgumentParser(prog="main.py inventory", description="Stream resource counts, import blocks and projected plan time per subscription")
+    parser.add_argument("--subscription-id", dest="subscription_ids", help="Azure Subscription ID, repeat for several subscriptions", type=str, action="append", required=True)
+    parser.add_argument("--resource", dest="resources", help="Azure Resource, repeat for several, all supported resources when not set", type=str, action="append", choices=SUPPORTED_RESOURCES)
+    parser.add_argument("--tag", action="append", nargs=2, metavar=("key", "value"), help="Specify a tag filter as key value pair, e.g. --tag TF_MANAGED true --tag env dev")
+    parser.add_argument("--local-repo-path", dest="local_repo_path", help="Repo to leave already imported resources out of and take recorded plan timings from", type=str, default=None)
+    parser.add_argument("--format", dest="output_format", help="Report format, json writes one JSON object per line", type=str, choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", dest="output_path", help="Write the report to this file instead of stdout", type=str, default=None)
+    parser.add_argument("--workers", dest="workers", help="Number of (subscription, resource) listings running at the same time", type=int, default=DEFAULT_INVENTORY_WORKERS)
+    add_logging_arguments(parser)
+    add_recording_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_logging_from_args(args)
+    configure_from_args(args)
+    configure_metrics_from_args(args)
+
+    failed = run_inventory(args.subscription_ids, args.resources or SUPPORTED_RESOURCES, local_repo_path=args.local_repo_path, filters=args.tag, output_format=args.output_format, output_path=args.output_path, workers=args.workers)
+    sys.exit(1 if failed else 0)
+
+
+def serve_command(argv):
+    """
+    Run as a long lived daemon accepting import jobs: main.py serve [--port 8080 | --socket <path>]
+    """
+    parser = argparse.ArgumentParser(prog="main.py serve", description="TF Import daemon with a local job API")
+    parser.add_argument("--host", dest="host", help="Address to listen on", type=str, default="127.0.0.1")
+    parser.add_argument("--port", dest="port", help="Port to listen on", type=int, default=8080)
+    parser.add_argument("--socket", dest="socket_path", help="Listen on this Unix socket instead of a TCP port", type=str, default=None)
+    parser.add_argument("--workers", dest="workers", help="Number of import jobs running at the same time", type=int, default=2)
+    parser.add_argument("--plugin-cache-dir", dest="plugin_cache_dir", help="Terraform plugin cache shared by all jobs", type=str, default=os.path.expanduser("~/.terraform.d/plugin-cache"))
+    add_logging_arguments(parser)
+    add_recording_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_logging_from_args(args)
+    configure_from_args(args)
+    configure_metrics_from_args(args)
+
+    os.environ.setdefault("TF_PLUGIN_CACHE_DIR", args.plugin_cache_dir)
+    os.makedirs(os.environ["TF_PLUGIN_CACHE_DIR"], exist_ok=True)
+
+    # Warm up the credential and compile every template once before taking jobs
+    Utilities.get_credential()
+    template_env = Utilities.get_template_env()
+    for template_name in template_env.list_templates():
+        template_env.get_template(template_name)
+
+    daemon = ImportDaemon(run_job=run_import, supported_resources=SUPPORTED_RESOURCES, option_defaults=IMPORT_OPTIONS, check_options=check_import_options, workers=args.workers)
+    daemon.serve(host=args.host, port=args.port, socket_path=args.socket_path)
+    sys.exit(0)
+
+
 if __name__ == "__main__":
-    # Supported Resources for Azure
-    supported_resources = ["vms", "aks", "lb", "lbgw", "sql", "mysql", "postgresql", "azureblob"]
+    if len(sys.argv) > 1 and sys.argv[1] == "clean":
+        clean_command(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve_command(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "inventory":
+        inventory_command(sys.argv[2:])
 
     parser = argparse.ArgumentParser(description="TF Import Script")
     parser.add_argument( "--subscription-id",dest="subscription_id",help="Azure Subscription ID ",type=str,required=True,)
     parser.add_argument("--local-repo-path",dest="local_repo_path",help="Local Repo Path",type=str,required=True,)
-    parser.add_argument("--resource", dest="resource", help="Azure Resource", type=str, required=True, choices=supported_resources)
+    parser.add_argument("--resource", dest="resource", help="Azure Resource", type=str, required=True, choices=SUPPORTED_RESOURCES)
     parser.add_argument("--tag",action="append",nargs=2, metavar=("key", "value"),help="Specify a tag filter as key value pair, e.g. -t TF_MANAGED true -t env dev")
+    parser.add_argument("--shard-by", dest="shard_by", help="Split generated files into one root module per shard: resource_group, subscription or tag:<tag name>", type=str, default=None)
+    parser.add_argument("--shard-workers", dest="shard_workers", help="Number of shard root modules planned in parallel", type=int, default=1)
+    parser.add_argument("--max-batch-size", dest="max_batch_size", help="Maximum number of resources planned together, 1 plans every resource on its own", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--parallelism", dest="parallelism", help="Fixed terraform plan -parallelism, tuned automatically from ARM throttling when not set", type=int, default=None)
+    parser.add_argument("--no-config-cache", dest="config_cache", help="Always run terraform to generate config, even for unchanged resources", action="store_false")
+    parser.add_argument("--incremental", dest="incremental", help="Only import resources created or changed in Azure since the last successful run", action="store_true")
+    parser.add_argument("--native-hcl", dest="native_hcl", help="Generate config of storage accounts, SQL and flexible MySQL/PostgreSQL servers from the SDK models instead of terraform plan", action="store_true")
+    parser.add_argument("--for-each-imports", dest="for_each_imports", help="Write natively generated resources as one JSON inventory with for_each import and resource blocks per type (terraform >= 1.7)", action="store_true")
+    parser.add_argument("--plan-timeout", dest="plan_timeout", help="Seconds before a hung terraform plan is killed and retried, sized from the batch when not set", type=int, default=None)
+    parser.add_argument("--deadline", dest="deadline", help="Seconds the whole run may take, it then stops cleanly and records its partial results", type=int, default=None)
+    parser.add_argument("--tag-imported", dest="tag_imported", help="Tag resources with TF_IMPORTED=True once their config is generated, so later runs skip them", action="store_true")
+    add_logging_arguments(parser)
+    add_recording_arguments(parser)
+    add_metrics_arguments(parser)
 
     args = parser.parse_args()
+    setup_logging_from_args(args)
+    configure_from_args(args)
+    configure_metrics_from_args(args)
+
+    set_deadline(args.deadline)
+    if args.shard_by:
+        os.environ.setdefault("TF_PLUGIN_CACHE_DIR", ShardLayout.plugin_cache_dir(args.local_repo_path))
+        os.makedirs(os.environ["TF_PLUGIN_CACHE_DIR"], exist_ok=True)
 
-    if args.resource == "vms":
-        vms_import = VMSImportSetUp(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag)
-        vms_import.set_everything()
-    elif args.resource == "aks":
-        aks_import = AKSImportSetUp(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag)
-        aks_import.set_everything()
-    elif args.resource in ["mysql", "postgresql", "sql"]:
-        azuredb_import = AzureDBImportSetUp(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag)
-        azuredb_import.set_everything()
-    elif args.resource in ["lbgw", "lb"]:
-        alb_import = ALBImportSetUp(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag)
-        alb_import.set_everything()
-    elif args.resource == "azureblob":
-        alb_import = StorageAccountImportSetUp(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag)
-        alb_import.set_everything()
-    else:
-        logger.info(f"Import Currently not Supported for {args.resource}")
+    options = {key: getattr(args, key) for key in IMPORT_OPTIONS}
+    try:
+        run_import(subscription_id=args.subscription_id, resource=args.resource, local_repo_path=args.local_repo_path, filters=args.tag, options=options)
+    except RunDeadlineExceeded as e:
+        logger.error(str(e))
+        sys.exit(TIMEOUT_RETURNCODE)
@@ -0,0 +1,102 @@
+import os
+import re
+import threading
+from loguru import logger
+
+# Characters terraform doesn't allow in a resource name
+INVALID_NAME_CHARACTERS = re.compile(r"[^a-z0-9_-]+")
+
+
+def sanitize_name(name):
+    """
+    Terraform resource name of an Azure name: lowercased, invalid characters replaced by "-",
+    prefixed with "_" when it doesn't start with a letter.
+    """
+    name = INVALID_NAME_CHARACTERS.sub("-", name.lower()).strip("-")
+    if not name or not (name[0].isalpha() or name[0] == "_"):
+        name = f"_{name}"
+    return name
+
+
+class AddressRegistry:
+    """
+    Run wide map of Azure resource IDs to terraform addresses, seeded with the import blocks already in the repo.
+    Every ID gets one stable address, unique within its root module: colliding names get a _2, _3... suffix.
+    An ID claimed twice in the run is a duplicate discovery and is dropped.
+    """
+
+    def __init__(self, tf_index):
+        self.tf_index = tf_index
+        self.addresses = dict(tf_index.import_ids)
+        self.claimed = set()
+        self.taken = {}
+        # Last suffix handed out per (root, resource type, name), so a collision costs one lookup instead of a scan
+        self.suffixes = {}
+        self._lock = threading.Lock()
+
+    def _taken(self, root):
+        if root not in self.taken:
+            self.taken[root] = set(self.tf_index.addresses.get(root, set()))
+        return self.taken[root]
+
+    def claim(self, resource_type, name, resource_id, root_path=None):
+        """
+        Terraform resource name of resource_id in root_path, None if the ID was already claimed in this run.
+        IDs imported by earlier runs keep their address.
+        """
+        key = resource_id.lower()
+        root = os.path.normpath(root_path or self.tf_index.local_repo_path)
+        with self._lock:
+            if key in self.claimed:
+                logger.bind(resource_id=resource_id).info(f"Dropping duplicate {resource_type} {name}: already claimed as {self.addresses[key]}")
+                return None
+            self.claimed.add(key)
+
+            existing = self.addresses.get(key)
+            if existing and existing.split(".", 1)[0] == resource_type:
+                return existing.split(".", 1)[1]
+
+            taken = self._taken(root)
+            base = sanitize_name(name)
+            candidate = base
+            suffix_key = (root, resource_type, base)
+            suffix = self.suffixes.get(suffix_key, 1)
+            if suffix > 1:
+                candidate = f"{base}_{suffix}"
+            while f"{resource_type}.{candidate}" in taken:
+                suffix += 1
+                candidate = f"{base}_{suffix}"
+            self.suffixes[suffix_key] = suffix
+
+            address = f"{resource_type}.{candidate}"
+            taken.add(address)
+            self.addresses[key] = address
+            if candidate != base:
+                logger.bind(resource_id=resource_id).info(f"Address {resource_type}.{base} is taken, using {address}")
+            return candidate
+
+    def release(self, resource_type, name, resource_id, root_path=None):
+        """
+        Give back a claim whose import block won't be rendered after all, its address and ID can be claimed again.
+        """
+        key = resource_id.lower()
+        root = os.path.normpath(root_path or self.tf_index.local_repo_path)
+        with self._lock:
+            self.claimed.discard(key)
+            seeded = self.tf_index.import_ids.get(key)
+            if seeded:
+                self.addresses[key] = seeded
+                return
+            self.addresses.pop(key, None)
+            self._taken(root).discard(f"{resource_type}.{name}")
+
+    def claim_children(self, resource_type, parent_name, children, root_path=None, name_key="name", id_key="id"):
+        """
+        Copies of the child resource dicts with the address they claimed, named <parent>_<child>. Duplicates are dropped.
+        """
+        claimed = []
+        for child in children:
+            address = self.claim(resource_type, f"{parent_name}_{child[name_key]}", child[id_key], root_path)
+            if address is not None:
+                claimed.append({**child, "address": address})
+        return claimed
@@ -1,5 +1,18 @@
 import re
+import os
+import json
+import mmap
+import stat
+import tempfile
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from loguru import logger
+from .settings import STATE_DIR
+
+# Largest slice of a memory-mapped file copied at once when rewriting it
+COPY_CHUNK_SIZE = 1024 * 1024
 
 # Define the RESOURCE_CLEANUP dictionary with patterns properly escaped
 RESOURCE_CLEANUP = {
@@ -24,43 +37,71 @@ RESOURCE_CLEANUP = {
 }
 
 
+@contextmanager
+def atomic_rewrite(tf_file):
+    """
+    Open a temp file next to tf_file for writing and atomically rename it over tf_file on success,
+    so a file is never left half written and never needs to be held in memory.
+    """
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(tf_file)), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", buffering=1024 * 1024) as write_file:
+            yield write_file
+        os.chmod(tmp_file, stat.S_IMODE(os.stat(tf_file).st_mode))
+        os.replace(tmp_file, tf_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
 def remove_global_lines(tf_file, list_to_cleanup):
     output_file = tf_file
     logger.info(f"Removing lines containing following items: {list_to_cleanup}")
 
-    with open(tf_file, "r") as readfile:
-        lines = readfile.readlines()
-        filtered_lines = []
-
-        for line in lines:
+    with open(tf_file, "r") as readfile, atomic_rewrite(output_file) as write_file:
+        for line in readfile:
             if "admin_password" in line: # Skip the null value for admin_password for windows
-                filtered_lines.append(line)
+                write_file.write(line)
                 continue
             if "client_secret = null # sensitive" in line: # Skip the null value for client_secret for AKS
-                filtered_lines.append(line)
+                write_file.write(line)
                 continue
             if any(element in line for element in list_to_cleanup):
                 continue
-            filtered_lines.append(line)
-
-    with open(output_file, "w") as write_file:
-        write_file.writelines(filtered_lines)
+            write_file.write(line)
 
     logger.info(f"Generated intermediate file to process: {output_file}")
     return output_file
 
 
-def remove_multiline(file, patterns):
-    with open(file, "r") as readfile:
-        content = readfile.read()
+def _copy_range(content, start, end, writefile):
+    """
+    Copy content[start:end] of a memory-mapped file in bounded chunks, so memory doesn't grow with the file size.
+    """
+    for chunk_start in range(start, end, COPY_CHUNK_SIZE):
+        writefile.write(content[chunk_start:min(chunk_start + COPY_CHUNK_SIZE, end)])
 
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-            # Remove the matches from the content
-            content = re.sub(pattern, "", content, flags=re.MULTILINE | re.DOTALL)
 
-    with open(file, "w") as writefile:
-        writefile.write(content)
+def remove_multiline(file, patterns):
+    """
+    Remove multiline patterns in a single pass per pattern over a memory-mapped view of the file.
+    A file without any match of a pattern isn't rewritten.
+    """
+    for pattern in patterns:
+        if os.path.getsize(file) == 0:
+            return
+        compiled_pattern = re.compile(pattern.encode(), re.MULTILINE | re.DOTALL)
+
+        with open(file, "rb") as readfile, mmap.mmap(readfile.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            first_match = compiled_pattern.search(content)
+            if first_match is None:
+                continue
+            with atomic_rewrite(file) as writefile:
+                position = 0
+                for match in compiled_pattern.finditer(content, first_match.start()):
+                    _copy_range(content, position, match.start(), writefile.buffer)
+                    position = match.end()
+                _copy_range(content, position, len(content), writefile.buffer)
 
 
 def should_remove_line(line, resource_type, custom_pattern=[]):
@@ -78,10 +119,13 @@ def should_remove_line(line, resource_type, custom_pattern=[]):
     return False
 
 def process_terraform_plan(input_file):
-    with open(input_file, "r") as file:
-        lines = file.readlines()
+    with open(input_file, "r") as file, atomic_rewrite(input_file) as new_file:
+        _process_terraform_lines(file, new_file)
+
+    logger.info(f"Generated Cleaned up File: {input_file}")
 
-    new_lines = []
+
+def _process_terraform_lines(lines, new_file):
     in_resource_block = False
     current_resource_type = None
 
@@ -92,14 +136,14 @@ def process_terraform_plan(input_file):
             in_resource_block = True
             current_resource_type = resource_block_match.group(1)
 
-            new_lines.append(line)
+            new_file.write(line)
             continue
 
         # Check if the line ends a resource block
         if in_resource_block and re.match(r"\s*}$\n#", line):
             in_resource_block = False
             current_resource_type = None
-            new_lines.append(line)
+            new_file.write(line)
             continue
 
         # Process lines within a resource block
@@ -109,7 +153,7 @@ def process_terraform_plan(input_file):
 
             if current_resource_type == "azurerm_application_gateway": #Special Case for preserving min_capacity = 0
                 if "min_capacity" in line:
-                    new_lines.append(line)
+                    new_file.write(line)
                     continue
 
             if current_resource_type == "azurerm_windows_virtual_machine":
@@ -122,20 +166,14 @@ def process_terraform_plan(input_file):
                     logger.error(f"client_secret is set to a random value :- Ericsson@123. Please Change it to correct value before Running apply")
                     line = 'client_secret      = "Ericsson@123"\n'
                 if "identity_ids" in line:
-                    new_lines.append(line)
+                    new_file.write(line)
                     continue
                 if "idle_timeout_in_minutes" in line:
                     line = 'idle_timeout_in_minutes = 30\n'
 
             if should_remove_line(line, current_resource_type):
                 continue
-        new_lines.append(line)
-
-    # Write the cleaned content to a new file
-    with open(input_file, "w") as new_file:
-        new_file.writelines(new_lines)
-
-    logger.info(f"Generated Cleaned up File: {input_file}")
+        new_file.write(line)
 
 
 def replace_jsonencode_in_file(line):
@@ -155,3 +193,92 @@ def cleanup_tf_plan_file(input_tf_file):
     process_terraform_plan(level1_cleanup_file)
 
     remove_multiline(input_tf_file, RESOURCE_CLEANUP["multiline_pattern"])
+
+
+def cleanup_rules_hash():
+    """
+    Hash of the cleanup rules, so files cleaned with older rules get cleaned again.
+    """
+    return hashlib.sha256(json.dumps(RESOURCE_CLEANUP, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(path):
+    """
+    SHA-256 of a file content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as readfile:
+        for chunk in iter(lambda: readfile.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_generated_files(local_repo_path):
+    """
+    List every generated-plan-import-*.tf file of the repo.
+    """
+    generated_files = []
+    for root, dirs, files in os.walk(local_repo_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for filename in files:
+            if filename.startswith("generated-plan-import-") and filename.endswith(".tf"):
+                generated_files.append(os.path.join(root, filename))
+    return sorted(generated_files)
+
+
+def _timed_cleanup(tf_file):
+    start = time.perf_counter()
+    cleanup_tf_plan_file(input_tf_file=tf_file)
+    return time.perf_counter() - start, file_hash(tf_file)
+
+
+def clean_generated_files(local_repo_path, workers=None, force=False):
+    """
+    Re-apply the cleanup pipeline to every generated file of the repo across a process pool.
+    Files unchanged since their last clean with the current rules are skipped unless force is set.
+    """
+    state_file = os.path.join(local_repo_path, STATE_DIR, "clean.json")
+    try:
+        with open(state_file, "r") as readfile:
+            state = json.load(readfile)
+    except (FileNotFoundError, ValueError):
+        state = {}
+
+    rules_hash = cleanup_rules_hash()
+    pending = []
+    skipped = 0
+    for tf_file in find_generated_files(local_repo_path):
+        key = os.path.relpath(tf_file, local_repo_path)
+        previous = state.get(key, {})
+        if not force and previous.get("rules") == rules_hash and previous.get("hash") == file_hash(tf_file):
+            skipped += 1
+            continue
+        pending.append(tf_file)
+
+    logger.info(f"Cleaning {len(pending)} generated files, {skipped} unchanged since last clean")
+
+    timings = {}
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_timed_cleanup, tf_file): tf_file for tf_file in pending}
+        for future in as_completed(futures):
+            tf_file = futures[future]
+            key = os.path.relpath(tf_file, local_repo_path)
+            try:
+                elapsed, cleaned_hash = future.result()
+            except Exception as e:
+                logger.error(f"Cleanup failed for {tf_file}: {e}")
+                failed.append(tf_file)
+                continue
+            timings[key] = elapsed
+            state[key] = {"hash": cleaned_hash, "rules": rules_hash}
+
+    for key, elapsed in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logger.info(f"{elapsed:8.3f}s  {key}")
+    logger.info(f"Cleaned {len(timings)} files in {sum(timings.values()):.3f}s total, {skipped} skipped, {len(failed)} failed")
+
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    with open(state_file, "w") as writefile:
+        json.dump(state, writefile, indent=2, sort_keys=True)
+
+    return timings, failed
@@ -0,0 +1,90 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from loguru import logger
+from .settings import STATE_DIR
+from .cleanup import cleanup_rules_hash
+
+
+def provider_version():
+    """
+    azurerm provider version pinned in templates/providers.tf.j2, generated config depends on it.
+    """
+    with open("templates/providers.tf.j2", "r") as readfile:
+        content = readfile.read()
+    version_match = re.search(r'version\s*=\s*"([^"]+)"', content)
+    return version_match.group(1) if version_match else hashlib.sha256(content.encode()).hexdigest()
+
+
+class ConfigCache:
+    """
+    Content addressed cache of cleaned generated config, keyed by Azure resource ID, a fingerprint
+    of the discovered model, the provider version and the cleanup rules.
+    A hit reuses the stored config without running terraform.
+    """
+
+    def __init__(self, local_repo_path):
+        self.cache_dir = os.path.join(local_repo_path, STATE_DIR, "config-cache")
+        self.version_key = f"{provider_version()}:{cleanup_rules_hash()}"
+        self.hits = 0
+        self.misses = 0
+        # Root modules are planned in parallel with --shard-workers, all sharing the counters
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*models):
+        """
+        Fingerprint of SDK models (or lists of them): the etag when ARM provides one, a hash of the properties otherwise.
+        """
+        digest = hashlib.sha256()
+        for model in models:
+            if isinstance(model, (list, tuple)):
+                for item in model:
+                    digest.update(ConfigCache.fingerprint(item).encode())
+                continue
+            etag = getattr(model, "etag", None)
+            if etag:
+                digest.update(etag.encode())
+                continue
+            data = model.as_dict() if hasattr(model, "as_dict") else model
+            digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, job):
+        key = hashlib.sha256(json.dumps([job["id"].lower(), job["fingerprint"], self.version_key, job["rendered_template"]]).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.tf")
+
+    def get(self, job):
+        """
+        Cached cleaned config of a job, None on a miss or when the job has no fingerprint.
+        """
+        if not job.get("fingerprint"):
+            return None
+        try:
+            with open(self._path(job), "r") as readfile:
+                content = readfile.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, job, generated_file):
+        """
+        Store the cleaned config generated for a job.
+        """
+        if not job.get("fingerprint") or not os.path.exists(generated_file):
+            return
+        cache_file = self._path(job)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(generated_file, "r") as readfile, open(f"{cache_file}.tmp", "w") as writefile:
+            writefile.write(readfile.read())
+        os.replace(f"{cache_file}.tmp", cache_file)
+
+    def summary(self):
+        with self._lock:
+            logger.info(f"Generated config cache: {self.hits} hits, {self.misses} misses")
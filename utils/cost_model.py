@@ -0,0 +1,103 @@
+import os
+import json
+import heapq
+import threading
+from loguru import logger
+from .settings import STATE_DIR
+from .tf_index import IMPORT_BLOCK
+
+# Weight of the latest measurement in the moving averages
+EWMA_ALPHA = 0.3
+# Plan seconds per import block before anything was measured for a resource type
+DEFAULT_SECONDS_PER_BLOCK = 5.0
+
+
+def _ewma(previous, value):
+    return value if previous is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+def import_block_count(job):
+    return max(1, len(IMPORT_BLOCK.findall(job["rendered_template"])))
+
+
+def makespan(durations, workers):
+    """
+    Duration of running the durations, in the given order, on workers that each pick the next one when idle.
+    """
+    finish_times = [0.0] * max(1, workers)
+    for duration in durations:
+        heapq.heapreplace(finish_times, finish_times[0] + duration)
+    return max(finish_times)
+
+
+class PlanCostModel:
+    """
+    Plan durations of earlier runs, as moving averages per resource (by Azure ID) and per import block of a
+    resource type, saved under the repo state dir. Estimates order the root modules planned in parallel longest first
+    and give the run ETA.
+    """
+
+    def __init__(self, local_repo_path, resource):
+        self.state_file = os.path.join(local_repo_path, STATE_DIR, "plan-costs.json")
+        self.resource = resource
+        self._lock = threading.Lock()
+        self._measured = {}
+        state = self._load()
+        self.resources = state.get("resources", {})
+        self.seconds_per_block = state.get("types", {}).get(resource)
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r") as readfile:
+                return json.load(readfile)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def estimate(self, job):
+        """
+        Expected plan seconds of a job: its own history, the per block average of its resource type otherwise.
+        """
+        return self.estimate_blocks(job["id"], import_block_count(job))
+
+    def estimate_blocks(self, resource_id, blocks):
+        """
+        Expected plan seconds of a resource with that many import blocks.
+        """
+        known = self.resources.get(resource_id.lower())
+        if known is not None:
+            return known
+        return (self.seconds_per_block or DEFAULT_SECONDS_PER_BLOCK) * blocks
+
+    def record(self, batch, seconds):
+        """
+        Record the duration of a successful plan, split over the jobs of the batch in proportion to their estimates.
+        """
+        estimates = [self.estimate(job) for job in batch]
+        total = sum(estimates) or len(batch)
+        blocks = sum(import_block_count(job) for job in batch)
+        with self._lock:
+            for job, estimate in zip(batch, estimates):
+                key = job["id"].lower()
+                self._measured[key] = _ewma(self.resources.get(key), seconds * estimate / total)
+                self.resources[key] = self._measured[key]
+            self.seconds_per_block = _ewma(self.seconds_per_block, seconds / blocks)
+
+    def eta(self, jobs_by_root, workers):
+        """
+        Estimated seconds to plan every root module, roots running longest first on the workers.
+        """
+        root_totals = sorted((sum(self.estimate(job) for job in jobs) for jobs in jobs_by_root.values()), reverse=True)
+        return makespan(root_totals, workers)
+
+    def save(self):
+        if not self._measured:
+            return
+        with self._lock:
+            # Merge into the latest state, another resource type may have saved since this run started
+            state = self._load()
+            state.setdefault("resources", {}).update(self._measured)
+            state.setdefault("types", {})[self.resource] = self.seconds_per_block
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(f"{self.state_file}.tmp", "w") as writefile:
+                json.dump(state, writefile, indent=2, sort_keys=True)
+            os.replace(f"{self.state_file}.tmp", self.state_file)
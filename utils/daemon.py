@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from loguru import logger
+
+JOB_HISTORY_LIMIT = 1000
+
+
+class ImportDaemon:
+    """
+    Long running import worker: jobs are queued over a local HTTP API and run by a bounded pool of threads.
+    Credentials, SDK clients, templates and the terraform plugin cache stay warm between jobs.
+    Jobs of different repos run at the same time, their terraform inits take turns (see Utilities.terraform_init).
+    """
+
+    def __init__(self, run_job, supported_resources, option_defaults, check_options=None, workers=2):
+        self.run_job = run_job
+        self.supported_resources = supported_resources
+        self.option_defaults = option_defaults
+        # Raises ValueError on invalid option values of a request
+        self.check_options = check_options
+        self.workers = workers
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._repo_locks = {}
+
+    def submit(self, payload):
+        """
+        Validate a job request and queue it. Raises ValueError on an invalid request.
+        """
+        for field in ["subscription_id", "resource", "local_repo_path"]:
+            if not payload.get(field):
+                raise ValueError(f"Missing required field: {field}")
+        if payload["resource"] not in self.supported_resources:
+            raise ValueError(f"Unsupported resource: {payload['resource']}. Supported: {self.supported_resources}")
+
+        unknown_fields = set(payload) - {"subscription_id", "resource", "local_repo_path", "tags"} - set(self.option_defaults)
+        if unknown_fields:
+            raise ValueError(f"Unknown fields: {sorted(unknown_fields)}. Supported options: {sorted(self.option_defaults)}")
+
+        options = dict(self.option_defaults)
+        options.update({key: payload[key] for key in self.option_defaults if key in payload})
+        if self.check_options:
+            self.check_options(options)
+
+        params = {
+            "subscription_id": payload["subscription_id"],
+            "resource": payload["resource"],
+            "local_repo_path": payload["local_repo_path"],
+            "filters": _tag_filters(payload.get("tags")),
+            "options": options,
+        }
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "params": params,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "exit_code": None,
+            "error": None,
+        }
+        with self._lock:
+            self.jobs[job["id"]] = job
+            self._prune_history()
+            snapshot = dict(job)
+        self.queue.put(job["id"])
+        logger.info(f"Queued job {job['id']}: {params['resource']} in {params['subscription_id']}")
+        return snapshot
+
+    def _update(self, job, **fields):
+        # Jobs are serialized by the API threads, only ever change them under the lock
+        with self._lock:
+            job.update(fields)
+
+    def _prune_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished_at"]]
+        for job_id in finished[: max(0, len(self.jobs) - JOB_HISTORY_LIMIT)]:
+            del self.jobs[job_id]
+
+    def _repo_lock(self, local_repo_path):
+        # Two plans in the same root module would fight over state and generated files
+        with self._lock:
+            return self._repo_locks.setdefault(os.path.abspath(local_repo_path), threading.Lock())
+
+    def _worker(self):
+        while True:
+            job_id = self.queue.get()
+            with self._lock:
+                job = self.jobs.get(job_id)
+            if job is None:
+                continue
+
+            with self._repo_lock(job["params"]["local_repo_path"]):
+                self._update(job, status="running", started_at=time.time())
+                with logger.contextualize(job_id=job_id):
+                    try:
+                        self.run_job(**job["params"])
+                        result = {"status": "succeeded", "exit_code": 0}
+                    except SystemExit as e:
+                        # Importers exit when there is nothing to import or the subscription is skipped
+                        exit_code = e.code if isinstance(e.code, int) else 1
+                        result = {"status": "succeeded" if exit_code == 0 else "exited", "exit_code": exit_code}
+                    except Exception as e:
+                        logger.exception(f"Job {job_id} failed")
+                        result = {"status": "failed", "error": str(e)}
+                self._update(job, finished_at=time.time(), **result)
+            logger.info(f"Job {job_id} {job['status']} in {job['finished_at'] - job['started_at']:.1f}s")
+
+    def status(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"status": "ok", "workers": self.workers, "jobs": counts}
+
+    def list_jobs(self):
+        with self._lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def serve(self, host="127.0.0.1", port=8080, socket_path=None):
+        """
+        Start the workers and serve the job API on a TCP port or a Unix socket until interrupted.
+        """
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+        handler = _make_handler(self)
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = _ThreadingUnixHTTPServer(socket_path, handler)
+            logger.info(f"Import daemon listening on unix socket {socket_path} with {self.workers} workers")
+        else:
+            server = ThreadingHTTPServer((host, port), handler)
+            logger.info(f"Import daemon listening on http://{host}:{port} with {self.workers} workers")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down import daemon")
+        finally:
+            server.server_close()
+            if socket_path and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def _tag_filters(tags):
+    """
+    Tag filters of a job request as [key, value] pairs, from a {key: value} object or a list of pairs.
+    Raises ValueError on anything else.
+    """
+    if not tags:
+        return []
+    if isinstance(tags, dict):
+        tags = list(tags.items())
+    if not isinstance(tags, list) or not all(isinstance(pair, (list, tuple)) and len(pair) == 2 and all(isinstance(part, str) for part in pair) for pair in tags):
+        raise ValueError('Invalid tags: expected {"key": "value"} or [["key", "value"], ...] with string keys and values')
+    return [list(pair) for pair in tags]
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _make_handler(daemon):
+    class JobAPIHandler(BaseHTTPRequestHandler):
+        """
+        GET /health, GET /jobs, GET /jobs/<id>, POST /jobs
+        """
+
+        def _send(self, code, body):
+            payload = json.dumps(body, default=str).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                return self._send(200, daemon.status())
+            if path == "/jobs":
+                return self._send(200, daemon.list_jobs())
+            if path.startswith("/jobs/"):
+                job = daemon.get_job(path[len("/jobs/"):])
+                if job is None:
+                    return self._send(404, {"error": "job not found"})
+                return self._send(200, job)
+            return self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                return self._send(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                job = daemon.submit(payload)
+            except (ValueError, TypeError, AttributeError) as e:
+                return self._send(400, {"error": str(e)})
+            return self._send(202, job)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.command} {self.path}")
+
+    return JobAPIHandler
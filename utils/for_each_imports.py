@@ -0,0 +1,143 @@
+import os
+import json
+from loguru import logger
+from .native_hcl import SCHEMAS, NATIVE_HEADER, match_targets, resource_values
+
+INVENTORY_FILE = "import-inventory.json"
+IMPORTS_FILE = "import-for-each.tf"
+CONFIG_FILE = "generated-for-each.tf"
+# Name of the for_each resource of every type, instances are keyed by the address names the registry hands out
+INVENTORY_RESOURCE_NAME = "inventory"
+
+
+def parse_inventory_file(path):
+    """
+    Addresses and imports (address -> Azure ID) of an inventory file, the same shape tf_index extracts from .tf files.
+    Every entry counts as <type>.<key> so the address registry never reuses a key.
+    """
+    with open(path, "r") as readfile:
+        inventory = json.load(readfile)
+
+    addresses = set()
+    imports = {}
+    for resource_type, entries in inventory.items():
+        addresses.add(f"{resource_type}.{INVENTORY_RESOURCE_NAME}")
+        for key, values in entries.items():
+            imports[f"{resource_type}.{key}"] = values["id"]
+    return addresses, imports
+
+
+def render_for_each_resource(resource_type):
+    """
+    Resource block creating one instance per inventory entry of resource_type, attributes read from the entry.
+    """
+    schema = SCHEMAS[resource_type]
+    lines = [
+        f'resource "{resource_type}" "{INVENTORY_RESOURCE_NAME}" {{',
+        f'  for_each = local.import_inventory["{resource_type}"]',
+        "",
+    ]
+    lines.extend(f"  {attribute} = each.value.{attribute}" for attribute, _ in schema["attributes"])
+    for block, _, attributes in schema["blocks"]:
+        lines.extend([
+            "",
+            f'  dynamic "{block}" {{',
+            f"    for_each = each.value.{block} == null ? [] : [each.value.{block}]",
+            "    content {",
+            *(f"      {attribute} = {block}.value.{attribute}" for attribute, _ in attributes),
+            "    }",
+            "  }",
+        ])
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def render_for_each_import(resource_type):
+    return "\n".join([
+        "import {",
+        f'  for_each = local.import_inventory["{resource_type}"]',
+        f"  to       = {resource_type}.{INVENTORY_RESOURCE_NAME}[each.key]",
+        "  id       = each.value.id",
+        "}",
+    ]) + "\n"
+
+
+class ImportInventory:
+    """
+    Inventory of the natively generated imports of a root module, written once as <root>/import-inventory.json
+    with one for_each import block and one for_each resource block per resource type, instead of
+    an import-<name>.tf and a generated-plan-import-<name>.tf file per resource.
+    Entries of earlier runs are kept.
+    """
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.path = os.path.join(root_path, INVENTORY_FILE)
+        self.inventory = {}
+        self.changed = False
+        if os.path.exists(self.path):
+            with open(self.path, "r") as readfile:
+                self.inventory = json.load(readfile)
+
+    def add(self, job, targets):
+        """
+        Add the import targets (address -> Azure ID) of a job. Returns False when they aren't all covered by a native mapping.
+        """
+        matched = match_targets(job.get("native"), targets)
+        if matched is None:
+            return False
+        try:
+            entries = [(resource_type, name, {"id": model.id, **resource_values(resource_type, model)}) for resource_type, name, model in matched]
+        except (AttributeError, TypeError, IndexError) as e:
+            logger.warning(f"Inventory entry generation failed for {job['name']}, falling back to terraform: {e}")
+            return False
+
+        for resource_type, name, values in entries:
+            self.inventory.setdefault(resource_type, {})[name] = values
+        self.changed = True
+        return True
+
+    def remove(self, targets):
+        """
+        Drop the entries of the import targets (address -> Azure ID) of a job.
+        """
+        for address in targets:
+            resource_type, name = address.split(".", 1)
+            entries = self.inventory.get(resource_type, {})
+            entries.pop(name, None)
+            if not entries:
+                self.inventory.pop(resource_type, None)
+        self.changed = True
+
+    def write(self):
+        if not self.changed:
+            return
+        self.changed = False
+        if not self.inventory:
+            for filename in [INVENTORY_FILE, IMPORTS_FILE, CONFIG_FILE]:
+                if os.path.exists(os.path.join(self.root_path, filename)):
+                    os.remove(os.path.join(self.root_path, filename))
+            return
+
+        with open(f"{self.path}.tmp", "w") as writefile:
+            json.dump(self.inventory, writefile, indent=2, sort_keys=True, default=str)
+        os.replace(f"{self.path}.tmp", self.path)
+
+        resource_types = sorted(self.inventory)
+        imports = [
+            "terraform {",
+            '  required_version = ">= 1.7.0"',
+            "}",
+            "",
+            "locals {",
+            f'  import_inventory = jsondecode(file("${{path.module}}/{INVENTORY_FILE}"))',
+            "}",
+            "",
+        ]
+        with open(os.path.join(self.root_path, IMPORTS_FILE), "w") as writefile:
+            writefile.write("\n".join(imports) + "\n" + "\n".join(render_for_each_import(resource_type) for resource_type in resource_types))
+        with open(os.path.join(self.root_path, CONFIG_FILE), "w") as writefile:
+            writefile.write(NATIVE_HEADER + "\n".join(render_for_each_resource(resource_type) for resource_type in resource_types))
+
+        entries = sum(len(entries) for entries in self.inventory.values())
+        logger.info(f"Wrote {entries} inventory imports of {len(resource_types)} resource types to {self.path}")
@@ -0,0 +1,213 @@
+import json
+import time
+import atexit
+import threading
+from urllib.parse import urlsplit
+from loguru import logger
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+RATELIMIT_HEADER_PREFIX = "x-ms-ratelimit-remaining"
+DEFAULT_REPORT_INTERVAL = 30
+ATTEMPTS_CONTEXT_KEY = "tf_import_attempts"
+
+
+def operation_of(method, url):
+    """
+    Operation and resource type of an ARM request, with names and IDs replaced by placeholders:
+    GET /subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/Microsoft.Network/networkInterfaces/{name}
+    """
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    template = []
+    resource_type = []
+    index = 0
+    while index < len(segments):
+        segment = segments[index]
+        if segment.lower() == "providers" and index + 1 < len(segments):
+            namespace = segments[index + 1]
+            template.extend([segment, namespace])
+            resource_type = [namespace]
+            index += 2
+            continue
+        template.append(segment)
+        if index + 1 < len(segments):
+            template.append("{subscriptionId}" if segment.lower() == "subscriptions" else "{resourceGroupName}" if segment.lower() == "resourcegroups" else "{name}")
+        if resource_type:
+            resource_type.append(segment)
+        index += 2
+    return f"{method.upper()} /{'/'.join(template)}", "/".join(resource_type) or "subscription"
+
+
+class _OperationStats:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+        self.count = 0
+        self.retries = 0
+        self.throttled = 0
+        self.statuses = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def as_dict(self):
+        buckets = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "resource_type": self.resource_type,
+            "count": self.count,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "statuses": self.statuses,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0,
+            "max_ms": round(self.max_ms, 1),
+            "latency_histogram": dict(zip(buckets, self.histogram)),
+        }
+
+
+class ApiMetrics:
+    """
+    Process wide ARM call metrics: calls, statuses, latency histogram, retries and throttling per operation,
+    and the lowest x-ms-ratelimit-remaining-* values seen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.operations = {}
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.ratelimit_remaining = {}
+
+    def record(self, method, url, status_code, elapsed_ms, attempts, headers):
+        operation, resource_type = operation_of(method, url)
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            stats = self.operations.setdefault(operation, _OperationStats(resource_type))
+            stats.count += 1
+            stats.retries += max(0, attempts - 1)
+            stats.throttled += 1 if status_code == 429 else 0
+            stats.statuses[str(status_code)] = stats.statuses.get(str(status_code), 0) + 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.histogram[bucket] += 1
+            self.histogram[bucket] += 1
+
+            for name, value in headers.items():
+                if not name.lower().startswith(RATELIMIT_HEADER_PREFIX):
+                    continue
+                # x-ms-ratelimit-remaining-resource looks like "Microsoft.Compute/HighCostGet3Min;139,Microsoft.Compute/HighCostGet30Min;699"
+                for entry in value.split(","):
+                    key, _, remaining = entry.strip().rpartition(";")
+                    key = f"{name.lower()}:{key}" if key else name.lower()
+                    try:
+                        remaining = int(remaining)
+                    except ValueError:
+                        continue
+                    self.ratelimit_remaining[key] = min(remaining, self.ratelimit_remaining.get(key, remaining))
+
+    def _percentile(self, share):
+        total = sum(self.histogram)
+        if not total:
+            return 0
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= share * total:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else LATENCY_BUCKETS_MS[-1]
+        return LATENCY_BUCKETS_MS[-1]
+
+    def summary_line(self):
+        with self._lock:
+            calls = sum(stats.count for stats in self.operations.values())
+            retries = sum(stats.retries for stats in self.operations.values())
+            throttled = sum(stats.throttled for stats in self.operations.values())
+            top = max(self.operations.items(), key=lambda item: item[1].count, default=None)
+            lowest = min(self.ratelimit_remaining.items(), key=lambda item: item[1], default=None)
+            p50, p95 = self._percentile(0.5), self._percentile(0.95)
+        rate = calls / max(time.time() - self.started, 1e-6)
+        line = f"ARM calls: {calls} ({rate:.1f}/s), p50 <={p50}ms, p95 <={p95}ms, {retries} retries, {throttled} throttled"
+        if top:
+            line += f", top: {top[0]} x{top[1].count}"
+        if lowest:
+            line += f", lowest remaining: {lowest[0]}={lowest[1]}"
+        return line
+
+    def snapshot(self):
+        with self._lock:
+            operations = {operation: stats.as_dict() for operation, stats in sorted(self.operations.items(), key=lambda item: item[1].count, reverse=True)}
+            ratelimit_remaining = dict(sorted(self.ratelimit_remaining.items()))
+        by_resource_type = {}
+        for stats in operations.values():
+            totals = by_resource_type.setdefault(stats["resource_type"], {"count": 0, "retries": 0, "throttled": 0})
+            for key in totals:
+                totals[key] += stats[key]
+        return {
+            "duration_s": round(time.time() - self.started, 1),
+            "calls": sum(stats["count"] for stats in operations.values()),
+            "operations": operations,
+            "resource_types": by_resource_type,
+            "ratelimit_remaining_min": ratelimit_remaining,
+        }
+
+    def write(self, path):
+        with open(path, "w") as writefile:
+            json.dump(self.snapshot(), writefile, indent=2)
+        logger.info(f"ARM call metrics written to {path}")
+
+
+METRICS = ApiMetrics()
+
+
+def pipeline_policies():
+    """
+    (per call, per retry) policies measuring every ARM call of a client: the per call one sees the final
+    response and the total latency, the per retry one counts the attempts made by the retry policy.
+    """
+    from azure.core.pipeline.policies import HTTPPolicy
+
+    class InstrumentationPolicy(HTTPPolicy):
+        def send(self, request):
+            request.context[ATTEMPTS_CONTEXT_KEY] = 0
+            start = time.perf_counter()
+            response = self.next.send(request)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            http_response = response.http_response
+            METRICS.record(request.http_request.method, request.http_request.url, http_response.status_code, elapsed_ms, request.context.get(ATTEMPTS_CONTEXT_KEY, 1), http_response.headers)
+            return response
+
+    class AttemptCountingPolicy(HTTPPolicy):
+        def send(self, request):
+            request.context[ATTEMPTS_CONTEXT_KEY] = request.context.get(ATTEMPTS_CONTEXT_KEY, 0) + 1
+            return self.next.send(request)
+
+    return InstrumentationPolicy(), AttemptCountingPolicy()
+
+
+def _report_periodically(interval):
+    while True:
+        time.sleep(interval)
+        if METRICS.operations:
+            logger.info(METRICS.summary_line())
+
+
+def configure(metrics_out=None, interval=DEFAULT_REPORT_INTERVAL):
+    """
+    Log a summary line every interval seconds and, at exit, the final summary and the full metrics as JSON to metrics_out.
+    """
+    if interval:
+        threading.Thread(target=_report_periodically, args=(interval,), daemon=True).start()
+
+    def _at_exit():
+        if METRICS.operations:
+            logger.info(METRICS.summary_line())
+        if metrics_out:
+            METRICS.write(metrics_out)
+
+    atexit.register(_at_exit)
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics-out", dest="metrics_out", help="Write ARM call metrics of the run to this JSON file", type=str, default=None)
+    parser.add_argument("--metrics-interval", dest="metrics_interval", help="Seconds between ARM call summary lines, 0 disables them", type=int, default=DEFAULT_REPORT_INTERVAL)
+
+
+def configure_from_args(args):
+    configure(metrics_out=args.metrics_out, interval=args.metrics_interval)
@@ -0,0 +1,109 @@
+import csv
+import sys
+import json
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+from .registry import get_importer
+from .utilities import Utilities
+from .tf_index import TerraformIndex
+from .cost_model import PlanCostModel
+
+REPORT_FIELDS = ["subscription_id", "subscription_name", "resource", "terraform_type", "count", "import_blocks", "projected_plan_seconds"]
+DEFAULT_INVENTORY_WORKERS = 8
+
+
+def _inventory(subscription_id, resource, local_repo_path, filters, tf_index):
+    """
+    Report rows of one resource type in one subscription: per terraform type, the discovered resources,
+    the import blocks an import would write for them and their projected plan time.
+    """
+    importer = get_importer(resource)(subscription_id=subscription_id, resource=resource, local_repo_path=local_repo_path, filters=filters)
+    if Utilities.skip_resources_from_settings(importer.subscription_name, resource):
+        logger.info(f"Skipping {resource} of subscription {importer.subscription_name}, see utils/settings.py")
+        return []
+
+    cost_model = PlanCostModel(local_repo_path, resource)
+    rows = {}
+    for detail in importer.discover():
+        resources = importer.inventory_resources(detail)
+        # Resources already imported in the repo get no import block
+        blocks = [(terraform_type, imported and not tf_index.is_covered(resource_id)) for terraform_type, resource_id, imported in resources]
+        block_count = sum(1 for _, imported in blocks if imported)
+        seconds = cost_model.estimate_blocks(resources[0][1], block_count) if block_count else 0.0
+        for terraform_type, imported in blocks:
+            row = rows.setdefault(terraform_type, {"count": 0, "import_blocks": 0, "projected_plan_seconds": 0.0})
+            row["count"] += 1
+            if imported:
+                row["import_blocks"] += 1
+                row["projected_plan_seconds"] += seconds / block_count
+
+    return [
+        {"subscription_id": subscription_id, "subscription_name": importer.subscription_name, "resource": resource, "terraform_type": terraform_type, **row, "projected_plan_seconds": round(row["projected_plan_seconds"], 1)}
+        for terraform_type, row in sorted(rows.items())
+    ]
+
+
+class _ReportWriter:
+    def __init__(self, output, output_format):
+        self.output = output
+        self.output_format = output_format
+        if output_format == "csv":
+            self.csv_writer = csv.DictWriter(output, fieldnames=REPORT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, row):
+        if self.output_format == "csv":
+            self.csv_writer.writerow(row)
+        else:
+            self.output.write(json.dumps(row) + "\n")
+        self.output.flush()
+
+
+def run_inventory(subscription_ids, resources, local_repo_path=None, filters=None, output_format="csv", output_path=None, workers=DEFAULT_INVENTORY_WORKERS):
+    """
+    Discover resources like an import would, every (subscription, resource type) concurrently, without writing any
+    terraform. Rows are streamed as CSV or JSON lines as soon as a listing completes, only per type totals are kept.
+    Returns the number of listings that failed.
+    """
+    # Without a repo there is nothing already imported and no recorded plan timings, estimates use the defaults
+    scratch_dir = None if local_repo_path else tempfile.TemporaryDirectory(prefix="tf-import-inventory-")
+    local_repo_path = local_repo_path or scratch_dir.name
+    tf_index = TerraformIndex(local_repo_path)
+    totals = {}
+    failed = 0
+    start = time.perf_counter()
+
+    output = open(output_path, "w", newline="") if output_path else sys.stdout
+    try:
+        writer = _ReportWriter(output, output_format)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_inventory, subscription_id, resource, local_repo_path, filters, tf_index): (subscription_id, resource)
+                for subscription_id in subscription_ids for resource in resources
+            }
+            for future in as_completed(futures):
+                subscription_id, resource = futures[future]
+                try:
+                    rows = future.result()
+                except (Exception, SystemExit) as e:  # importers exit on client errors
+                    logger.error(f"Inventory of {resource} in subscription {subscription_id} failed: {e!r}")
+                    failed += 1
+                    continue
+                for row in rows:
+                    writer.write(row)
+                    total = totals.setdefault(row["terraform_type"], [0, 0, 0.0])
+                    total[0] += row["count"]
+                    total[1] += row["import_blocks"]
+                    total[2] += row["projected_plan_seconds"]
+    finally:
+        if output_path:
+            output.close()
+        if scratch_dir:
+            scratch_dir.cleanup()
+
+    for terraform_type, (count, import_blocks, seconds) in sorted(totals.items()):
+        logger.info(f"{terraform_type}: {count} found, {import_blocks} import blocks, ~{seconds:.0f}s of plans")
+    logger.info(f"Inventory of {len(subscription_ids)} subscriptions done in {time.perf_counter() - start:.1f}s: {sum(total[1] for total in totals.values())} import blocks, ~{sum(total[2] for total in totals.values()):.0f}s of plans, {failed} listings failed")
+    return failed
@@ -0,0 +1,148 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import atexit
+import random
+import threading
+from collections import OrderedDict
+from loguru import logger
+
+DEFAULT_MAX_MESSAGE_LENGTH = 4000
+# loguru's default format, messages are truncated on the console only
+CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+# Open per-resource log files kept at a time, the least recently used one is closed first
+MAX_OPEN_LOG_FILES = 64
+
+
+def new_run_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _truncation_note(message, max_length):
+    """
+    What replaces the end of a message longer than max_length, None when it's kept whole.
+    """
+    if not max_length or len(message) <= max_length:
+        return None
+    return f"... [{len(message) - max_length} chars truncated]"
+
+
+def _console_format(max_length):
+    """
+    Console format cutting messages at max_length with a precision in the format, the record itself stays whole
+    for the per-resource files.
+    """
+    def console_format(record):
+        note = _truncation_note(record["message"], max_length)
+        if note is None:
+            return f"{CONSOLE_FORMAT}\n{{exception}}"
+        return f"{CONSOLE_FORMAT.replace('{message}', f'{{message:.{max_length}}}{note}')}\n{{exception}}"
+    return console_format
+
+
+def _console_json_sink(max_length):
+    """
+    JSON lines console sink, cutting the record message at max_length like the text of the line.
+    """
+    def sink(message):
+        note = _truncation_note(message.record["message"], max_length)
+        if note is not None:
+            payload = json.loads(message)
+            payload["record"]["message"] = f"{message.record['message'][:max_length]}{note}"
+            message = f"{json.dumps(payload, ensure_ascii=False)}\n"
+        sys.stderr.write(message)
+    return sink
+
+
+def _sampling_filter(sample_rate):
+    """
+    Keep a sample_rate share of DEBUG and INFO records, warnings and errors are always kept.
+    """
+    def log_filter(record):
+        if sample_rate >= 1 or record["level"].no >= logger.level("WARNING").no:
+            return True
+        return random.random() < sample_rate
+    return log_filter
+
+
+class ResourceFileSink:
+    """
+    Loguru sink writing every record to <log_dir>/<run_id>/<resource>.log after the resource_id bound to it,
+    records without a resource go to run.log.
+    """
+
+    def __init__(self, log_dir, run_id):
+        self.run_dir = os.path.join(log_dir, run_id)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_name(resource_id):
+        if not resource_id:
+            return "run.log"
+        # Drop the /subscriptions/<id>/resourceGroups prefix, the rest is unique within a subscription
+        parts = resource_id.strip("/").split("/")
+        return f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', '/'.join(parts[3:] or parts)).lower()}.log"
+
+    def _file(self, name):
+        if name in self._files:
+            self._files.move_to_end(name)
+            return self._files[name]
+        if len(self._files) >= MAX_OPEN_LOG_FILES:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        self._files[name] = open(os.path.join(self.run_dir, name), "a")
+        return self._files[name]
+
+    def write(self, message):
+        name = self.file_name(message.record["extra"].get("resource_id"))
+        with self._lock:
+            log_file = self._file(name)
+            log_file.write(message)
+            log_file.flush()
+
+    def close(self):
+        with self._lock:
+            for log_file in self._files.values():
+                log_file.close()
+            self._files.clear()
+
+
+def add_logging_arguments(parser):
+    parser.add_argument("--log-level", dest="log_level", help="Console log level", type=str, default="INFO")
+    parser.add_argument("--log-json", dest="log_json", help="Write logs as JSON lines", action="store_true")
+    parser.add_argument("--log-dir", dest="log_dir", help="Also write DEBUG logs to one file per resource under <log dir>/<run id>", type=str, default=None)
+    parser.add_argument("--log-max-length", dest="log_max_length", help="Truncate console log messages longer than this, 0 keeps them whole", type=int, default=DEFAULT_MAX_MESSAGE_LENGTH)
+    parser.add_argument("--log-sample-rate", dest="log_sample_rate", help="Share of DEBUG/INFO console records kept, warnings and errors are always kept", type=float, default=1.0)
+
+
+def setup_logging(level="INFO", json_logs=False, log_dir=None, max_message_length=DEFAULT_MAX_MESSAGE_LENGTH, sample_rate=1.0, run_id=None):
+    """
+    Replace the default synchronous stderr handler: records are queued and written by a background thread,
+    as JSON lines if json_logs is set, and to per-resource files under log_dir.
+    Every record carries the run_id and the resource_id bound with logger.bind / logger.contextualize.
+    """
+    run_id = run_id or new_run_id()
+    logger.remove()
+    logger.configure(extra={"run_id": run_id, "resource_id": None})
+    console_sink = _console_json_sink(max_message_length) if json_logs else sys.stderr
+    logger.add(console_sink, level=level.upper(), serialize=json_logs, enqueue=True, filter=_sampling_filter(sample_rate), format=_console_format(max_message_length))
+
+    if log_dir:
+        file_sink = ResourceFileSink(log_dir, run_id)
+        file_format = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[run_id]} | {name}:{function}:{line} - {message}"
+        logger.add(file_sink.write, level="DEBUG", serialize=json_logs, enqueue=True, format=file_format)
+        atexit.register(file_sink.close)
+        logger.info(f"Writing per-resource logs to {file_sink.run_dir}")
+
+    # Drain the queue before exiting, sys.exit is the normal way out of an import
+    atexit.register(logger.remove)
+    return run_id
+
+
+def setup_logging_from_args(args):
+    return setup_logging(level=args.log_level, json_logs=args.log_json, log_dir=args.log_dir, max_message_length=args.log_max_length, sample_rate=args.log_sample_rate)
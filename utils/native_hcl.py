@@ -0,0 +1,289 @@
+import json
+from loguru import logger
+
+NATIVE_HEADER = "# __generated__ natively from the Azure SDK models\n# Please review these resources and move them into your main configuration files.\n\n"
+
+# Terraform sku_name prefix of the flexible server tiers
+FLEXIBLE_SKU_TIERS = {"Burstable": "B", "GeneralPurpose": "GP", "MemoryOptimized": "MO"}
+
+
+def _get(model, path):
+    """
+    Value of a dotted attribute path of an SDK model, None if any part is missing. SDK enums are returned as their value.
+    """
+    value = model
+    for attribute in path.split("."):
+        value = getattr(value, attribute, None)
+        if value is None:
+            return None
+    return getattr(value, "value", value)
+
+
+def _enabled(path):
+    """
+    Getter turning an "Enabled" / "Disabled" model value into a bool.
+    """
+    def getter(model):
+        value = _get(model, path)
+        return None if value is None else value.lower() == "enabled"
+    return getter
+
+
+def _resource_group(model):
+    return model.id.split("/")[4]
+
+
+def _server_name(model):
+    return model.id.split("/")[8]
+
+
+def _server_id(model):
+    return "/".join(model.id.split("/")[:9])
+
+
+def _flexible_sku(model):
+    tier, name = _get(model, "sku.tier"), _get(model, "sku.name")
+    if tier is None or name is None:
+        return None
+    return f"{FLEXIBLE_SKU_TIERS.get(tier, tier)}_{name}"
+
+
+def _mssql_sku(model):
+    # The service objective (GP_Gen5_2, S0, ElasticPool...), sku.name only holds its family (GP_Gen5, Standard)
+    return _get(model, "current_service_objective_name") or _get(model, "requested_service_objective_name")
+
+
+def _storage_mb(model):
+    size_gb = _get(model, "storage.storage_size_gb")
+    return size_gb * 1024 if size_gb else None
+
+
+def _replication_type(model):
+    sku_name = _get(model, "sku.name")
+    return sku_name.split("_", 1)[1] if sku_name and "_" in sku_name else None
+
+
+# Per resource type schema mapping: (attribute, model path or getter) and nested blocks as (block, [(attribute, path or getter)]).
+# Attributes resolving to None are left out, like the cleanup does for terraform generated config.
+SCHEMAS = {
+    "azurerm_storage_account": {
+        "attributes": [
+            ("name", "name"),
+            ("resource_group_name", _resource_group),
+            ("location", "location"),
+            ("account_kind", "kind"),
+            ("account_tier", "sku.tier"),
+            ("account_replication_type", _replication_type),
+            ("access_tier", "access_tier"),
+            ("enable_https_traffic_only", "enable_https_traffic_only"),
+            ("min_tls_version", "minimum_tls_version"),
+            ("allow_nested_items_to_be_public", "allow_blob_public_access"),
+            ("shared_access_key_enabled", "allow_shared_key_access"),
+            ("public_network_access_enabled", _enabled("public_network_access")),
+            ("cross_tenant_replication_enabled", "allow_cross_tenant_replication"),
+            ("default_to_oauth_authentication", "default_to_o_auth_authentication"),
+            ("is_hns_enabled", "is_hns_enabled"),
+            ("nfsv3_enabled", "enable_nfs_v3"),
+            ("sftp_enabled", "is_sftp_enabled"),
+            ("infrastructure_encryption_enabled", "encryption.require_infrastructure_encryption"),
+            ("tags", "tags"),
+        ],
+        "blocks": [],
+    },
+    "azurerm_mssql_server": {
+        "attributes": [
+            ("name", "name"),
+            ("resource_group_name", _resource_group),
+            ("location", "location"),
+            ("version", "version"),
+            ("minimum_tls_version", "minimal_tls_version"),
+            ("public_network_access_enabled", _enabled("public_network_access")),
+            ("outbound_network_restriction_enabled", _enabled("restrict_outbound_network_access")),
+            ("primary_user_assigned_identity_id", "primary_user_assigned_identity_id"),
+            ("tags", "tags"),
+        ],
+        "blocks": [
+            ("azuread_administrator", "administrators", [
+                ("login_username", "login"),
+                ("object_id", "sid"),
+                ("tenant_id", "tenant_id"),
+                ("azuread_authentication_only", "azure_ad_only_authentication"),
+            ]),
+        ],
+    },
+    "azurerm_mssql_database": {
+        "attributes": [
+            ("name", "name"),
+            ("server_id", _server_id),
+            ("collation", "collation"),
+            ("sku_name", _mssql_sku),
+            ("license_type", "license_type"),
+            ("zone_redundant", "zone_redundant"),
+            ("read_scale", _enabled("read_scale")),
+            ("storage_account_type", "requested_backup_storage_redundancy"),
+            ("elastic_pool_id", "elastic_pool_id"),
+            ("tags", "tags"),
+        ],
+        "blocks": [],
+    },
+    "azurerm_mysql_flexible_server": {
+        "attributes": [
+            ("name", "name"),
+            ("resource_group_name", _resource_group),
+            ("location", "location"),
+            ("version", "version"),
+            ("sku_name", _flexible_sku),
+            ("administrator_login", "administrator_login"),
+            ("zone", "availability_zone"),
+            ("backup_retention_days", "backup.backup_retention_days"),
+            ("geo_redundant_backup_enabled", _enabled("backup.geo_redundant_backup")),
+            ("delegated_subnet_id", "network.delegated_subnet_resource_id"),
+            ("private_dns_zone_id", "network.private_dns_zone_resource_id"),
+            ("tags", "tags"),
+        ],
+        "blocks": [
+            ("storage", "storage", [
+                ("size_gb", "storage_size_gb"),
+                ("iops", "iops"),
+                ("auto_grow_enabled", _enabled("auto_grow")),
+                ("io_scaling_enabled", _enabled("auto_io_scaling")),
+            ]),
+        ],
+    },
+    "azurerm_mysql_flexible_database": {
+        "attributes": [
+            ("name", "name"),
+            ("resource_group_name", _resource_group),
+            ("server_name", _server_name),
+            ("charset", "charset"),
+            ("collation", "collation"),
+        ],
+        "blocks": [],
+    },
+    "azurerm_postgresql_flexible_server": {
+        "attributes": [
+            ("name", "name"),
+            ("resource_group_name", _resource_group),
+            ("location", "location"),
+            ("version", "version"),
+            ("sku_name", _flexible_sku),
+            ("administrator_login", "administrator_login"),
+            ("zone", "availability_zone"),
+            ("storage_mb", _storage_mb),
+            ("auto_grow_enabled", _enabled("storage.auto_grow")),
+            ("backup_retention_days", "backup.backup_retention_days"),
+            ("geo_redundant_backup_enabled", _enabled("backup.geo_redundant_backup")),
+            ("delegated_subnet_id", "network.delegated_subnet_resource_id"),
+            ("private_dns_zone_id", "network.private_dns_zone_arm_resource_id"),
+            ("public_network_access_enabled", _enabled("network.public_network_access")),
+            ("tags", "tags"),
+        ],
+        "blocks": [],
+    },
+    "azurerm_postgresql_flexible_server_database": {
+        "attributes": [
+            ("name", "name"),
+            ("server_id", _server_id),
+            ("charset", "charset"),
+            ("collation", "collation"),
+        ],
+        "blocks": [],
+    },
+}
+
+
+def supports(resource_type):
+    return resource_type in SCHEMAS
+
+
+def hcl_value(value):
+    """
+    HCL literal of a python value.
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(hcl_value(item) for item in value)}]"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        entries = "\n".join(f"    {json.dumps(str(key))} = {hcl_value(item)}" for key, item in sorted(value.items()))
+        return f"{{\n{entries}\n  }}"
+    # json string escaping is valid HCL, only template sequences need escaping on top
+    return json.dumps(str(value)).replace("${", "$${").replace("%{", "%%{")
+
+
+def _resolve(model, source):
+    value = source(model) if callable(source) else _get(model, source)
+    # SDK enums render as their value
+    return getattr(value, "value", value)
+
+
+def resource_values(resource_type, model):
+    """
+    Attribute values of a resource from its SDK model, nested blocks as dicts. Missing values are None.
+    """
+    schema = SCHEMAS[resource_type]
+    values = {attribute: _resolve(model, source) for attribute, source in schema["attributes"]}
+    for block, path, attributes in schema["blocks"]:
+        nested = _get(model, path)
+        block_values = {attribute: _resolve(nested, source) for attribute, source in attributes} if nested is not None else {}
+        values[block] = block_values if any(value is not None for value in block_values.values()) else None
+    return values
+
+
+def render_resource(resource_type, name, model):
+    """
+    HCL of a single resource block from its SDK model.
+    """
+    values = resource_values(resource_type, model)
+    lines = [f'# __generated__ natively from "{model.id}"', f'resource "{resource_type}" "{name}" {{']
+    for attribute, _ in SCHEMAS[resource_type]["attributes"]:
+        if values[attribute] is not None:
+            lines.append(f"  {attribute} = {hcl_value(values[attribute])}")
+
+    for block, _, _ in SCHEMAS[resource_type]["blocks"]:
+        block_values = values[block]
+        if block_values is None:
+            continue
+        lines.append(f"  {block} {{")
+        lines.extend(f"    {attribute} = {hcl_value(value)}" for attribute, value in block_values.items() if value is not None)
+        lines.append("  }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def match_targets(native_resources, targets):
+    """
+    (resource type, name, SDK model) of every import target (address -> Azure ID), SDK models matched by ID.
+    Returns None when a target has no native mapping.
+    """
+    by_id = {model.id.lower(): (resource_type, model) for resource_type, model in native_resources or []}
+    matched = []
+    for address, resource_id in targets.items():
+        resource_type, name = address.split(".", 1)
+        native = by_id.get(resource_id.lower())
+        if native is None or native[0] != resource_type or not supports(resource_type):
+            return None
+        matched.append((resource_type, name, native[1]))
+    return matched
+
+
+def generate_config(native_resources, targets):
+    """
+    Config of every import target (address -> Azure ID), from (resource type, SDK model) tuples matched by ID.
+    Returns None when a target has no native mapping, the job then goes through terraform plan instead.
+    """
+    matched = match_targets(native_resources, targets)
+    if matched is None:
+        return None
+    blocks = []
+    for resource_type, name, model in matched:
+        try:
+            blocks.append(render_resource(resource_type, name, model))
+        except (AttributeError, TypeError, IndexError) as e:
+            logger.warning(f"Native config generation failed for {resource_type}.{name}, falling back to terraform: {e}")
+            return None
+    return NATIVE_HEADER + "\n".join(blocks)
@@ -0,0 +1,110 @@
+import os
+import re
+import json
+import threading
+from loguru import logger
+from .settings import STATE_DIR, TF_PARALLELISM
+
+MIN_PARALLELISM = 1
+MAX_PARALLELISM = 64
+PARALLELISM_STEP = 2
+# A clean plan taking this many times the usual seconds per import block counts as silent throttling:
+# the provider retries 429s on its own and only logs them with TF_LOG set
+DURATION_REGRESSION_FACTOR = 1.5
+# Weight of the latest measurement in the seconds per import block average
+EWMA_ALPHA = 0.3
+
+# ARM throttling errors as reported by the azurerm provider in the plan diagnostics: the status code of the response
+# ("StatusCode=429", "unexpected status 429") or the ARM error code ("TooManyRequests", "SubscriptionRequestsThrottled")
+THROTTLING_PATTERN = re.compile(r"StatusCode=429\b|unexpected status 429\b|\bCode=\W?(TooManyRequests|\w*RequestsThrottled)\b|\b(TooManyRequests|\w*RequestsThrottled):")
+
+
+def batch_bucket(batch_size):
+    """
+    Batch sizes sharing a tuned value: the next power of two.
+    """
+    return str(1 << max(0, batch_size - 1).bit_length())
+
+
+class ParallelismController:
+    """
+    Tune terraform plan -parallelism per resource type and batch size: grow it while plans stay clean, halve it when
+    ARM throttles or when the plan duration per import block regresses.
+    The last values are saved under the repo state dir and used as the starting point of the next run.
+    """
+
+    def __init__(self, local_repo_path, resource, fixed_value=None):
+        self.state_file = os.path.join(local_repo_path, STATE_DIR, "parallelism.json")
+        self.resource = resource
+        self.fixed_value = fixed_value
+        self._lock = threading.Lock()
+
+        saved = self._load().get(resource)
+        # Runs before batch size tuning saved a single value per resource type, it seeds every batch size
+        self.initial_value = fixed_value or (saved if isinstance(saved, int) else None) or TF_PARALLELISM.get(resource, TF_PARALLELISM["default"])
+        self.buckets = saved if isinstance(saved, dict) else {}
+        logger.info(f"Using terraform plan -parallelism={self.initial_value} for {resource}" + (f", tuned per batch size: {self._values()}" if self.buckets and not fixed_value else ""))
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r") as readfile:
+                return json.load(readfile)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        state = self._load()
+        state[self.resource] = self.buckets
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file, "w") as writefile:
+            json.dump(state, writefile, indent=2, sort_keys=True)
+
+    def _values(self):
+        return {bucket: tuned["parallelism"] for bucket, tuned in sorted(self.buckets.items(), key=lambda item: int(item[0]))}
+
+    def _bucket(self, batch_size):
+        bucket = batch_bucket(batch_size)
+        if bucket not in self.buckets:
+            # A batch size not planned yet starts from the closest one that was
+            closest = min(self.buckets, key=lambda known: abs(int(known).bit_length() - int(bucket).bit_length()), default=None)
+            parallelism = self.buckets[closest]["parallelism"] if closest else self.initial_value
+            self.buckets[bucket] = {"parallelism": parallelism, "seconds_per_block": None}
+        return self.buckets[bucket]
+
+    def value(self, batch_size):
+        """
+        -parallelism of a plan of batch_size jobs.
+        """
+        if self.fixed_value:
+            return self.fixed_value
+        with self._lock:
+            return self._bucket(batch_size)["parallelism"]
+
+    def record(self, stderr, returncode, batch_size, seconds=None, blocks=None):
+        """
+        Adjust the parallelism of the batch size from a plan run with its current value: its stderr, where terraform
+        writes its error diagnostics, exit code and, for a clean plan, its duration over that many import blocks.
+        """
+        if self.fixed_value:
+            return
+
+        with self._lock:
+            tuned = self._bucket(batch_size)
+            previous_value = tuned["parallelism"]
+            seconds_per_block = seconds / blocks if returncode == 0 and seconds and blocks else None
+            usual = tuned["seconds_per_block"]
+
+            if THROTTLING_PATTERN.search(stderr):
+                tuned["parallelism"] = max(MIN_PARALLELISM, previous_value // 2)
+                logger.warning(f"ARM throttling detected, lowering -parallelism for {self.resource} batches of {batch_size} from {previous_value} to {tuned['parallelism']}")
+            elif seconds_per_block and usual and seconds_per_block > usual * DURATION_REGRESSION_FACTOR:
+                tuned["parallelism"] = max(MIN_PARALLELISM, previous_value // 2)
+                logger.warning(f"Plan took {seconds_per_block:.1f}s per import against {usual:.1f}s usually, lowering -parallelism for {self.resource} batches of {batch_size} from {previous_value} to {tuned['parallelism']}")
+            elif returncode == 0:
+                tuned["parallelism"] = min(MAX_PARALLELISM, previous_value + PARALLELISM_STEP)
+            else:
+                return
+
+            if seconds_per_block:
+                tuned["seconds_per_block"] = seconds_per_block if usual is None else EWMA_ALPHA * seconds_per_block + (1 - EWMA_ALPHA) * usual
+            self._save()
@@ -0,0 +1,451 @@
+import os
+import re
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from .utilities import Utilities
+from .cleanup import cleanup_tf_plan_file
+from .tf_index import IMPORT_BLOCK, IMPORT_TO, IMPORT_ID
+from .parallelism import ParallelismController
+from .config_cache import ConfigCache
+from .native_hcl import generate_config
+from .for_each_imports import ImportInventory, INVENTORY_RESOURCE_NAME
+from .cost_model import PlanCostModel, import_block_count
+from .watchdog import RunDeadlineExceeded, check_deadline
+from .settings import STATE_DIR, TERRAFORM_TIMEOUTS, PLAN_TIMEOUT_PER_IMPORT, PLAN_TIMEOUT_PER_RESOURCE
+
+# Batches start small, double after every clean plan and halve on failure
+INITIAL_BATCH_SIZE = 4
+MAX_BATCH_SIZE = 32
+
+GENERATED_HEADER = "# __generated__ by Terraform\n# Please review these resources and move them into your main configuration files.\n\n"
+GENERATED_RESOURCE = re.compile(r'^resource\s+"([^"]+)"\s+"([^"]+)"')
+
+
+def restore_imported_files(root_path):
+    """
+    Rename the import-*.tf.imported files of a root module back to .tf once all plans are done.
+    """
+    for filename in os.listdir(root_path):
+        if filename.endswith(".imported"):
+            new_filename = filename.replace(".imported", "")
+            old_file = os.path.join(root_path, filename)
+            new_file = os.path.join(root_path, new_filename)
+            os.rename(old_file, new_file)
+
+
+def import_addresses(rendered_template):
+    """
+    Terraform addresses targeted by the import blocks of a rendered template.
+    """
+    addresses = []
+    for block in IMPORT_BLOCK.finditer(rendered_template):
+        to_match = IMPORT_TO.search(block.group(1))
+        if to_match:
+            addresses.append(to_match.group(1))
+    return addresses
+
+
+def import_targets(rendered_template):
+    """
+    Terraform address -> Azure ID of the import blocks of a rendered template.
+    """
+    targets = {}
+    for block in IMPORT_BLOCK.finditer(rendered_template):
+        to_match = IMPORT_TO.search(block.group(1))
+        id_match = IMPORT_ID.search(block.group(1))
+        if to_match and id_match:
+            targets[to_match.group(1)] = id_match.group(1)
+    return targets
+
+
+def root_plan_timeout(tf_index, root_path, plan_timeout=None):
+    """
+    Timeout of a plan of a whole root module: --plan-timeout when set, otherwise the base plan timeout or a budget
+    per resource and import block the root module declares, whichever is longer.
+    """
+    declared = len(tf_index.addresses.get(os.path.normpath(root_path), ()))
+    return plan_timeout or max(TERRAFORM_TIMEOUTS["plan"], PLAN_TIMEOUT_PER_RESOURCE * declared)
+
+
+def split_generated_file(generated_file, job_by_address, root_path):
+    """
+    Split the config generated for a whole batch into one generated-plan-import-<name>.tf file per job.
+    Returns the paths of the files written.
+    """
+    blocks_by_job = {}
+    leftover = []
+    current = None
+    pending_comments = []
+
+    with open(generated_file, "r") as readfile:
+        for line in readfile:
+            if current is None:
+                resource_match = GENERATED_RESOURCE.match(line)
+                if resource_match:
+                    job_name = job_by_address.get(f"{resource_match.group(1)}.{resource_match.group(2)}")
+                    current = blocks_by_job.setdefault(job_name, []) if job_name else leftover
+                    current.extend(pending_comments)
+                    current.append(line)
+                    pending_comments = []
+                elif line.startswith("# __generated__ by Terraform from"):
+                    pending_comments = [line]
+                continue
+
+            current.append(line)
+            if line.rstrip("\n") == "}":
+                current.append("\n")
+                current = None
+
+    written = []
+    for job_name, lines in blocks_by_job.items():
+        output_file = f"{root_path}/generated-plan-import-{job_name}.tf"
+        with open(output_file, "w") as writefile:
+            writefile.write(GENERATED_HEADER)
+            writefile.writelines(lines)
+        written.append(output_file)
+
+    os.remove(generated_file)
+    if leftover:
+        # Resources terraform generated without a matching import block of the batch, keep them for review
+        with open(generated_file, "w") as writefile:
+            writefile.write(GENERATED_HEADER)
+            writefile.writelines(leftover)
+        logger.warning(f"Generated resources not matching any import of the batch kept in {generated_file}")
+        written.append(generated_file)
+    return written
+
+
+class BatchPlanner:
+    """
+    Plan the imports of a root module in adaptively sized batches.
+    A failing batch is bisected until the offending resources are isolated and quarantined,
+    the batch size then grows again after every clean plan.
+    """
+
+    def __init__(self, root_path, parallelism, config_cache=None, max_batch_size=MAX_BATCH_SIZE, native_hcl=False, for_each_imports=False, cost_model=None, plan_timeout=None):
+        self.root_path = root_path
+        self.plan_timeout = plan_timeout
+        self.parallelism = parallelism
+        self.config_cache = config_cache
+        self.cost_model = cost_model
+        self.remaining_estimate = 0.0
+        self.native_hcl = native_hcl
+        self.inventory = ImportInventory(root_path) if for_each_imports else None
+        # Resource types of the jobs the inventory didn't take, they keep per-resource import files
+        self.inventory_fallback_types = set()
+        self.native_count = 0
+        self.native_jobs = []
+        self.inventory_jobs = []
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_size = min(INITIAL_BATCH_SIZE, self.max_batch_size)
+        self.batch_count = 0
+        self.succeeded = []
+        self.quarantined = []
+        self.pending = []
+
+    def _write_import_files(self, batch):
+        for job in batch:
+            with open(f"{self.root_path}/import-{job['name']}.tf", "w") as f:
+                f.write(job["rendered_template"])
+
+    def _plan_batch(self, batch):
+        """
+        Run a single plan generating the config of every job of the batch. Returns True if it succeeded.
+        """
+        # The terraform output of a single resource plan goes to that resource's log file
+        with logger.contextualize(resource_id=batch[0]["id"] if len(batch) == 1 else None):
+            return self._run_batch_plan(batch)
+
+    def _run_batch_plan(self, batch):
+        self.batch_count += 1
+        if len(batch) == 1:
+            generated_name = f"generated-plan-import-{batch[0]['name']}.tf"
+        else:
+            generated_name = f"generated-plan-batch-{self.batch_count}.tf"
+        generated_file = f"{self.root_path}/{generated_name}"
+
+        self._write_import_files(batch)
+        eta = f", ~{self.remaining_estimate:.0f}s of plans left" if self.cost_model else ""
+        logger.info(f"Planning batch of {len(batch)} in {self.root_path}{eta}: {[job['name'] for job in batch]}")
+        def _remove_generated_file():
+            if os.path.exists(generated_file):
+                os.remove(generated_file)
+
+        # Size aware: a batch gets the base plan timeout or a fixed budget per import block, whichever is longer
+        blocks = sum(import_block_count(job) for job in batch)
+        timeout = self.plan_timeout or max(TERRAFORM_TIMEOUTS["plan"], PLAN_TIMEOUT_PER_IMPORT * blocks)
+        start = time.perf_counter()
+        try:
+            stdout, stderr, returncode = Utilities.run_terraform_cmd(["terraform", f"-chdir={self.root_path}", "plan", f"-parallelism={self.parallelism.value(len(batch))}", f"-generate-config-out={generated_name}"], timeout=timeout, before_retry=_remove_generated_file)
+        except RunDeadlineExceeded:
+            # Leave the root module as it was before this batch
+            for job in batch:
+                os.remove(f"{self.root_path}/import-{job['name']}.tf")
+            _remove_generated_file()
+            raise
+        seconds = time.perf_counter() - start
+        self.parallelism.record(stderr, returncode, len(batch), seconds, blocks)
+        if returncode == 0 and self.cost_model:
+            self.cost_model.record(batch, seconds)
+
+        if returncode != 0 or not os.path.exists(generated_file):
+            for job in batch:
+                os.remove(f"{self.root_path}/import-{job['name']}.tf")
+            if os.path.exists(generated_file):
+                os.remove(generated_file)
+            return False
+
+        for job in batch:
+            output_file_path = f"{self.root_path}/import-{job['name']}.tf"
+            os.rename(output_file_path, f"{output_file_path}.imported")
+
+        if len(batch) == 1:
+            generated_files = [generated_file]
+        else:
+            job_by_address = {address: job["name"] for job in batch for address in import_addresses(job["rendered_template"])}
+            generated_files = split_generated_file(generated_file, job_by_address, self.root_path)
+
+        for tf_file in generated_files:
+            cleanup_tf_plan_file(input_tf_file=tf_file)
+        if self.config_cache:
+            for job in batch:
+                self.config_cache.put(job, f"{self.root_path}/generated-plan-import-{job['name']}.tf")
+        self.succeeded.extend(batch)
+        return True
+
+    def _reuse_cached(self, job):
+        """
+        Write the import block and the cached config of a job without planning it. Returns False on a cache miss.
+        """
+        cached_config = self.config_cache.get(job) if self.config_cache else None
+        if cached_config is None:
+            return False
+
+        with open(f"{self.root_path}/import-{job['name']}.tf.imported", "w") as f:
+            f.write(job["rendered_template"])
+        with open(f"{self.root_path}/generated-plan-import-{job['name']}.tf", "w") as f:
+            f.write(cached_config)
+        logger.bind(resource_id=job["id"]).info(f"Reusing cached config for {job['name']}")
+        self.succeeded.append(job)
+        return True
+
+    def _write_native(self, job):
+        """
+        Write the import block and the config generated straight from the SDK models of a job. Returns False when
+        native generation is off or doesn't cover every resource of the job, it's then planned with terraform.
+        """
+        if not self.native_hcl or not job.get("native"):
+            return False
+        native_config = generate_config(job["native"], import_targets(job["rendered_template"]))
+        if native_config is None:
+            return False
+
+        with open(f"{self.root_path}/import-{job['name']}.tf.imported", "w") as f:
+            f.write(job["rendered_template"])
+        with open(f"{self.root_path}/generated-plan-import-{job['name']}.tf", "w") as f:
+            f.write(native_config)
+        logger.bind(resource_id=job["id"]).info(f"Generated config natively for {job['name']}")
+        self.native_count += 1
+        self.native_jobs.append(job)
+        self.succeeded.append(job)
+        return True
+
+    def _add_to_inventory(self, job):
+        """
+        Add a job to the for_each import inventory of the root module. Returns False when the inventory is off or
+        doesn't cover every resource of the job, it then gets its own import and config files.
+        """
+        if self.inventory is None:
+            return False
+        targets = import_targets(job["rendered_template"])
+        if not self.inventory.add(job, targets):
+            self.inventory_fallback_types.update(address.split(".", 1)[0] for address in targets)
+            return False
+        logger.bind(resource_id=job["id"]).info(f"Added {job['name']} to the import inventory")
+        self.native_count += 1
+        self.inventory_jobs.append(job)
+        self.succeeded.append(job)
+        return True
+
+    def _check_native(self):
+        """
+        Plan the natively generated config of the root module once. Jobs whose config doesn't match Azure, or all of
+        them when that plan fails, are taken back out and returned, to go through terraform -generate-config-out.
+        """
+        jobs = self.native_jobs + self.inventory_jobs
+        if not jobs:
+            return []
+
+        job_by_address = {address: job for job in self.native_jobs for address in import_addresses(job["rendered_template"])}
+        for job in self.inventory_jobs:
+            for address in import_addresses(job["rendered_template"]):
+                resource_type, name = address.split(".", 1)
+                job_by_address[f'{resource_type}.{INVENTORY_RESOURCE_NAME}["{name}"]'] = job
+        if self.inventory_jobs:
+            self.inventory.write()
+
+        # The import blocks of the native jobs are parked as .imported, they take part in this plan only
+        import_files = [f"{self.root_path}/import-{job['name']}.tf" for job in self.native_jobs]
+        plan_file = "native-check.tfplan"
+        timeout = self.plan_timeout or max(TERRAFORM_TIMEOUTS["plan"], PLAN_TIMEOUT_PER_IMPORT * sum(import_block_count(job) for job in jobs))
+        for import_file in import_files:
+            os.rename(f"{import_file}.imported", import_file)
+        try:
+            stdout, _, returncode = Utilities.run_terraform_cmd(["terraform", f"-chdir={self.root_path}", "plan", f"-parallelism={self.parallelism.value(len(jobs))}", f"-out={plan_file}"], timeout=timeout)
+            if returncode == 0:
+                stdout, _, returncode = Utilities.run_terraform_cmd(["terraform", f"-chdir={self.root_path}", "show", "-json", plan_file])
+        finally:
+            for import_file in import_files:
+                os.rename(import_file, f"{import_file}.imported")
+            if os.path.exists(f"{self.root_path}/{plan_file}"):
+                os.remove(f"{self.root_path}/{plan_file}")
+
+        if returncode != 0:
+            logger.warning(f"Plan of the natively generated config failed in {self.root_path}, generating it with terraform instead")
+            drifted = jobs
+        else:
+            drifted_by_name = {}
+            for change in json.loads(stdout).get("resource_changes", []):
+                job = job_by_address.get(change["address"])
+                if job is not None and change["change"]["actions"] != ["no-op"]:
+                    logger.bind(resource_id=job["id"]).warning(f"Native config of {change['address']} doesn't match Azure ({'/'.join(change['change']['actions'])}), generating it with terraform instead")
+                    drifted_by_name[job["name"]] = job
+            drifted = list(drifted_by_name.values())
+
+        for job in drifted:
+            if job in self.native_jobs:
+                os.remove(f"{self.root_path}/import-{job['name']}.tf.imported")
+                os.remove(f"{self.root_path}/generated-plan-import-{job['name']}.tf")
+                self.native_jobs.remove(job)
+            else:
+                self.inventory.remove(import_targets(job["rendered_template"]))
+                self.inventory_jobs.remove(job)
+            self.succeeded.remove(job)
+            self.native_count -= 1
+        if self.inventory is not None:
+            # Before the batch plans, the inventory mustn't import them a second time
+            self.inventory.write()
+        return drifted
+
+    def _bisect(self, batch):
+        if len(batch) == 1:
+            job = batch[0]
+            logger.bind(resource_id=job["id"]).error(f"Import of {job['name']} fails to plan, quarantined in {self.root_path}/import-{job['name']}.tf.failed")
+            with open(f"{self.root_path}/import-{job['name']}.tf.failed", "w") as f:
+                f.write(job["rendered_template"])
+            self.quarantined.append(job)
+            return
+
+        middle = len(batch) // 2
+        for half in [batch[:middle], batch[middle:]]:
+            if not self._plan_batch(half):
+                self._bisect(half)
+
+    def plan(self, jobs):
+        pending = deque(job for job in jobs if not self._add_to_inventory(job) and not self._write_native(job) and not self._reuse_cached(job))
+        if self.inventory_fallback_types:
+            logger.info(f"No for_each imports for {sorted(self.inventory_fallback_types)} in {self.root_path}: not covered by native config generation, terraform can't generate config for for_each import blocks. They get per-resource import files")
+        try:
+            pending.extend(self._check_native())
+            while pending:
+                check_deadline()
+                if self.cost_model:
+                    self.remaining_estimate = sum(self.cost_model.estimate(job) for job in pending)
+                batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+                if self._plan_batch(batch):
+                    self.batch_size = min(self.batch_size * 2, self.max_batch_size)
+                else:
+                    self.batch_size = max(1, len(batch) // 2)
+                    self._bisect(batch)
+        except RunDeadlineExceeded:
+            done = {id(job) for job in self.succeeded + self.quarantined}
+            self.pending = [job for job in jobs if id(job) not in done]
+            logger.error(f"Run deadline reached: {len(self.pending)} imports left unplanned in {self.root_path}")
+
+        restore_imported_files(self.root_path)
+        if self.inventory is not None:
+            self.inventory.write()
+        logger.info(f"Planned {len(self.succeeded)} imports in {self.root_path} with {self.batch_count} plans, {self.native_count} generated natively, {len(self.quarantined)} quarantined")
+        return self.succeeded, self.quarantined, self.pending
+
+
+def write_partial_results(local_repo_path, resource, succeeded, quarantined, pending):
+    """
+    Record which imports a run cut short by its deadline got through, in <repo>/.tf-import/partial-<resource>.json.
+    The next run picks the pending ones up again: the succeeded ones are already in the repo.
+    """
+    partial_file = os.path.join(local_repo_path, STATE_DIR, f"partial-{resource}.json")
+    os.makedirs(os.path.dirname(partial_file), exist_ok=True)
+    results = {
+        "resource": resource,
+        "stopped_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "succeeded": [job["id"] for job in succeeded],
+        "quarantined": [job["id"] for job in quarantined],
+        "pending": [job["id"] for job in pending],
+    }
+    with open(partial_file, "w") as writefile:
+        json.dump(results, writefile, indent=2)
+    return partial_file
+
+
+def run_import_plans(layout, jobs, resource, options):
+    """
+    Plan the jobs of every root module of the layout, root modules in parallel when there are several.
+    A job is a dict with the name used in file names, its root module path, the rendered import blocks,
+    the Azure resource ID, a fingerprint of the discovered model for the generated config cache and, optionally,
+    the (resource type, SDK model) tuples native config generation and the for_each import inventory work from.
+    Returns the succeeded and quarantined jobs. Raises RunDeadlineExceeded, once every root module is left
+    consistent, when the run deadline stopped some imports from being planned.
+    """
+    parallelism = ParallelismController(layout.local_repo_path, resource, fixed_value=options.get("parallelism"))
+    config_cache = ConfigCache(layout.local_repo_path) if options.get("config_cache", True) else None
+    cost_model = PlanCostModel(layout.local_repo_path, resource)
+
+    jobs_by_root = {}
+    for job in jobs:
+        jobs_by_root.setdefault(job["root"], []).append(job)
+    workers = options.get("shard_workers", 1)
+    if workers > 1 and len(jobs_by_root) > 1:
+        # Longest processing time first. Only the makespan of root modules planned in parallel depends on the order,
+        # the batches of a root module run one after another whatever their order
+        jobs_by_root = dict(sorted(jobs_by_root.items(), key=lambda item: sum(cost_model.estimate(job) for job in item[1]), reverse=True))
+
+    def _run(root_path):
+        try:
+            prepared = layout.prepare(root_path)
+        except RunDeadlineExceeded:
+            return [], [], jobs_by_root[root_path]
+        if not prepared:
+            # Quarantined, so the incremental high-water mark stays put and the next run retries them
+            return [], jobs_by_root[root_path], []
+        planner = BatchPlanner(root_path, parallelism, config_cache=config_cache, max_batch_size=options.get("max_batch_size", MAX_BATCH_SIZE), native_hcl=options.get("native_hcl", False), for_each_imports=options.get("for_each_imports", False), cost_model=cost_model, plan_timeout=options.get("plan_timeout"))
+        return planner.plan(jobs_by_root[root_path])
+
+    if jobs:
+        logger.info(f"Estimated plan time of {len(jobs)} imports in {len(jobs_by_root)} root modules: ~{cost_model.eta(jobs_by_root, min(workers, len(jobs_by_root))):.0f}s")
+    if workers <= 1 or len(jobs_by_root) <= 1:
+        results = [_run(root_path) for root_path in jobs_by_root]
+    else:
+        logger.info(f"Planning {len(jobs_by_root)} root modules with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run, jobs_by_root))
+
+    cost_model.save()
+    if config_cache:
+        config_cache.summary()
+    succeeded = [job for result in results for job in result[0]]
+    quarantined = [job for result in results for job in result[1]]
+    pending = [job for result in results for job in result[2]]
+    if quarantined:
+        logger.error(f"Imports quarantined after failing to plan: {[job['name'] for job in quarantined]}")
+    if pending:
+        partial_file = write_partial_results(layout.local_repo_path, resource, succeeded, quarantined, pending)
+        raise RunDeadlineExceeded(f"Run deadline exceeded with {len(pending)} of {len(jobs)} imports left unplanned, partial results in {partial_file}")
+
+    stale_partial_file = os.path.join(layout.local_repo_path, STATE_DIR, f"partial-{resource}.json")
+    if os.path.exists(stale_partial_file):
+        os.remove(stale_partial_file)
+    return succeeded, quarantined
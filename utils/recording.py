@@ -0,0 +1,177 @@
+import io
+import os
+import gzip
+import json
+import time
+import atexit
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from loguru import logger
+
+CASSETTE_FILE = "cassette.json.gz"
+
+# Process wide record/replay mode, set once from the command line before any client is created
+_MODE = None
+_CASSETTE = None
+_LATENCY_MS = 0
+
+
+def request_key(method, url):
+    """
+    Cassette key of a request: the method and the URL with its query parameters sorted.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {parts.path.lower()}?{query}"
+
+
+class Cassette:
+    """
+    ARM responses keyed by request, stored as gzipped JSON in <cassette_dir>/cassette.json.gz.
+    Identical requests are replayed in the order they were recorded, the last response is served again once exhausted.
+    """
+
+    def __init__(self, cassette_dir):
+        self.path = os.path.join(cassette_dir, CASSETTE_FILE)
+        self.interactions = {}
+        self._positions = {}
+        self._recorded = set()
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rt") as readfile:
+                self.interactions = json.load(readfile)
+
+    def record(self, method, url, status_code, headers, body):
+        key = request_key(method, url)
+        with self._lock:
+            # A new recording replaces what older recordings captured for the same request
+            if key not in self._recorded:
+                self._recorded.add(key)
+                self.interactions[key] = []
+            self.interactions[key].append({"status": status_code, "headers": dict(headers), "body": body.decode("utf-8", errors="replace")})
+
+    def play(self, method, url):
+        key = request_key(method, url)
+        with self._lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return responses[min(position, len(responses) - 1)]
+
+    def save(self):
+        with self._lock:
+            if not self._recorded:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with gzip.open(f"{self.path}.tmp", "wt") as writefile:
+                json.dump(self.interactions, writefile, sort_keys=True)
+            os.replace(f"{self.path}.tmp", self.path)
+        logger.info(f"Recorded {sum(len(responses) for responses in self.interactions.values())} ARM responses to {self.path}")
+
+
+def _recording_policy(cassette):
+    from azure.core.pipeline.policies import HTTPPolicy
+
+    class RecordingPolicy(HTTPPolicy):
+        """
+        Per call policy capturing every final ARM response into the cassette.
+        """
+
+        def send(self, request):
+            response = self.next.send(request)
+            http_response = response.http_response
+            cassette.record(request.http_request.method, request.http_request.url, http_response.status_code, http_response.headers, http_response.body())
+            return response
+
+    return RecordingPolicy()
+
+
+def _replay_transport(cassette, latency_ms):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from urllib3 import HTTPResponse
+    from azure.core.pipeline.transport import RequestsTransport
+
+    class ReplaySession(requests.Session):
+        """
+        Session serving recorded responses instead of calling ARM, after an optional simulated latency.
+        Wrapping it in the regular RequestsTransport keeps the response types the SDK expects.
+        """
+
+        def request(self, method, url, **kwargs):
+            recorded = cassette.play(method, url)
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+
+            response = requests.Response()
+            response.url = url
+            if recorded is None:
+                logger.warning(f"No recorded response for {method} {url}")
+                recorded = {"status": 404, "headers": {"Content-Type": "application/json"}, "body": json.dumps({"error": {"code": "NotRecorded", "message": f"No recorded response for {url}"}})}
+            response.status_code = recorded["status"]
+            response.headers = CaseInsensitiveDict(recorded["headers"])
+            # The recorded body is already decoded
+            response.headers.pop("Content-Encoding", None)
+            response.raw = HTTPResponse(body=io.BytesIO(recorded["body"].encode("utf-8")), headers=dict(response.headers), status=response.status_code, preload_content=False)
+            response.reason = requests.status_codes._codes.get(response.status_code, ("",))[0].upper()
+            return response
+
+    return RequestsTransport(session=ReplaySession(), session_owner=False)
+
+
+class ReplayCredential:
+    """
+    Credential handing out a static token, nothing is sent to Azure while replaying.
+    """
+
+    def get_token(self, *scopes, **kwargs):
+        from azure.core.credentials import AccessToken
+
+        return AccessToken("replay", int(time.time()) + 3600)
+
+
+def configure(record_dir=None, replay_dir=None, latency_ms=0):
+    """
+    Switch the process to record or replay mode. Clients created afterwards by Utilities.create_client pick it up.
+    """
+    global _MODE, _CASSETTE, _LATENCY_MS
+    if record_dir and replay_dir:
+        raise ValueError("Record and replay modes can't be used together")
+    if record_dir:
+        _MODE, _CASSETTE = "record", Cassette(record_dir)
+        atexit.register(_CASSETTE.save)
+        logger.info(f"Recording ARM responses to {_CASSETTE.path}")
+    elif replay_dir:
+        if not os.path.exists(os.path.join(replay_dir, CASSETTE_FILE)):
+            raise ValueError(f"No cassette found in {replay_dir}")
+        _MODE, _CASSETTE = "replay", Cassette(replay_dir)
+        logger.info(f"Replaying ARM responses from {_CASSETTE.path}")
+    _LATENCY_MS = latency_ms
+
+
+def is_replaying():
+    return _MODE == "replay"
+
+
+def client_kwargs():
+    """
+    Extra keyword arguments for SDK clients in the current mode.
+    """
+    if _MODE == "record":
+        return {"per_call_policies": [_recording_policy(_CASSETTE)]}
+    if _MODE == "replay":
+        # Replayed responses come back instantly, retrying them would only add sleeps
+        return {"transport": _replay_transport(_CASSETTE, _LATENCY_MS), "retry_total": 0}
+    return {}
+
+
+def add_recording_arguments(parser):
+    parser.add_argument("--record", dest="record_dir", help="Record every ARM response of the run to a cassette in this directory", type=str, default=None)
+    parser.add_argument("--replay", dest="replay_dir", help="Serve ARM responses from the cassette in this directory instead of calling Azure", type=str, default=None)
+    parser.add_argument("--replay-latency", dest="replay_latency", help="Simulated latency of every replayed response, in milliseconds", type=int, default=0)
+
+
+def configure_from_args(args):
+    configure(record_dir=args.record_dir, replay_dir=args.replay_dir, latency_ms=args.replay_latency)
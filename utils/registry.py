@@ -0,0 +1,66 @@
+import importlib
+
+# Importer class handling each supported resource, as (module, class) so nothing is imported until a resource is selected
+IMPORTERS = {
+    "vms": ("import_vm", "VMSImportSetUp"),
+    "aks": ("import_aks", "AKSImportSetUp"),
+    "lb": ("import_alb", "ALBImportSetUp"),
+    "lbgw": ("import_alb", "ALBImportSetUp"),
+    "sql": ("import_azuredb", "AzureDBImportSetUp"),
+    "mysql": ("import_azuredb", "AzureDBImportSetUp"),
+    "postgresql": ("import_azuredb", "AzureDBImportSetUp"),
+    "azureblob": ("import_azure_blob", "StorageAccountImportSetUp"),
+}
+
+# SDK clients created by Utilities.create_client for each resource, in the order they are returned
+CLIENTS = {
+    "vms": [("azure.mgmt.compute", "ComputeManagementClient")],
+    "aks": [("azure.mgmt.containerservice", "ContainerServiceClient")],
+    "sql": [("azure.mgmt.sql", "SqlManagementClient")],
+    "mysql": [("azure.mgmt.rdbms.mysql", "MySQLManagementClient"), ("azure.mgmt.rdbms.mysql_flexibleservers", "MySQLManagementClient")],
+    "postgresql": [("azure.mgmt.rdbms.postgresql", "PostgreSQLManagementClient"), ("azure.mgmt.rdbms.postgresql_flexibleservers", "PostgreSQLManagementClient")],
+    "lb": [("azure.mgmt.network", "NetworkManagementClient")],
+    "lbgw": [("azure.mgmt.network", "NetworkManagementClient")],
+    "resource_group": [("azure.mgmt.resource", "ResourceManagementClient")],
+    "azureblob": [("azure.mgmt.storage", "StorageManagementClient")],
+}
+
+
+def register_importer(resource, module_name, class_name):
+    """
+    Register the importer class of a new resource type.
+    """
+    IMPORTERS[resource] = (module_name, class_name)
+
+
+def register_client(resource, *client_classes):
+    """
+    Register the SDK clients of a new resource type, each one as (module, class).
+    """
+    CLIENTS[resource] = list(client_classes)
+
+
+def supported_resources():
+    return list(IMPORTERS)
+
+
+def _load(module_name, attribute):
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def get_importer(resource):
+    """
+    Import and return the importer class of a resource.
+    """
+    if resource not in IMPORTERS:
+        raise ValueError(f"Unsupported resource type: {resource}")
+    return _load(*IMPORTERS[resource])
+
+
+def get_client_classes(resource):
+    """
+    Import and return the SDK client classes of a resource.
+    """
+    if resource not in CLIENTS:
+        raise ValueError(f"Unsupported resource type: {resource}")
+    return [_load(module_name, class_name) for module_name, class_name in CLIENTS[resource]]
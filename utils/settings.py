@@ -23,4 +23,56 @@ SKIP_RESOURCE = {
         "BusLighthouse1Test",
         "EitA2CockpitTestEU"
     ]
-}
\ No newline at end of file
+}
+
+# Tag marking imported resources: every importer skips them and --tag-imported sets it
+IMPORTED_TAG_KEY = "TF_IMPORTED"
+IMPORTED_TAG_VALUE = "True"
+
+# VM extensions imported along with their VM, per OS type
+VM_EXTENSIONS_TO_IMPORT = {
+    "linux": ["AzureMonitorLinuxAgent", "DataDiskMounting", "LinuxDiagnostic", "enablevmaccess", "CustomScriptExtension", "AzurePerformanceDiagnosticsLinux", "AzureDiskEncryptionForLinux", "MDE-Linux"],
+    "windows": ["AzureDiskEncryption", "HybridWorkerExtension", "AzurePerformanceDiagnostics", "CustomScriptExtension_2016", "CustomScriptExtension", "enablevmaccess", "joindomain", "Microsoft.Insights.VMDiagnosticsSettings", "SqlIaasExtension", "MDE.Windows"],
+}
+
+# Directory (relative to local_repo_path) holding the tool's own state between runs
+STATE_DIR = ".tf-import"
+
+# Default timeout in seconds per terraform subcommand, a hung command is killed with its provider plugins.
+# None: no timeout of its own, only the run deadline applies (init time depends on provider downloads, not on the repo)
+TERRAFORM_TIMEOUTS = {
+    "init": None,
+    "plan": 900,
+    "fmt": 120,
+    "default": 600,
+}
+# Plans with -generate-config-out get at least this many seconds per import block
+PLAN_TIMEOUT_PER_IMPORT = 60
+# Plans of a whole root module get at least this many seconds per resource and import block declared in it
+PLAN_TIMEOUT_PER_RESOURCE = 10
+# Times a timed out terraform command is retried before it's reported as failed
+TERRAFORM_RETRIES = 1
+
+# Starting terraform plan -parallelism per resource, tuned from observed throttling and saved for the next run
+TF_PARALLELISM = {
+    "default": 10,
+    "aks": 4,
+    "lbgw": 6,
+    "azureblob": 20,
+    "sql": 16,
+    "mysql": 16,
+    "postgresql": 16,
+}
+
+# ARM resource types looked up in incremental mode, changes of child resources count for their parent.
+# Resources list doesn't return AKS agent pools: a changed cluster brings all of its node pools into scope.
+ARM_RESOURCE_TYPES = {
+    "vms": ["Microsoft.Compute/virtualMachines", "Microsoft.Compute/virtualMachines/extensions"],
+    "aks": ["Microsoft.ContainerService/managedClusters"],
+    "sql": ["Microsoft.Sql/servers", "Microsoft.Sql/servers/databases"],
+    "mysql": ["Microsoft.DBforMySQL/servers", "Microsoft.DBforMySQL/flexibleServers", "Microsoft.DBforMySQL/flexibleServers/databases"],
+    "postgresql": ["Microsoft.DBforPostgreSQL/servers", "Microsoft.DBforPostgreSQL/flexibleServers", "Microsoft.DBforPostgreSQL/flexibleServers/databases"],
+    "lb": ["Microsoft.Network/loadBalancers"],
+    "lbgw": ["Microsoft.Network/applicationGateways"],
+    "azureblob": ["Microsoft.Storage/storageAccounts"],
+}
@@ -0,0 +1,94 @@
+import os
+import re
+import threading
+from loguru import logger
+from .utilities import Utilities
+from .settings import STATE_DIR
+
+# Supported values for --shard-by, on top of "tag:<tag name>"
+SHARD_KEYS = ["resource_group", "subscription"]
+
+
+class ShardLayout:
+    """
+    Decide which root module the generated import and config files of a resource land in.
+    Without a shard key everything stays flat in local_repo_path.
+    """
+
+    def __init__(self, local_repo_path, shard_by=None):
+        if shard_by:
+            ShardLayout.check_shard_key(shard_by)
+
+        self.local_repo_path = local_repo_path
+        self.shard_by = shard_by
+        self._prepared = set()
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def check_shard_key(shard_by):
+        """
+        Raises ValueError on an unsupported --shard-by value.
+        """
+        if shard_by not in SHARD_KEYS and not shard_by.startswith("tag:"):
+            raise ValueError(f"Unsupported shard key: {shard_by}. Supported: {SHARD_KEYS} or tag:<tag name>")
+
+    @staticmethod
+    def plugin_cache_dir(local_repo_path):
+        """
+        Default TF_PLUGIN_CACHE_DIR of a sharded run, every shard runs its own terraform init and shares the provider downloads.
+        """
+        return os.path.abspath(os.path.join(local_repo_path, STATE_DIR, "plugin-cache"))
+
+    def shard_name(self, resource_id, tags=None):
+        """
+        Name of the shard directory for a resource.
+        """
+        id_parts = resource_id.split("/")
+        if self.shard_by == "resource_group":
+            value = id_parts[4]
+        elif self.shard_by == "subscription":
+            value = id_parts[2]
+        else:
+            value = (tags or {}).get(self.shard_by[len("tag:"):]) or "untagged"
+        return re.sub(r"[^a-z0-9_.-]", "_", value.lower())
+
+    def root_for(self, resource_id, tags=None):
+        """
+        Root module path for a resource.
+        """
+        if not self.shard_by:
+            return self.local_repo_path
+        return os.path.join(self.local_repo_path, self.shard_name(resource_id, tags))
+
+    def prepare(self, root_path):
+        """
+        Create the shard directory with its own providers.tf and run terraform init once per run.
+        The flat root is initialised by the import workflow itself. Shard inits run one at a time, see Utilities.terraform_init.
+        Returns False when the init of the shard failed, nothing can be planned in it.
+        """
+        with self._lock:
+            if root_path in self._prepared:
+                return root_path not in self._failed
+            self._prepared.add(root_path)
+
+        if root_path == self.local_repo_path:
+            return True
+
+        logger.info(f"Preparing shard root module {root_path}")
+        os.makedirs(root_path, exist_ok=True)
+        _, stderr, returncode = Utilities.terraform_init(root_path)
+        if returncode != 0:
+            logger.error(f"terraform init failed in shard root module {root_path}, skipping it: {stderr.strip()}")
+            with self._lock:
+                self._failed.add(root_path)
+            return False
+        return True
+
+    def roots(self):
+        """
+        Root modules touched during this run.
+        """
+        if not self.shard_by:
+            return [self.local_repo_path]
+        return sorted(self._prepared - self._failed)
@@ -0,0 +1,49 @@
+import time
+import threading
+from loguru import logger
+from .watchdog import cancel_commands_of, forget_cancelled
+
+
+class Stage:
+    """
+    A step of the import workflow started in a background thread, so independent steps overlap:
+    terraform init runs while resources are discovered, the subscription lookup while clients are created.
+    wait() joins it where its result is needed and re-raises what it raised. When the workflow fails before that,
+    cancel() stops its terraform command: the thread is a daemon and never holds the process open.
+    """
+
+    def __init__(self, name, target, *args, **kwargs):
+        self.name = name
+        self._result = None
+        self._error = None
+        self.started = time.perf_counter()
+        self.duration = None
+        self._thread = threading.Thread(target=self._run, args=(target, args, kwargs), name=f"stage-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, target, args, kwargs):
+        try:
+            self._result = target(*args, **kwargs)
+        except BaseException as e:  # sys.exit in a stage surfaces in the waiting thread instead
+            self._error = e
+        finally:
+            self.duration = time.perf_counter() - self.started
+            forget_cancelled(self._thread)
+
+    def wait(self):
+        waited_from = time.perf_counter()
+        self._thread.join()
+        waited = time.perf_counter() - waited_from
+        logger.debug(f"Stage {self.name} took {self.duration:.1f}s, {max(0.0, self.duration - waited):.1f}s of it overlapped with other work")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def cancel(self):
+        """
+        Give up on the stage: stop the terraform command it's running and don't let it start another one,
+        nothing waits for its result.
+        """
+        if self._thread.is_alive():
+            logger.debug(f"Cancelling stage {self.name}")
+            cancel_commands_of(self._thread)
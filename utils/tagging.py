@@ -0,0 +1,130 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from .utilities import Utilities
+from .settings import IMPORTED_TAG_KEY, IMPORTED_TAG_VALUE
+from .cleanup import atomic_rewrite
+from .planner import import_targets
+from .for_each_imports import CONFIG_FILE as FOR_EACH_CONFIG_FILE
+
+# Tag every importer's _tags_match filters out, so imported resources are skipped by later discoveries
+IMPORTED_TAG = {IMPORTED_TAG_KEY: IMPORTED_TAG_VALUE}
+# Imported terraform resource types with a tags attribute, the other ones (attachments, LB rules, databases of
+# MySQL/PostgreSQL servers...) can't carry the tag. AKS node pools have tags but aren't ARM tracked resources,
+# the Tags API can't reach them: they're skipped along with their cluster
+TAGGABLE_RESOURCE_TYPES = {
+    "azurerm_application_gateway",
+    "azurerm_kubernetes_cluster",
+    "azurerm_lb",
+    "azurerm_linux_virtual_machine",
+    "azurerm_managed_disk",
+    "azurerm_mssql_database",
+    "azurerm_mssql_server",
+    "azurerm_mysql_flexible_server",
+    "azurerm_mysql_server",
+    "azurerm_network_interface",
+    "azurerm_postgresql_flexible_server",
+    "azurerm_postgresql_server",
+    "azurerm_public_ip",
+    "azurerm_storage_account",
+    "azurerm_virtual_machine_extension",
+    "azurerm_windows_virtual_machine",
+}
+RESOURCE_START = re.compile(r'^resource\s+"([^"]+)"\s+"[^"]+"\s*\{')
+IGNORE_IMPORTED_TAG = [
+    "\n",
+    "  lifecycle {\n",
+    *(f'    ignore_changes = [tags["{key}"]]\n' for key in IMPORTED_TAG),
+    "  }\n",
+]
+TAGGING_WORKERS = 8
+MAX_RETRIES = 5
+DEFAULT_RETRY_AFTER = 5
+
+
+def _retry_after(error, attempt):
+    """
+    Seconds to wait before retrying a throttled call: the Retry-After header if ARM sent one, exponential backoff otherwise.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER * 2 ** attempt
+
+
+def _merge_tags(resource_client, resource_id, tags):
+    from azure.core.exceptions import HttpResponseError
+    from azure.mgmt.resource.resources.models import Tags, TagsPatchResource
+
+    parameters = TagsPatchResource(operation="Merge", properties=Tags(tags=tags))
+    # Older azure-mgmt-resource versions expose a plain call, newer ones a long running operation
+    update_at_scope = getattr(resource_client.tags, "update_at_scope", None)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            if update_at_scope:
+                update_at_scope(resource_id, parameters)
+            else:
+                resource_client.tags.begin_update_at_scope(resource_id, parameters).result()
+            return True
+        except HttpResponseError as e:
+            if e.status_code != 429 or attempt == MAX_RETRIES:
+                logger.bind(resource_id=resource_id).error(f"Failed to tag {resource_id}: {e.message}")
+                return False
+            wait = _retry_after(e, attempt)
+            logger.bind(resource_id=resource_id).warning(f"Throttled while tagging {resource_id}, retrying in {wait:.0f}s")
+            time.sleep(wait)
+
+
+def ignore_imported_tag(tf_file):
+    """
+    Add lifecycle { ignore_changes = [tags["TF_IMPORTED"]] } to the taggable resources of a generated config file:
+    their tags were read before tagging, applying the config as generated would remove the tag again.
+    Resources already ignoring it are left as they are.
+    """
+    with open(tf_file, "r") as readfile, atomic_rewrite(tf_file) as writefile:
+        taggable = False
+        ignored = False
+        for line in readfile:
+            resource_match = RESOURCE_START.match(line)
+            if resource_match:
+                taggable = resource_match.group(1) in TAGGABLE_RESOURCE_TYPES
+                ignored = False
+            elif taggable and "ignore_changes" in line and IMPORTED_TAG_KEY in line:
+                ignored = True
+            elif taggable and line.rstrip("\n") == "}":
+                if not ignored:
+                    writefile.writelines(IGNORE_IMPORTED_TAG)
+                taggable = False
+            writefile.write(line)
+
+
+def tag_imported_resources(subscription_id, jobs, tags=IMPORTED_TAG, workers=TAGGING_WORKERS):
+    """
+    Merge the imported tag into every taggable resource of the succeeded jobs, children (disks, NICs, extensions...)
+    included, concurrently. Their generated config is made to ignore the tag first, so applying it keeps the tag.
+    Existing tags of the resources are kept. Returns the IDs of the resources that couldn't be tagged.
+    """
+    resource_ids = sorted({
+        resource_id for job in jobs for address, resource_id in import_targets(job["rendered_template"]).items()
+        if address.split(".", 1)[0] in TAGGABLE_RESOURCE_TYPES
+    })
+    if not resource_ids:
+        return []
+
+    generated_files = {f"{job['root']}/generated-plan-import-{job['name']}.tf" for job in jobs} | {os.path.join(job["root"], FOR_EACH_CONFIG_FILE) for job in jobs}
+    for generated_file in sorted(generated_files):
+        if os.path.exists(generated_file):
+            ignore_imported_tag(generated_file)
+
+    resource_client = Utilities.create_client(subscription_id, resource="resource_group")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda resource_id: _merge_tags(resource_client, resource_id, tags), resource_ids))
+
+    failed = [resource_id for resource_id, tagged in zip(resource_ids, results) if not tagged]
+    logger.info(f"Tagged {len(resource_ids) - len(failed)} imported resources with {tags} in {time.perf_counter() - start:.1f}s, {len(failed)} failed")
+    return failed
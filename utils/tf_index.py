@@ -0,0 +1,133 @@
+import os
+import re
+from loguru import logger
+from .for_each_imports import INVENTORY_FILE, parse_inventory_file
+
+RESOURCE_BLOCK = re.compile(r'^\s*resource\s+"([^"]+)"\s+"([^"]+)"', re.MULTILINE)
+IMPORT_BLOCK = re.compile(r"^\s*import\s*\{(.*?)^\s*\}", re.MULTILINE | re.DOTALL)
+IMPORT_TO = re.compile(r"^\s*to\s*=\s*(\S+)", re.MULTILINE)
+IMPORT_ID = re.compile(r'^\s*id\s*=\s*"([^"]*)"', re.MULTILINE)
+
+# Parsed .tf files shared by every index in the process: path -> (mtime, size, addresses, imports)
+_FILE_CACHE = {}
+
+
+def _parse_tf_file(path):
+    """
+    Extract resource addresses and import blocks from a single .tf file.
+    """
+    with open(path, "r") as readfile:
+        content = readfile.read()
+
+    addresses = {f"{match.group(1)}.{match.group(2)}" for match in RESOURCE_BLOCK.finditer(content)}
+    imports = {}
+    for block in IMPORT_BLOCK.finditer(content):
+        to_match = IMPORT_TO.search(block.group(1))
+        id_match = IMPORT_ID.search(block.group(1))
+        if to_match and id_match:
+            imports[to_match.group(1)] = id_match.group(1)
+    return addresses, imports
+
+
+class TerraformIndex:
+    """
+    In-memory index of resource addresses and import IDs already declared under local_repo_path.
+    Addresses are tracked per root module (directory), import IDs across the whole repo.
+    The repo is scanned when the index is built, imports kept for the run are added in memory by filter_import_blocks.
+    Files are only re-parsed by refresh() when their mtime or size changes.
+    """
+
+    def __init__(self, local_repo_path):
+        self.local_repo_path = local_repo_path
+        self.addresses = {}
+        self.import_ids = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rescan the .tf and inventory files of the repo, re-parsing only the ones that changed since the last scan.
+        """
+        addresses = {}
+        import_ids = {}
+
+        for root, dirs, files in os.walk(self.local_repo_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]  # Skip .terraform and other hidden dirs
+            for filename in files:
+                if not filename.endswith(".tf") and filename != INVENTORY_FILE:
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                cached = _FILE_CACHE.get(path)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    file_addresses, file_imports = cached[2], cached[3]
+                else:
+                    file_addresses, file_imports = parse_inventory_file(path) if filename == INVENTORY_FILE else _parse_tf_file(path)
+                    _FILE_CACHE[path] = (stat.st_mtime_ns, stat.st_size, file_addresses, file_imports)
+
+                module_addresses = addresses.setdefault(os.path.normpath(root), set())
+                module_addresses.update(file_addresses)
+                module_addresses.update(file_imports)
+                for address, import_id in file_imports.items():
+                    import_ids[import_id.lower()] = address
+
+        self.addresses = addresses
+        self.import_ids = import_ids
+        return self
+
+    def is_covered(self, import_id):
+        """
+        Check if an Azure resource ID is already imported by an import block of the repo.
+        """
+        return import_id.lower() in self.import_ids
+
+    def is_conflicting(self, address, root_path=None):
+        """
+        Check if a terraform address is already taken by a resource or import block of the root module.
+        """
+        module_addresses = self.addresses.get(os.path.normpath(root_path or self.local_repo_path), set())
+        return address in module_addresses
+
+    def add_import(self, address, import_id, root_path=None):
+        """
+        Record an import written during the run without rescanning the repo.
+        """
+        self.addresses.setdefault(os.path.normpath(root_path or self.local_repo_path), set()).add(address)
+        self.import_ids[import_id.lower()] = address
+
+    def filter_import_blocks(self, rendered_template, root_path=None):
+        """
+        Drop the import blocks of a rendered template whose address or ID already exists in the repo.
+        The kept ones are added to the index, so a later template of the run importing them again is filtered too.
+        Returns None when nothing is left to import.
+        """
+        kept = 0
+        covered = []
+        conflicting = []
+
+        def _filter(block):
+            nonlocal kept
+            to_match = IMPORT_TO.search(block.group(1))
+            id_match = IMPORT_ID.search(block.group(1))
+            if to_match and id_match:
+                if self.is_covered(id_match.group(1)):
+                    covered.append(to_match.group(1))
+                    return ""
+                if self.is_conflicting(to_match.group(1), root_path):
+                    conflicting.append(to_match.group(1))
+                    return ""
+                self.add_import(to_match.group(1), id_match.group(1), root_path)
+            kept += 1
+            return block.group(0)
+
+        filtered_template = IMPORT_BLOCK.sub(_filter, rendered_template)
+        if covered:
+            logger.info(f"Skipping import targets already imported in the repo: {covered}")
+        if conflicting:
+            logger.warning(f"Skipping import targets whose address is already declared for another resource: {conflicting}")
+        if not kept:
+            return None
+        return filtered_template
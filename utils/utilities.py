@@ -1,62 +1,82 @@
 import os
-import subprocess
 from loguru import logger
 import sys
 from jinja2 import Environment, FileSystemLoader
 import os
-from enum import Enum
-from .settings import SKIP_RESOURCE
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.containerservice import ContainerServiceClient
-from azure.mgmt.resource import ResourceManagementClient, SubscriptionClient
-from azure.mgmt.sql import SqlManagementClient
-from azure.mgmt.rdbms.mysql import MySQLManagementClient
-from azure.mgmt.rdbms.mysql_flexibleservers import MySQLManagementClient as MySQLFlexibleManagementClient
-from azure.mgmt.rdbms.postgresql import PostgreSQLManagementClient
-from azure.mgmt.rdbms.postgresql_flexibleservers import PostgreSQLManagementClient as PostgreSQLFlexibleManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.storage import StorageManagementClient
-
-class SkipTag(Enum):
-    """
-    SKip Resources Containg this tag
-    """
-
-    TF_IMPORTED = "true"
+import threading
+from .settings import SKIP_RESOURCE, TERRAFORM_TIMEOUTS, TERRAFORM_RETRIES
+from .registry import get_client_classes
+from . import recording, instrumentation, watchdog
 
+# Process wide caches, kept warm across imports when running as a daemon
+_CACHE_LOCK = threading.RLock()
+_CREDENTIAL = None
+_CLIENTS = {}
+_SUBSCRIPTION_NAMES = {}
+_TEMPLATE_ENV = None
+# terraform init isn't safe to run concurrently against a shared TF_PLUGIN_CACHE_DIR, shards and daemon jobs take turns
+_INIT_LOCK = threading.Lock()
 
 class Utilities:
     """
     Utilities for Imports
     """
 
+    @staticmethod
+    def get_credential():
+        """
+        Shared DefaultAzureCredential, so tokens are acquired once per process.
+        """
+        global _CREDENTIAL
+        with _CACHE_LOCK:
+            if _CREDENTIAL is None and recording.is_replaying():
+                _CREDENTIAL = recording.ReplayCredential()
+            if _CREDENTIAL is None:
+                from azure.identity import DefaultAzureCredential
+
+                _CREDENTIAL = DefaultAzureCredential()
+            return _CREDENTIAL
+
+    @staticmethod
+    def get_template_env():
+        """
+        Shared jinja Environment, so templates are compiled once per process.
+        """
+        global _TEMPLATE_ENV
+        with _CACHE_LOCK:
+            if _TEMPLATE_ENV is None:
+                _TEMPLATE_ENV = Environment(loader=FileSystemLoader("templates"))
+            return _TEMPLATE_ENV
+
+    @staticmethod
+    def client_kwargs():
+        """
+        Extra keyword arguments for every SDK client: the ARM call instrumentation (utils/instrumentation.py)
+        and the record/replay mode (utils/recording.py).
+        """
+        kwargs = recording.client_kwargs()
+        call_policy, retry_policy = instrumentation.pipeline_policies()
+        kwargs["per_call_policies"] = kwargs.get("per_call_policies", []) + [call_policy]
+        kwargs["per_retry_policies"] = [retry_policy]
+        return kwargs
+
     @staticmethod
     def create_client(subscription_id, resource):
+        with _CACHE_LOCK:
+            if (subscription_id, resource) not in _CLIENTS:
+                _CLIENTS[(subscription_id, resource)] = Utilities._build_client(subscription_id, resource)
+            return _CLIENTS[(subscription_id, resource)]
+
+    @staticmethod
+    def _build_client(subscription_id, resource):
         try:
-            credential = DefaultAzureCredential()
-            if resource == "vms":
-                client = ComputeManagementClient(credential, subscription_id)
-            elif resource == "aks":
-                client = ContainerServiceClient(credential, subscription_id)
-            elif resource == "sql":
-                client = SqlManagementClient(credential, subscription_id)
-            elif resource == "mysql":
-                client, flxclient = [MySQLManagementClient(credential, subscription_id),MySQLFlexibleManagementClient(credential, subscription_id)]
-                return client, flxclient
-            elif resource == "postgresql":
-                client, flxclient = [PostgreSQLManagementClient(credential, subscription_id),PostgreSQLFlexibleManagementClient(credential, subscription_id)]
-                return client, flxclient
-            elif resource in ["lbgw", "lb"]:
-                client = NetworkManagementClient(credential, subscription_id)
-            elif resource == "resource_group":
-                client = ResourceManagementClient(credential, subscription_id)
-            elif resource == "azureblob":
-                client = StorageManagementClient(credential, subscription_id)
-            else:
-                raise ValueError(f"Unsupported resource type: {resource}")
-
-            return client
+            credential = Utilities.get_credential()
+            # SDK packages are only imported once a resource needing them is selected, see utils/registry.py
+            clients = [client_class(credential, subscription_id, **Utilities.client_kwargs()) for client_class in get_client_classes(resource)]
+
+            if len(clients) == 1:
+                return clients[0]
+            return tuple(clients)
         except Exception as e:
             logger.error(f"Error occured: {e}")
             sys.exit(1)
@@ -66,23 +86,45 @@ class Utilities:
             """
             Get the name of the subscription from the subscription ID.
             """
-            credential = DefaultAzureCredential()
-            subscription_client = SubscriptionClient(credential)
+            with _CACHE_LOCK:
+                if subscription_id in _SUBSCRIPTION_NAMES:
+                    return _SUBSCRIPTION_NAMES[subscription_id]
+            from azure.mgmt.resource import SubscriptionClient
+
+            # The ARM call runs outside the lock, a concurrent lookup of the same subscription keeps the first name stored
+            credential = Utilities.get_credential()
+            subscription_client = SubscriptionClient(credential, **Utilities.client_kwargs())
             subscription = subscription_client.subscriptions.get(subscription_id)
-            return subscription.display_name
+            with _CACHE_LOCK:
+                return _SUBSCRIPTION_NAMES.setdefault(subscription_id, subscription.display_name)
 
-    def run_terraform_cmd(cmd):
-        print(cmd)
-        try:
-            completed_process = subprocess.run(cmd, text=True, capture_output=True)
-            if completed_process.returncode == 0:
-                logger.info(completed_process.stdout)
-            else:
-                logger.info(completed_process.stderr)
-            return completed_process.stdout, completed_process.stderr
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error during terraform {cmd}: {e}")
-            sys.exit(1)
+    @staticmethod
+    def run_terraform_cmd(cmd, timeout=None, retries=TERRAFORM_RETRIES, before_retry=None):
+        """
+        Run a terraform command, killed with its provider plugins after timeout seconds (per subcommand default from
+        utils/settings.py) and retried up to retries times, calling before_retry first to reset its outputs.
+        Raises RunDeadlineExceeded once the run deadline has passed.
+        """
+        subcommand = next((arg for arg in cmd[1:] if not arg.startswith("-")), "default")
+        timeout = timeout or TERRAFORM_TIMEOUTS.get(subcommand, TERRAFORM_TIMEOUTS["default"])
+        if timeout is None:
+            # Nothing to retry: only the run deadline stops it
+            retries = 0
+        for attempt in range(retries + 1):
+            logger.debug(f"Running {' '.join(cmd)}")
+            stdout, stderr, returncode, timed_out = watchdog.run_with_timeout(cmd, timeout)
+            # Full terraform output only at DEBUG, it lands in the per-resource log files when --log-dir is set
+            if returncode == 0:
+                logger.debug(stdout)
+            elif not timed_out:
+                logger.warning(stderr)
+            if not timed_out:
+                return stdout, stderr, returncode
+
+            logger.warning(f"terraform {subcommand} timed out after {timeout}s and was killed (attempt {attempt + 1}/{retries + 1})")
+            if attempt < retries and before_retry:
+                before_retry()
+        return stdout, f"{stderr}\nterraform {subcommand} timed out after {timeout}s", returncode
 
     @staticmethod
     def generate_tf_provider(local_repo_path):
@@ -93,13 +135,22 @@ class Utilities:
             return
         logger.info(f"Creating providers.tf file inside {local_repo_path}")
 
-        tmpl = Environment(loader=FileSystemLoader("templates"))
-        template = tmpl.get_template("providers.tf.j2")
+        template = Utilities.get_template_env().get_template("providers.tf.j2")
         rendered_template = template.render()
 
         with open(output_file_path, "w") as f:
             f.write(rendered_template)
 
+    @staticmethod
+    def terraform_init(root_path):
+        """
+        Write the provider config of a root module if it has none and run terraform init in it.
+        Inits of the process run one at a time, they may share the plugin cache.
+        """
+        Utilities.generate_tf_provider(root_path)
+        with _INIT_LOCK:
+            return Utilities.run_terraform_cmd(["terraform", f"-chdir={root_path}", "init"])
+
     @staticmethod
     def skip_resources_from_settings(subscription_name, resource):
         try:
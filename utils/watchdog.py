@@ -0,0 +1,131 @@
+import os
+import time
+import signal
+import threading
+import subprocess
+from loguru import logger
+
+# Return code reported for a command killed after its timeout, like coreutils timeout
+TIMEOUT_RETURNCODE = 124
+# Seconds a timed out command gets to exit after SIGTERM before it's killed
+KILL_GRACE_SECONDS = 10
+# Process groups are POSIX only, on Windows only the terraform process itself is killed
+POSIX = os.name == "posix"
+
+# Process wide run deadline (time.monotonic), set once from the command line
+_DEADLINE = None
+# Command currently run by each thread, so a cancelled stage can stop it, and the threads that may not start any
+_RUNNING = {}
+_CANCELLED = set()
+_RUNNING_LOCK = threading.Lock()
+
+
+class RunDeadlineExceeded(Exception):
+    """
+    The run deadline set with --deadline passed, the run stops at the next terraform command.
+    """
+
+
+class CommandCancelled(Exception):
+    """
+    The thread was cancelled, it doesn't start any more commands.
+    """
+
+
+def set_deadline(seconds):
+    global _DEADLINE
+    _DEADLINE = time.monotonic() + seconds if seconds else None
+    if seconds:
+        logger.info(f"Run deadline in {seconds}s")
+
+
+def time_left():
+    """
+    Seconds left before the run deadline, None without a deadline.
+    """
+    return None if _DEADLINE is None else _DEADLINE - time.monotonic()
+
+
+def check_deadline():
+    left = time_left()
+    if left is not None and left <= 0:
+        raise RunDeadlineExceeded("Run deadline exceeded")
+
+
+def _kill(process):
+    """
+    Stop a command with its provider plugins: SIGTERM to its process group, SIGKILL if it's still there after the grace period.
+    """
+    try:
+        if POSIX:
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(timeout=KILL_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        # The group may have exited since the grace period ran out
+        try:
+            if POSIX:
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+    except ProcessLookupError:
+        pass
+
+
+def cancel_commands_of(thread):
+    """
+    Stop a thread from running commands: SIGTERM the one it's running, along with its provider plugins (the thread
+    gets its output back as usual), and refuse to start any later one.
+    """
+    with _RUNNING_LOCK:
+        _CANCELLED.add(thread.ident)
+        process = _RUNNING.get(thread.ident)
+    if process is None:
+        return
+    try:
+        if POSIX:
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+    except ProcessLookupError:
+        pass
+
+
+def forget_cancelled(thread):
+    with _RUNNING_LOCK:
+        _CANCELLED.discard(thread.ident)
+
+
+def run_with_timeout(cmd, timeout):
+    """
+    Run a command in its own process group, killed once it runs past timeout seconds (None: no limit) or past the run deadline.
+    Returns stdout, stderr, the return code (TIMEOUT_RETURNCODE when killed) and whether it timed out.
+    Raises RunDeadlineExceeded when the deadline is what stopped it, CommandCancelled when the thread was cancelled.
+    """
+    check_deadline()
+    left = time_left()
+    limit = left if timeout is None else timeout if left is None else min(timeout, left)
+    with _RUNNING_LOCK:
+        # Checked and registered under the lock, a cancel can't slip in between
+        if threading.get_ident() in _CANCELLED:
+            raise CommandCancelled(f"Not starting {' '.join(cmd)}: cancelled")
+        process = subprocess.Popen(cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=POSIX)
+        _RUNNING[threading.get_ident()] = process
+    try:
+        stdout, stderr = process.communicate(timeout=limit)
+        return stdout, stderr, process.returncode, False
+    except subprocess.TimeoutExpired:
+        _kill(process)
+        stdout, stderr = process.communicate()
+        check_deadline()
+        return stdout, stderr, TIMEOUT_RETURNCODE, True
+    except BaseException:
+        # Interrupted (Ctrl-C, daemon shutdown): don't leave terraform and its plugins running
+        _kill(process)
+        raise
+    finally:
+        with _RUNNING_LOCK:
+            _RUNNING.pop(threading.get_ident(), None)
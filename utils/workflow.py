@@ -0,0 +1,50 @@
+import sys
+from loguru import logger
+from .utilities import Utilities
+from .stages import Stage
+from .tagging import tag_imported_resources
+from .planner import root_plan_timeout
+
+
+def run_import_workflow(importer):
+    """
+    The workflow steps shared by every importer, which only supplies discover() and generate_import_blocks(details).
+    generate_import_blocks returns the succeeded and quarantined jobs, it exits when nothing was discovered.
+    """
+    if Utilities.skip_resources_from_settings(importer.subscription_name, importer.resource):
+        logger.info(f"Skipping Resources {importer.resource} from subscription account {importer.subscription_name}. For more info check utils/settings.py\n Exitting.")
+        sys.exit(1)
+
+    importer.incremental.load_changes()
+    if importer.incremental.nothing_changed():
+        logger.info(f"No {importer.resource} changed since the last run: Nothing to do. Exitting")
+        importer.incremental.commit()
+        sys.exit(0)
+
+    # Init doesn't depend on discovery, it runs in the background until the first plan needs it.
+    # Sharded runs plan nothing in the top-level directory, each shard is initialised by ShardLayout.prepare
+    terraform_init = None if importer.layout.shard_by else Stage("terraform init", Utilities.terraform_init, importer.local_repo_path)
+    try:
+        details = importer.discover()
+    except BaseException:
+        # Discovery failed or exited, the init isn't needed anymore
+        if terraform_init:
+            terraform_init.cancel()
+        raise
+    if not details:
+        importer.incremental.commit()
+
+    if terraform_init:
+        terraform_init.wait()
+    succeeded, quarantined = importer.generate_import_blocks(details)
+    # Tagged before the final plan, which then shows the generated config keeps the tag
+    if importer.options.get("tag_imported"):
+        tag_imported_resources(importer.subscription_id, succeeded)
+
+    for root_path in importer.layout.roots():
+        Utilities.run_terraform_cmd(["terraform", f"-chdir={root_path}", "fmt"])
+        Utilities.run_terraform_cmd(["terraform", f"-chdir={root_path}", "plan"], timeout=root_plan_timeout(importer.tf_index, root_path, importer.options.get("plan_timeout")))
+
+    # Keep the high-water mark so quarantined resources are picked up again by the next incremental run
+    if not quarantined:
+        importer.incremental.commit()